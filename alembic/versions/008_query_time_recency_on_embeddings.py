@@ -0,0 +1,52 @@
+"""Store occurred_at on embeddings and compute recency at query time.
+
+Replaces the frozen recency_score column (computed once at insert time)
+with the source object's occurred_at timestamp.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "embeddings",
+        sa.Column("occurred_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    # Backfill from events for existing event embeddings
+    op.execute(
+        """
+        UPDATE embeddings AS e
+        SET occurred_at = ev.occurred_at
+        FROM events AS ev
+        WHERE e.object_type = 'event' AND e.object_id = ev.id
+        """
+    )
+    op.drop_index("idx_embeddings_recency_score", table_name="embeddings")
+    op.drop_column("embeddings", "recency_score")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "embeddings",
+        sa.Column("recency_score", sa.Float(), nullable=True),
+    )
+    op.create_index(
+        "idx_embeddings_recency_score",
+        "embeddings",
+        ["recency_score"],
+    )
+    op.drop_column("embeddings", "occurred_at")
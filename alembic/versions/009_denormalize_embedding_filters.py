@@ -0,0 +1,54 @@
+"""Denormalize source onto embeddings and add pre-filter indexes.
+
+Lets vector search filter by time window and source without joining
+events, and supports the exact pre-filtered scan path.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "embeddings",
+        sa.Column("source", sa.String(50), nullable=True),
+    )
+    # Backfill from events for existing event embeddings
+    op.execute(
+        """
+        UPDATE embeddings AS e
+        SET source = ev.source
+        FROM events AS ev
+        WHERE e.object_type = 'event' AND e.object_id = ev.id
+        """
+    )
+    op.create_index(
+        "idx_embeddings_user_type_occurred_at",
+        "embeddings",
+        ["user_id", "object_type", "occurred_at"],
+    )
+    op.create_index(
+        "idx_embeddings_user_source_occurred_at",
+        "embeddings",
+        ["user_id", "source", "occurred_at"],
+        postgresql_where=sa.text("object_type = 'event'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_embeddings_user_source_occurred_at", table_name="embeddings")
+    op.drop_index("idx_embeddings_user_type_occurred_at", table_name="embeddings")
+    op.drop_column("embeddings", "source")
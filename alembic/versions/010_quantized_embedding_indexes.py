@@ -0,0 +1,64 @@
+"""Add a half-precision or binary-quantized HNSW index on embeddings.
+
+Builds the expression index over the full-precision column for the
+configured VECTOR_STORAGE_MODE ("halfvec" or "binary"), used for candidate
+generation with the shortlist rescored against the full vectors, and drops
+the full-precision HNSW index, which those modes never use. Other modes are
+left unchanged. Indexes are built CONCURRENTLY so writes continue during the
+build. Requires pgvector 0.7+.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIM = settings.embedding_dimensions  # Size of the embeddings.embedding column
+
+# Must match VectorStore._index_distance
+INDEXES = {
+    # Half-precision index (halves index memory, near-identical recall)
+    "halfvec": (
+        "idx_embeddings_vector_halfvec",
+        f"(embedding::halfvec({DIM})) halfvec_cosine_ops",
+    ),
+    # Binary-quantized index (1 bit per dimension, needs oversampling)
+    "binary": (
+        "idx_embeddings_vector_binary",
+        f"(binary_quantize(embedding)::bit({DIM})) bit_hamming_ops",
+    ),
+}
+
+
+def upgrade() -> None:
+    if settings.vector_storage_mode not in INDEXES:
+        return
+    name, expression = INDEXES[settings.vector_storage_mode]
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON embeddings "
+            f"USING hnsw ({expression})"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_embeddings_vector")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_vector "
+            "ON embeddings USING hnsw (embedding vector_cosine_ops)"
+        )
+        for name, _ in INDEXES.values():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,72 @@
+"""Add a reduced-dimension (Matryoshka) HNSW index and size the vector column.
+
+When VECTOR_STORAGE_MODE is "matryoshka" (meaningful for text-embedding-3-*
+models), indexes only the first EMBEDDING_SHORT_DIM dimensions of each
+embedding for candidate generation and drops the full-precision HNSW index;
+the shortlist is rescored against the full vectors. The index is built
+CONCURRENTLY. Requires pgvector 0.7+.
+
+The embedding column becomes vector(EMBEDDING_DIMENSIONS) and the dimension
+check compares against the stored vector instead of a hard-coded 1536.
+Changing the size only succeeds while no rows of another size exist.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIM = settings.embedding_dimensions  # Size of the embeddings.embedding column
+SHORT_DIM = settings.embedding_short_dim
+
+
+def upgrade() -> None:
+    op.drop_constraint("ck_embeddings_dim_matches_vector", "embeddings", type_="check")
+    op.create_check_constraint(
+        "ck_embeddings_dim_matches_vector",
+        "embeddings",
+        "embedding_dim = vector_dims(embedding)",
+    )
+    if DIM != 1536:
+        op.execute(f"ALTER TABLE embeddings ALTER COLUMN embedding TYPE vector({DIM})")
+    if settings.vector_storage_mode != "matryoshka":
+        return
+    with op.get_context().autocommit_block():
+        # Must match EMBEDDING_SHORT_DIM and VectorStore._index_distance
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_vector_short "
+            "ON embeddings USING hnsw "
+            f"((subvector(embedding, 1, {SHORT_DIM})::vector({SHORT_DIM})) "
+            "vector_cosine_ops)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_embeddings_vector")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        if settings.vector_storage_mode == "matryoshka":
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_embeddings_vector "
+                "ON embeddings USING hnsw (embedding vector_cosine_ops)"
+            )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_embeddings_vector_short")
+    if DIM != 1536:
+        op.execute("ALTER TABLE embeddings ALTER COLUMN embedding TYPE vector(1536)")
+    op.drop_constraint("ck_embeddings_dim_matches_vector", "embeddings", type_="check")
+    op.create_check_constraint(
+        "ck_embeddings_dim_matches_vector",
+        "embeddings",
+        "embedding_dim = 1536",
+    )
@@ -0,0 +1,68 @@
+"""Add embedding_model_states table for online model migrations.
+
+Tracks, per user, the embedding model searches read from and the progress
+of a backfill to a new model (keyset checkpoint, counts, timestamps). The
+partial index drives the backfill's keyset walk and the batched deletes of
+the replaced model's rows.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_model_states",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("active_model", sa.String(100), nullable=False),
+        sa.Column("target_model", sa.String(100), nullable=True),
+        sa.Column("previous_model", sa.String(100), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="idle"),
+        sa.Column("cursor_object_type", sa.String(50), nullable=True),
+        sa.Column("cursor_object_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("migrated_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.CheckConstraint(
+            "status IN ('idle', 'backfilling', 'waiting', 'collecting')",
+            name="ck_embedding_model_states_status",
+        ),
+    )
+
+    # One row per object and model: keyset order for the backfill walk
+    op.create_index(
+        "idx_embeddings_user_model_object",
+        "embeddings",
+        ["user_id", "embedding_model", "object_type", "object_id"],
+        postgresql_where=sa.text("chunk_index = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_embeddings_user_model_object", table_name="embeddings")
+    op.drop_table("embedding_model_states")
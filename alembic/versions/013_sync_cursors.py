@@ -0,0 +1,65 @@
+"""Add sync_cursors table for incremental connector polling.
+
+One row per linked account and channel/dialog/folder ("scope") holding
+where the last poll stopped: a Slack message ts, a Telegram message id or
+a Microsoft Graph delta link. Cursors are written in the same transaction
+as the events they cover.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_cursors",
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("uuid_generate_v4()"),
+        ),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "linked_account_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("linked_accounts.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("scope", sa.Text(), nullable=False),
+        sa.Column("cursor", sa.Text(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.UniqueConstraint(
+            "linked_account_id", "scope", name="uq_sync_cursors_account_scope"
+        ),
+    )
+    op.create_index("idx_sync_cursors_user_id", "sync_cursors", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_sync_cursors_user_id", table_name="sync_cursors")
+    op.drop_table("sync_cursors")
@@ -0,0 +1,63 @@
+"""Add context_bank_runs table for the sharded fleet refresh.
+
+One row per user recording when the fleet scheduler last started and
+finished refreshing their context bank. Users refreshed within the refresh
+interval, or with a refresh in flight, are skipped, so an interrupted fleet
+run resumes with the users it did not reach.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "context_bank_runs",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("last_started_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("last_finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("last_status", sa.String(20), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("events_processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.CheckConstraint(
+            "last_status IS NULL OR last_status IN ('success', 'error')",
+            name="ck_context_bank_runs_last_status",
+        ),
+    )
+    op.create_index(
+        "idx_context_bank_runs_last_finished_at",
+        "context_bank_runs",
+        ["last_finished_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "idx_context_bank_runs_last_finished_at", table_name="context_bank_runs"
+    )
+    op.drop_table("context_bank_runs")
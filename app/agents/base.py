@@ -4,19 +4,28 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 from openai import AsyncOpenAI, OpenAIError
 
 from app.core.config import settings
 
 if TYPE_CHECKING:
+    import numpy as np
+    from sqlalchemy.ext.asyncio import AsyncSession
+
     from app.agents.orchestrator import AgentOrchestrator
+    from app.services.embedding import EmbeddingService
+    from app.services.vector import VectorStore
 
 
 class AgentBase:
     """Base utilities for agents with orchestrator support."""
 
+    # Set by agents that search embeddings (see embed_search_query)
+    vector_store: "VectorStore"
+    embedding_service: "EmbeddingService"
+
     def __init__(
         self,
         model: str = "gpt-4.1-mini",
@@ -58,6 +67,28 @@ class AgentBase:
             self.logger.error("LLM response parsing failed", extra={"error": str(exc)})
             raise RuntimeError("LLM response invalid") from exc
 
+    async def embed_search_query(
+        self,
+        session: "AsyncSession",
+        user_id: str,
+        text: str,
+        object_type: str = "event",
+    ) -> Tuple[str, "np.ndarray"]:
+        """
+        Embed a search over a user's object_type rows.
+
+        Returns the embedding model serving those rows (it follows the user's
+        model migration, see jobs/reembedding.py) and the query vector; pass
+        the model to the search as embedding_model.
+        """
+        model = self.embedding_service.model_for(
+            object_type,
+            await self.vector_store.read_model(
+                session, user_id, self.embedding_service.model
+            ),
+        )
+        return model, (await self.embedding_service.embed_text([text], model))[0]
+
     async def get_other_agent_result(
         self,
         agent_name: str,
@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.base import AgentBase
 from app.services.embedding import EmbeddingService
-from app.services.vector import VectorStore
+from app.services.vector import VectorRecord, VectorStore, create_vector_store
 
 if TYPE_CHECKING:
     from app.agents.orchestrator import AgentOrchestrator
@@ -41,7 +41,7 @@ class QueryAgent(AgentBase):
         orchestrator: Optional["AgentOrchestrator"] = None,
     ) -> None:
         super().__init__(orchestrator=orchestrator)
-        self.vector_store = vector_store or VectorStore()
+        self.vector_store = vector_store or create_vector_store()
         self.embedding_service = embedding_service or EmbeddingService(
             vector_store=self.vector_store
         )
@@ -58,12 +58,15 @@ class QueryAgent(AgentBase):
         Push-based method: Proactively build context bank by fetching events,
         generating embeddings with recency scores, and storing context.
 
-        Called by background job at intervals or on events.
+        Called by background job at intervals or on events. The returned
+        embedding_items must be pushed (push_embedding_items) after the
+        session commits.
         """
         from app.jobs.ingestion import ingest_events_for_user
 
         # Fetch new events via connectors and generate embeddings
-        event_count = await ingest_events_for_user(session, user_id)
+        ingestion = await ingest_events_for_user(session, user_id)
+        event_count = ingestion["events"]
 
         logger.info(
             "Context bank updated",
@@ -76,6 +79,9 @@ class QueryAgent(AgentBase):
 
         return {
             "events_processed": event_count,
+            "connectors": ingestion["connectors"],
+            # Queue items for new events; pushed by the caller after commit
+            "embedding_items": ingestion["embedding_items"],
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "sources": sources or ["slack", "telegram", "outlook"],
         }
@@ -92,12 +98,14 @@ class QueryAgent(AgentBase):
         top_k: int = 20,
     ) -> Dict[str, Any]:
         """
-        Fine-grained search using semantic similarity + stored recency scores.
+        Fine-grained search using semantic similarity + query-time recency scores.
 
         Used by other agents to retrieve specific context from the context bank.
         Returns results ranked by combined semantic + recency score.
         """
-        query_vector = (await self.embedding_service.embed_text([query]))[0]
+        read_model, query_vector = await self.embed_search_query(
+            session, user_id, query
+        )
         vector_results = await self.vector_store.search(
             session,
             user_id=user_id,
@@ -108,8 +116,16 @@ class QueryAgent(AgentBase):
             time_end=time_end,
             sources=sources,
             query_text=query,
+            embedding_model=read_model,
         )
 
+        return self.format_search_results(query, vector_results)
+
+    @staticmethod
+    def format_search_results(
+        query: str, vector_results: List[VectorRecord]
+    ) -> Dict[str, Any]:
+        """Shape vector search results into the fine-grained search payload."""
         return {
             "results": [
                 {
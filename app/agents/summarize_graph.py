@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.base import AgentBase
 from app.models import Summary
 from app.services.embedding import EmbeddingService
-from app.services.vector import VectorStore
+from app.services.vector import VectorStore, create_vector_store
 
 if TYPE_CHECKING:
     from app.agents.orchestrator import AgentOrchestrator
@@ -35,7 +35,7 @@ class SummarizeAgent(AgentBase):
         orchestrator: Optional["AgentOrchestrator"] = None,
     ):
         super().__init__(orchestrator=orchestrator)
-        self.vector_store = vector_store or VectorStore()
+        self.vector_store = vector_store or create_vector_store()
         self.embedding_service = embedding_service or EmbeddingService(
             vector_store=self.vector_store
         )
@@ -53,33 +53,13 @@ class SummarizeAgent(AgentBase):
         """
         Summarize events in the specified time range - only called on user request (pull-based).
 
-        Uses stored recency scores in hybrid ranking.
+        Uses hybrid semantic + recency ranking.
         Can use QueryAgent's context bank for additional context.
         """
-        # Optionally get additional context from QueryAgent
-        query_context = None
-        if self.orchestrator:
-            from app.agents.query_graph import QueryAgent
-
-            query_agent = QueryAgent(orchestrator=self.orchestrator)
-            try:
-                query_context = await query_agent.fine_grained_search(
-                    session,
-                    user_id=user_id,
-                    query=prompt,
-                    sources=sources,
-                    time_start=time_start,
-                    time_end=time_end,
-                    top_k=10,
-                )
-            except Exception as exc:
-                self.logger.warning(
-                    "Failed to get QueryAgent context",
-                    extra={"error": str(exc)},
-                )
-
-        # Retrieve events by semantic search (uses stored recency_score)
-        query_vector = (await self.embedding_service.embed_text([prompt]))[0]
+        # Retrieve events by semantic search (hybrid semantic + recency ranking)
+        read_model, query_vector = await self.embed_search_query(
+            session, user_id, prompt
+        )
         vector_results = await self.vector_store.search(
             session,
             user_id=user_id,
@@ -90,8 +70,20 @@ class SummarizeAgent(AgentBase):
             time_end=time_end,
             sources=sources,
             query_text=prompt,
+            embedding_model=read_model,
         )
 
+        # QueryAgent's fine-grained search uses the same prompt and filters, so
+        # its top 10 is a prefix of this result set; reuse it instead of running
+        # a second embedding call and vector search.
+        query_context = None
+        if self.orchestrator:
+            from app.agents.query_graph import QueryAgent
+
+            query_context = QueryAgent.format_search_results(
+                prompt, vector_results[:10]
+            )
+
         # Build context (no message content, only metadata from embeddings)
         context_lines = []
         for vr in vector_results:
@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.base import AgentBase
 from app.models import Task
 from app.services.embedding import EmbeddingService
-from app.services.vector import VectorStore
+from app.services.vector import VectorStore, create_vector_store
 
 if TYPE_CHECKING:
     from app.agents.orchestrator import AgentOrchestrator
@@ -34,7 +34,7 @@ class TaskAgent(AgentBase):
         orchestrator: Optional["AgentOrchestrator"] = None,
     ):
         super().__init__(orchestrator=orchestrator)
-        self.vector_store = vector_store or VectorStore()
+        self.vector_store = vector_store or create_vector_store()
         self.embedding_service = embedding_service or EmbeddingService(
             vector_store=self.vector_store
         )
@@ -52,10 +52,12 @@ class TaskAgent(AgentBase):
         """
         Identify actionable tasks from events in the specified time range.
 
-        Uses stored recency scores in hybrid ranking.
+        Uses hybrid semantic + recency ranking.
         """
-        # Retrieve top events (uses stored recency_score)
-        query_vector = (await self.embedding_service.embed_text([prompt]))[0]
+        # Retrieve top events (hybrid semantic + recency ranking)
+        read_model, query_vector = await self.embed_search_query(
+            session, user_id, prompt
+        )
         vector_results = await self.vector_store.search(
             session,
             user_id=user_id,
@@ -66,6 +68,7 @@ class TaskAgent(AgentBase):
             time_end=time_end,
             sources=sources,
             query_text=prompt,
+            embedding_model=read_model,
         )
 
         # Build context (no message content, only metadata)
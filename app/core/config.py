@@ -1,5 +1,7 @@
 """Application configuration using Pydantic Settings."""
 
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -51,11 +53,99 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
 
+    # Embeddings
+    embedding_model: str = (
+        "text-embedding-ada-002"  # "local-hash-v1" embeds in-process without OpenAI
+    )
+    embedding_object_type_models: Dict[str, str] = (
+        {}  # Per object type model overrides (JSON), e.g. {"entity": "local-hash-v1"}
+    )
+    embedding_dimensions: int = (
+        1536  # embeddings.embedding vector size; text-embedding-3-* output size
+    )
+    embedding_short_dim: int = (
+        256  # Matryoshka prefix length; must match the migration 011 index
+    )
+    embedding_chunk_tokens: int = 1000  # Sentence-packed chunk budget per input
+    embedding_chunk_overlap_tokens: int = 100  # Trailing context repeated per chunk
+    embedding_batch_max_inputs: int = 2048  # Provider cap on inputs per request
+    embedding_batch_max_tokens: int = (
+        300_000  # Provider cap on total tokens per request (estimated)
+    )
+    embedding_max_concurrency: int = 4  # Embedding requests in flight per process
+    embedding_max_retries: int = 5  # Retries for 429s and transient errors
+    embedding_requests_per_minute: int = (
+        3000  # Initial request bucket; corrected from rate-limit headers
+    )
+    embedding_tokens_per_minute: int = (
+        1_000_000  # Initial token bucket; corrected from rate-limit headers
+    )
+    embedding_queue_enabled: bool = True  # Ingestion enqueues; embedding worker drains
+    embedding_queue_name: str = "embeddings"  # RQ queue for drain jobs
+    embedding_drain_batch_size: int = 256  # Queued objects per embed/commit cycle
+    embedding_drain_lease_seconds: int = 300  # Drainer lock lease, renewed per batch
+    embedding_drain_max_attempts: int = 5  # Failures before an item is dead-lettered
+    embedding_drain_retry_seconds: int = 60  # Delay before failed items are retried
+    embedding_text_ttl_seconds: int = (
+        86400  # Queued text is dropped if not embedded within this window
+    )
+    embedding_cache_enabled: bool = True  # Content-addressed vector cache in Redis
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600  # Sliding; refreshed on hits
+    reembed_batch_size: int = 100  # Objects per checkpointed re-embedding batch
+    reembed_batch_interval_seconds: float = 1.0  # Pause between batches (throttle)
+    reembed_max_batches_per_run: int = 50  # Then the job re-enqueues itself
+    reembed_collect_batch_size: int = 1000  # Old-model rows deleted per transaction
+    reembed_recheck_seconds: int = (
+        6 * 3600  # Re-check interval for users waiting on unmigratable (event) rows
+    )
+    reembed_scheduled_ttl_seconds: int = (
+        3600  # A queued job not started this long after its delay can be replaced
+    )
+
+    # Ingestion
+    ingestion_max_concurrent_fetches: int = 3  # Connector fetches in flight per user
+    ingestion_fetch_timeout_seconds: float = 60.0  # Per connector; then skipped
+    ingestion_insert_batch_size: int = 500  # Events per multi-row INSERT statement
+    ingestion_pipeline_queue_size: int = 4  # Pages/batches buffered between stages
+
+    # Context-bank fleet refresh (run_query_agent_for_all_users)
+    fleet_queue_name: str = "default"  # RQ queue for shard jobs
+    fleet_shard_size: int = 200  # Users per shard job
+    fleet_shard_timeout_seconds: int = 1800  # RQ job timeout per shard
+    fleet_user_concurrency: int = 8  # Users refreshed at once within a shard job
+    fleet_start_jitter_seconds: float = 30.0  # Random delay before each refresh
+    fleet_refresh_interval_seconds: int = (
+        3600  # Schedule period; each user is refreshed once per aligned window
+    )
+    fleet_schedule_slack_seconds: int = 120  # Early ticks count for the next window
+    fleet_run_lease_seconds: int = (
+        900  # In-flight refreshes older than this are presumed dead and retried
+    )
+
     # Ranking configuration (hybrid semantic+recency)
     ranking_alpha: float = 0.85  # Semantic weight (0.0-1.0), default 0.85
     ranking_tau_days: float = 14.0  # Recency decay half-life in days, default 14
     rerank_candidates_topn: int = 50  # Stage A candidates before reranking, default 50
     ranking_mode: str = "weighted"  # "weighted" or "multiplier", default "weighted"
+    vector_exact_scan_max_rows: int = (
+        2000  # Filtered candidate sets up to this size skip HNSW for an exact scan
+    )
+    vector_storage_mode: str = (
+        "full"  # "full", "halfvec", "binary" or "matryoshka" HNSW index
+    )
+    vector_quantized_oversample: int = 4  # Shortlist multiplier for reduced modes
+    hnsw_ef_search: int = 100  # Initial hnsw.ef_search (raised to rerank topn)
+    hnsw_ef_search_max: int = 800  # Escalation ceiling before exact fallback
+    hnsw_iterative_scan: str = (
+        "relaxed_order"  # pgvector >= 0.8 iterative scans; "" to leave unset
+    )
+    vector_backend: str = "pgvector"  # "pgvector" or "memory" (per-process NumPy)
+    vector_memory_max_bytes: int = (
+        256 * 1024 * 1024  # Memory backend budget across cached users
+    )
+    vector_memory_ttl_seconds: int = (
+        300  # Reload cached users after this long (picks up other processes' writes)
+    )
 
     @property
     def is_production(self) -> bool:
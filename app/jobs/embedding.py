@@ -1,10 +1,15 @@
-"""Embedding generation job."""
+"""Embedding generation job and the asynchronous embedding queue."""
 
+import hashlib
+import json
 import logging
-from typing import List
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.services.embedding import (
     EmbeddingObject,
     EmbeddingService,
@@ -13,6 +18,30 @@ from app.services.embedding import (
 
 logger = logging.getLogger(__name__)
 
+# Redis keys for the embedding queue
+PENDING_KEY = "embedding:pending"  # LPUSH by ingestion, RPOPLPUSH by the drainer
+PROCESSING_KEY = "embedding:processing"  # Items popped but not yet stored
+TEXT_KEY = "embedding:text:{}"  # Text handle (content hash) -> text, with TTL
+SCHEDULED_KEY = "embedding:drain:scheduled"  # A drain job is queued
+LOCK_KEY = "embedding:drain:lock"  # Held by the single active drainer
+ATTEMPTS_KEY = "embedding:attempts"  # sha1(item) -> failed attempts so far
+DEAD_KEY = "embedding:dead"  # Items that failed EMBEDDING_DRAIN_MAX_ATTEMPTS times
+
+# Only the drainer whose token is stored in LOCK_KEY may renew or release it;
+# a drainer that outlived its lease must not touch its successor's lock
+_RENEW_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 async def embed_objects(
     session: AsyncSession,
@@ -37,4 +66,305 @@ async def embed_objects(
     return count
 
 
-__all__ = ["embed_objects"]
+def _get_redis():
+    from app.jobs.worker import get_redis_connection
+
+    return get_redis_connection()
+
+
+def schedule_drain(
+    redis=None, queue=None, delay_seconds: Optional[float] = None
+) -> bool:
+    """Enqueue a drain job (optionally delayed) unless one is already waiting."""
+    redis = redis or _get_redis()
+    if not redis.set(
+        SCHEDULED_KEY, "1", nx=True, ex=settings.embedding_drain_lease_seconds
+    ):
+        return False
+    if queue is None:
+        from rq import Queue
+
+        queue = Queue(settings.embedding_queue_name, connection=redis)
+    if delay_seconds:
+        queue.enqueue_in(timedelta(seconds=delay_seconds), drain_embedding_queue)
+    else:
+        queue.enqueue(drain_embedding_queue)
+    return True
+
+
+def stage_embedding_objects(objects: List[EmbeddingObject], redis=None) -> List[str]:
+    """
+    Write objects' texts to content-addressed keys with a TTL (messages are
+    never stored in Postgres) and return the queue items referencing them.
+
+    Nothing is queued yet: callers that write the objects' rows in a
+    transaction push the items with push_embedding_items after it commits,
+    so the worker never embeds rows that were rolled back. Texts of items
+    never pushed simply expire.
+    """
+    redis = redis or _get_redis()
+    items = []
+    texts: Dict[str, str] = {}
+    for obj in objects:
+        text = obj.text or ""
+        if not text.strip():
+            continue
+        content_hash = obj.content_hash or compute_content_hash(text)
+        texts[TEXT_KEY.format(content_hash)] = text
+        items.append(
+            json.dumps(
+                {
+                    "user_id": str(obj.user_id),
+                    "object_type": obj.object_type,
+                    "object_id": str(obj.object_id),
+                    "content_hash": content_hash,
+                    "metadata": obj.metadata or {},
+                    "occurred_at": (
+                        obj.occurred_at.isoformat() if obj.occurred_at else None
+                    ),
+                    "source": obj.source,
+                }
+            )
+        )
+    if texts:
+        pipe = redis.pipeline(transaction=False)
+        for key, text in texts.items():
+            pipe.set(key, text, ex=settings.embedding_text_ttl_seconds)
+        pipe.execute()
+    return items
+
+
+def push_embedding_items(items: Sequence[str], redis=None, queue=None) -> int:
+    """Queue staged items for the embedding worker and schedule a drain."""
+    if not items:
+        return 0
+    redis = redis or _get_redis()
+    redis.lpush(PENDING_KEY, *items)
+    schedule_drain(redis, queue)
+    return len(items)
+
+
+def enqueue_embedding_objects(
+    objects: List[EmbeddingObject], redis=None, queue=None
+) -> int:
+    """
+    Hand objects to the embedding worker instead of embedding inline.
+
+    Only for objects whose rows are already committed; see
+    stage_embedding_objects otherwise.
+    """
+    redis = redis or _get_redis()
+    return push_embedding_items(stage_embedding_objects(objects, redis), redis, queue)
+
+
+def _decode_item(raw: Any, text: Optional[bytes]) -> EmbeddingObject:
+    item = json.loads(raw)
+    occurred_at = item.get("occurred_at")
+    return EmbeddingObject(
+        user_id=item["user_id"],
+        object_type=item["object_type"],
+        object_id=item["object_id"],
+        text=text.decode("utf-8") if isinstance(text, bytes) else text,
+        content_hash=item["content_hash"],
+        metadata=item.get("metadata") or {},
+        occurred_at=datetime.fromisoformat(occurred_at) if occurred_at else None,
+        source=item.get("source"),
+    )
+
+
+def _attempts_field(raw: Any) -> str:
+    return hashlib.sha1(raw if isinstance(raw, bytes) else raw.encode()).hexdigest()
+
+
+def _record_failure(redis, raw: Any, exc: Exception, stats: Dict[str, int]) -> None:
+    """
+    Count a failed attempt of one item; at EMBEDDING_DRAIN_MAX_ATTEMPTS move
+    it to the dead-letter list, otherwise leave it on the processing list
+    for the next drain to retry.
+    """
+    field = _attempts_field(raw)
+    attempts = redis.hincrby(ATTEMPTS_KEY, field, 1)
+    if attempts < settings.embedding_drain_max_attempts:
+        stats["retried"] += 1
+        return
+    pipe = redis.pipeline(transaction=False)
+    pipe.lrem(PROCESSING_KEY, 1, raw)
+    pipe.lpush(DEAD_KEY, raw)
+    pipe.hdel(ATTEMPTS_KEY, field)
+    pipe.execute()
+    stats["dead_lettered"] += 1
+    logger.error(
+        "Embedding queue item dead-lettered",
+        extra={"attempts": attempts, "error": str(exc)},
+    )
+
+
+async def _store_items(
+    items: List[Tuple[Any, EmbeddingObject]],
+    *,
+    redis,
+    embedding_service: EmbeddingService,
+    session_factory,
+    stats: Dict[str, int],
+    streak: Dict[str, int],
+) -> Tuple[int, List[Any]]:
+    """
+    Embed and commit items; on failure bisect to isolate the failing ones.
+
+    Returns the stored count and the raw items that failed. A run of failed
+    calls longer than streak["limit"] without a success means the provider
+    or database is down rather than an item being bad: the error is raised
+    and the unacknowledged items are redelivered by the next drain.
+    """
+    try:
+        async with session_factory() as session:
+            stored = await embed_objects(
+                session, [obj for _, obj in items], embedding_service
+            )
+            await session.commit()
+    except Exception as exc:
+        streak["failed"] += 1
+        if streak["failed"] > streak["limit"]:
+            raise
+        if len(items) == 1:
+            _record_failure(redis, items[0][0], exc, stats)
+            return 0, [items[0][0]]
+        mid = len(items) // 2
+        stored, failed = 0, []
+        for half in (items[:mid], items[mid:]):
+            half_stored, half_failed = await _store_items(
+                half,
+                redis=redis,
+                embedding_service=embedding_service,
+                session_factory=session_factory,
+                stats=stats,
+                streak=streak,
+            )
+            stored += half_stored
+            failed += half_failed
+        return stored, failed
+    streak["failed"] = 0
+    return stored, []
+
+
+async def drain_embedding_queue(
+    redis=None,
+    embedding_service: Optional[EmbeddingService] = None,
+    session_factory=None,
+    max_batches: Optional[int] = None,
+    queue=None,
+) -> Dict[str, int]:
+    """
+    RQ job (queue EMBEDDING_QUEUE_NAME): embed queued objects in batches that
+    mix many users.
+
+    Delivery is at-least-once: items stay on the processing list until their
+    batch is committed, and a drainer that finds leftovers from a crashed run
+    puts them back. Re-embedding a redelivered item upserts the same unique
+    (user, object, chunk, model) row, and the content hash pre-check usually
+    skips it outright.
+
+    A failing batch is bisected so one bad item (e.g. input the provider
+    rejects) does not hold back the rest. Failed items are retried by a
+    drain EMBEDDING_DRAIN_RETRY_SECONDS later and moved to the
+    ``embedding:dead`` list after EMBEDDING_DRAIN_MAX_ATTEMPTS failures.
+    """
+    redis = redis or _get_redis()
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    lease = settings.embedding_drain_lease_seconds
+    stats = {
+        "batches": 0,
+        "objects": 0,
+        "stored": 0,
+        "missing_text": 0,
+        "retried": 0,
+        "dead_lettered": 0,
+    }
+
+    # Clear first so anything enqueued from now on schedules a new drain
+    redis.delete(SCHEDULED_KEY)
+    token = secrets.token_hex(16)
+    if not redis.set(LOCK_KEY, token, nx=True, ex=lease):
+        # The active drainer keeps going until the queue is empty
+        return stats
+
+    try:
+        while redis.rpoplpush(PROCESSING_KEY, PENDING_KEY) is not None:
+            pass  # Requeue leftovers of a crashed drain or failed items
+
+        embedding_service = embedding_service or EmbeddingService()
+        batch_size = settings.embedding_drain_batch_size
+        # Enough consecutive failures to bisect a batch down to single items
+        streak = {"failed": 0, "limit": 2 * (max(batch_size, 1).bit_length() + 1)}
+        while max_batches is None or stats["batches"] < max_batches:
+            pipe = redis.pipeline(transaction=False)
+            for _ in range(batch_size):
+                pipe.rpoplpush(PENDING_KEY, PROCESSING_KEY)
+            raw_items = [raw for raw in pipe.execute() if raw is not None]
+            if not raw_items:
+                break
+
+            handles = [json.loads(raw)["content_hash"] for raw in raw_items]
+            texts = redis.mget([TEXT_KEY.format(handle) for handle in handles])
+            items = [
+                (raw, _decode_item(raw, text))
+                for raw, text in zip(raw_items, texts)
+                if text is not None
+            ]
+            stats["missing_text"] += len(raw_items) - len(items)
+
+            stored, failed = await _store_items(
+                items,
+                redis=redis,
+                embedding_service=embedding_service,
+                session_factory=session_factory,
+                stats=stats,
+                streak=streak,
+            )
+            stats["stored"] += stored
+
+            # Failed items stay on the processing list (or were dead-lettered)
+            acked = list(raw_items)
+            for raw in failed:
+                acked.remove(raw)
+            pipe = redis.pipeline(transaction=False)
+            for raw in acked:
+                pipe.lrem(PROCESSING_KEY, 1, raw)
+            if acked:
+                pipe.hdel(ATTEMPTS_KEY, *(_attempts_field(raw) for raw in acked))
+            pipe.execute()
+            stats["batches"] += 1
+            stats["objects"] += len(items) - len(failed)
+            if not redis.eval(_RENEW_LOCK, 1, LOCK_KEY, token, lease):
+                # Lease expired and another drainer may hold the lock now
+                logger.warning("Embedding drain lock lost", extra=stats)
+                break
+    finally:
+        redis.eval(_RELEASE_LOCK, 1, LOCK_KEY, token)
+
+    if redis.llen(PENDING_KEY):
+        schedule_drain(redis, queue)
+    elif redis.llen(PROCESSING_KEY):
+        schedule_drain(
+            redis, queue, delay_seconds=settings.embedding_drain_retry_seconds
+        )
+    if stats["missing_text"]:
+        logger.warning(
+            "Embedding queue items expired before processing",
+            extra={"count": stats["missing_text"]},
+        )
+    logger.info("Embedding queue drained", extra=stats)
+    return stats
+
+
+__all__ = [
+    "embed_objects",
+    "enqueue_embedding_objects",
+    "drain_embedding_queue",
+    "push_embedding_items",
+    "schedule_drain",
+    "stage_embedding_objects",
+]
@@ -1,16 +1,34 @@
-"""Event ingestion job (poll connectors every 5 minutes)."""
+"""
+Event ingestion job (poll connectors every 5 minutes).
 
+Ingestion is a staged pipeline connected by bounded queues:
+
+    fetch (one task per connector) -> normalize -> insert -> embed
+
+Connectors stream pages (iter_event_pages); each stage hands its output on
+as soon as a page or batch is ready, so fetching, inserting and embedding
+overlap, and at most INGESTION_PIPELINE_QUEUE_SIZE items wait between two
+stages. Memory stays flat however large a user's backlog is.
+"""
+
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.jobs.embedding import stage_embedding_objects
 from app.models import Event, LinkedAccount
 from app.services.connector import (
+    BaseConnector,
     outlook_connector,
+    save_sync_cursors,
     slack_connector,
     telegram_connector,
 )
@@ -18,106 +36,339 @@ from app.services.embedding import EmbeddingObject, EmbeddingService
 
 logger = logging.getLogger(__name__)
 
+_DONE = object()  # End of stream, passed down the pipeline
+
+
+@dataclass
+class _EventBatch:
+    """Normalized rows of one connector, at most INGESTION_INSERT_BATCH_SIZE."""
+
+    provider: str
+    account_id: Any
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    texts: List[Optional[str]] = field(default_factory=list)
+    # Cursors of the page this batch ends, saved once its rows are written
+    cursors: Dict[str, str] = field(default_factory=dict)
+
+
+def _event_row(
+    user_id: str, connector: BaseConnector, evt: Dict[str, Any], now: datetime
+) -> Dict[str, Any]:
+    """Event column values for a fetched event (message content excluded)."""
+    return {
+        "user_id": user_id,
+        "source": evt.get("source", connector.provider),
+        "source_account_id": evt.get("source_account_id"),
+        "external_id": evt.get("external_id"),
+        "thread_id": evt.get("thread_id"),
+        "event_type": evt.get("event_type", "message"),
+        "title": evt.get("title"),
+        # Note: body and text_for_embedding removed - messages not stored
+        "url": evt.get("url"),
+        "content_hash": evt.get("content_hash", ""),
+        "importance_score": evt.get("importance_score", 0),
+        "occurred_at": evt.get("occurred_at", now),
+        "expires_at": evt.get("expires_at", now + timedelta(days=30)),
+        "deleted_at": None,
+        "raw": evt.get("raw", {}),
+    }
+
 
-async def ingest_events_for_user(session: AsyncSession, user_id: str) -> int:
+async def _insert_event_batch(
+    session: AsyncSession,
+    rows: List[Dict[str, Any]],
+    texts: List[Optional[str]],
+    embedding_objects: List[EmbeddingObject],
+) -> int:
     """
-    Ingest events for a single user from all connectors with idempotency.
-    Messages are not stored - only used for generating embeddings.
+    Insert rows with one multi-row statement; events that already exist are
+    skipped. RETURNING maps the new ids back to their embedding texts by
+    (source, external_id), the idempotency key.
     """
-    total = 0
-    connectors = [slack_connector, telegram_connector, outlook_connector]
-    now = datetime.now(timezone.utc)
-
-    # Collect embedding objects to process after event insertion
-    embedding_objects: List[Tuple[EmbeddingObject, datetime]] = []
+    pending: Dict[Tuple[str, Optional[str]], List[Tuple[Dict[str, Any], str]]] = {}
+    for row, text in zip(rows, texts):
+        if text and text.strip():
+            pending.setdefault((row["source"], row["external_id"]), []).append(
+                (row, text)
+            )
 
-    # Fetch linked accounts for the user to limit providers
-    result = await session.execute(
-        select(LinkedAccount).where(LinkedAccount.user_id == user_id)
+    stmt = (
+        insert(Event)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "source", "external_id"])
+        .returning(Event.id, Event.source, Event.external_id)
     )
-    accounts = result.scalars().all()
-    provider_map = {acc.provider: acc for acc in accounts}
+    inserted = (await session.execute(stmt)).all()
 
-    for connector in connectors:
-        if connector.provider not in provider_map:
+    for event_id, source, external_id in inserted:
+        # Queue embedding generation if text available
+        matches = pending.get((source, external_id))
+        if not matches:
             continue
+        row, text = matches.pop(0)
+        embedding_objects.append(
+            EmbeddingObject(
+                user_id=row["user_id"],
+                object_type="event",
+                object_id=str(event_id),
+                text=text,
+                metadata={"source": source},
+                occurred_at=row["occurred_at"],
+                source=source,
+            )
+        )
+    return len(inserted)
+
+
+async def _fetch_pages(
+    connector: BaseConnector,
+    user_id: str,
+    *,
+    session_factory,
+    semaphore: asyncio.Semaphore,
+    out: asyncio.Queue,
+    report: Dict[str, Any],
+) -> None:
+    """
+    Fetch stage: stream one connector's pages into out on its own session,
+    within the per-user concurrency limit.
+
+    INGESTION_FETCH_TIMEOUT_SECONDS bounds the time spent waiting on the
+    connector (not on a full queue). Pages handed on before a timeout or
+    error are still written, with the cursors they carry. The fetch session
+    is committed so token refreshes persist.
+    """
+    async with semaphore:
+        budget = settings.ingestion_fetch_timeout_seconds
+        waited = 0.0
         try:
-            events = await connector.fetch_events(
-                session=session, user_id=user_id, since=None
+            async with session_factory() as fetch_session:
+                pages = connector.iter_event_pages(
+                    session=fetch_session, user_id=user_id, since=None
+                ).__aiter__()
+                try:
+                    while True:
+                        started = time.monotonic()
+                        try:
+                            page = await asyncio.wait_for(
+                                pages.__anext__(), timeout=max(budget - waited, 0)
+                            )
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            waited += time.monotonic() - started
+                        report["pages"] += 1
+                        report["fetched"] += len(page)
+                        await out.put((connector, page))
+                finally:
+                    await pages.aclose()
+                await fetch_session.commit()
+        except asyncio.TimeoutError:
+            report["status"] = "timeout"
+            logger.warning(
+                "Connector fetch timed out",
+                extra={"provider": connector.provider, "user_id": user_id},
             )
         except Exception as exc:
+            report["status"] = "error"
             logger.warning(
                 "Connector fetch failed",
                 extra={"provider": connector.provider, "error": str(exc)},
             )
-            continue
-        for evt in events:
+        report["duration_ms"] = round(waited * 1000, 1)
+
+
+async def _normalize(
+    user_id: str, now: datetime, pages: asyncio.Queue, out: asyncio.Queue
+) -> None:
+    """
+    Normalize stage: turn fetched pages into insert batches of event rows and
+    their embedding texts.
+    """
+    batch_size = max(settings.ingestion_insert_batch_size, 1)
+    seen: Dict[str, set] = {}
+    while (item := await pages.get()) is not _DONE:
+        connector, page = item
+        seen_keys = seen.setdefault(connector.provider, set())
+        account_id = getattr(page, "account_id", None)
+        batch = _EventBatch(connector.provider, account_id)
+        for evt in page:
             # Extract embedding text (not stored in event)
             embedding_text = evt.pop("_embedding_text", None)
-            occurred_at = evt.get("occurred_at", now)
+            row = _event_row(user_id, connector, evt, now)
+            if row["external_id"] is not None:
+                # A statement cannot both insert and skip the same key
+                key = (row["source"], row["external_id"])
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+            batch.rows.append(row)
+            batch.texts.append(embedding_text)
+            if len(batch.rows) >= batch_size:
+                await out.put(batch)
+                batch = _EventBatch(connector.provider, account_id)
+        batch.cursors = dict(getattr(page, "cursors", {}))
+        if batch.rows or batch.cursors:
+            await out.put(batch)
+    await out.put(_DONE)
 
-            # Store event without message content
-            stmt = (
-                insert(Event)
-                .values(
-                    user_id=user_id,
-                    source=evt.get("source", connector.provider),
-                    source_account_id=evt.get("source_account_id"),
-                    external_id=evt.get("external_id"),
-                    thread_id=evt.get("thread_id"),
-                    event_type=evt.get("event_type", "message"),
-                    title=evt.get("title"),
-                    # Note: body and text_for_embedding removed - messages not stored
-                    url=evt.get("url"),
-                    content_hash=evt.get("content_hash", ""),
-                    importance_score=evt.get("importance_score", 0),
-                    occurred_at=occurred_at,
-                    expires_at=evt.get("expires_at", now + timedelta(days=30)),
-                    deleted_at=None,
-                    raw=evt.get("raw", {}),
+
+async def _insert(
+    session: AsyncSession,
+    user_id: str,
+    batches: asyncio.Queue,
+    out: asyncio.Queue,
+    session_lock: asyncio.Lock,
+    report: Dict[str, Dict[str, Any]],
+) -> None:
+    """
+    Insert stage: write batches on the caller's session in arrival order,
+    saving each page's cursors after its rows, and pass the new events'
+    embedding objects on.
+    """
+    while (batch := await batches.get()) is not _DONE:
+        embedding_objects: List[EmbeddingObject] = []
+        async with session_lock:
+            if batch.rows:
+                report[batch.provider]["inserted"] += await _insert_event_batch(
+                    session, batch.rows, batch.texts, embedding_objects
                 )
-                .on_conflict_do_nothing(
-                    index_elements=["user_id", "source", "external_id"]
+            if batch.cursors:
+                await save_sync_cursors(
+                    session,
+                    user_id=user_id,
+                    linked_account_id=batch.account_id,
+                    cursors=batch.cursors,
                 )
-                .returning(Event.id)
-            )
-            result = await session.execute(stmt)
-            row = result.fetchone()
-
-            if row:
-                event_id = row[0]
-                total += 1
-
-                # Queue embedding generation if text available
-                if embedding_text and embedding_text.strip():
-                    embedding_objects.append(
-                        (
-                            EmbeddingObject(
-                                user_id=user_id,
-                                object_type="event",
-                                object_id=str(event_id),
-                                text=embedding_text,
-                                metadata={
-                                    "source": evt.get("source", connector.provider)
-                                },
-                                occurred_at=occurred_at,
-                            ),
-                            occurred_at,
-                        )
-                    )
-
-    # Generate embeddings for all new events (with recency scores)
-    if embedding_objects:
-        embedding_service = EmbeddingService()
+        if embedding_objects:
+            await out.put(embedding_objects)
+    await out.put(_DONE)
+
+
+async def _embed(
+    session: AsyncSession,
+    user_id: str,
+    batches: asyncio.Queue,
+    session_lock: asyncio.Lock,
+    staged: List[str],
+) -> None:
+    """
+    Embed stage: stage new events' texts for the embedding worker (occurred_at
+    drives recency), so a slow provider never holds this session's connection
+    or delays the next user. The queue items are collected in staged for the
+    caller to push once the events are committed. With
+    EMBEDDING_QUEUE_ENABLED off they are embedded inline on the caller's
+    session, between inserts.
+    """
+    embedding_service: Optional[EmbeddingService] = None
+    while (objects := await batches.get()) is not _DONE:
         try:
-            # Extract just the EmbeddingObjects
-            objects_to_embed = [obj for obj, _ in embedding_objects]
-            await embedding_service.embed_and_store(session, objects_to_embed)
+            if settings.embedding_queue_enabled:
+                staged += await asyncio.to_thread(stage_embedding_objects, objects)
+            else:
+                embedding_service = embedding_service or EmbeddingService()
+                async with session_lock:
+                    await embedding_service.embed_and_store(session, objects)
         except Exception as exc:
             logger.warning(
                 "Embedding generation failed",
                 extra={"user_id": user_id, "error": str(exc)},
             )
 
-    logger.info("Ingestion completed", extra={"user_id": user_id, "count": total})
-    return total
+
+async def _run_stages(*stages) -> None:
+    """Run pipeline stages together; if one fails, cancel the rest."""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def ingest_events_for_user(
+    session: AsyncSession, user_id: str, session_factory=None
+) -> Dict[str, Any]:
+    """
+    Ingest events for a single user from all connectors with idempotency.
+    Messages are not stored - only used for generating embeddings.
+
+    Connectors stream pages concurrently, each on its own session from
+    session_factory (up to INGESTION_MAX_CONCURRENT_FETCHES at once, each
+    bounded by INGESTION_FETCH_TIMEOUT_SECONDS), so a user's latency is the
+    slowest API rather than the sum. Writes happen on this session as pages
+    arrive: connectors fetch only what is newer than their saved sync
+    cursors, and the advanced cursors are written in this session's
+    transaction together with the events, so the caller's commit makes both
+    durable at once.
+
+    Returns the inserted event total; per connector, its fetch status (ok,
+    timeout or error), time spent waiting on the connector, and page and
+    event counts; and the staged embedding queue items, which the caller
+    must hand to push_embedding_items after committing, never before.
+    """
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    connectors = [slack_connector, telegram_connector, outlook_connector]
+    now = datetime.now(timezone.utc)
+
+    # Fetch linked accounts for the user to limit providers
+    result = await session.execute(
+        select(LinkedAccount).where(LinkedAccount.user_id == user_id)
+    )
+    accounts = result.scalars().all()
+    provider_map = {acc.provider: acc for acc in accounts}
+    connectors = [c for c in connectors if c.provider in provider_map]
+
+    report: Dict[str, Dict[str, Any]] = {
+        connector.provider: {
+            "status": "ok",
+            "duration_ms": 0.0,
+            "pages": 0,
+            "fetched": 0,
+            "inserted": 0,
+        }
+        for connector in connectors
+    }
+    queue_size = max(settings.ingestion_pipeline_queue_size, 1)
+    pages: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    embeddings: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    semaphore = asyncio.Semaphore(max(settings.ingestion_max_concurrent_fetches, 1))
+    # Insert and inline embedding share the caller's session
+    session_lock = asyncio.Lock()
+    staged: List[str] = []
+
+    async def fetch_all() -> None:
+        await asyncio.gather(
+            *(
+                _fetch_pages(
+                    connector,
+                    user_id,
+                    session_factory=session_factory,
+                    semaphore=semaphore,
+                    out=pages,
+                    report=report[connector.provider],
+                )
+                for connector in connectors
+            )
+        )
+        await pages.put(_DONE)
+
+    await _run_stages(
+        fetch_all(),
+        _normalize(user_id, now, pages, batches),
+        _insert(session, user_id, batches, embeddings, session_lock, report),
+        _embed(session, user_id, embeddings, session_lock, staged),
+    )
+
+    total = sum(entry["inserted"] for entry in report.values())
+    logger.info(
+        "Ingestion completed",
+        extra={"user_id": user_id, "count": total, "connectors": report},
+    )
+    return {"events": total, "connectors": report, "embedding_items": staged}
@@ -2,16 +2,33 @@
 
 This job runs at intervals to proactively build the context bank
 by fetching events and generating embeddings with recency scores.
+
+The fleet refresh is sharded: run_query_agent_for_all_users enqueues
+run_query_agent_shard jobs of FLEET_SHARD_SIZE users, and each shard job
+refreshes up to FLEET_USER_CONCURRENCY users at once. Progress lives in
+context_bank_runs, so an interrupted run resumes with the users it did not
+reach.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 
 from app.agents.query_graph import QueryAgent
+from app.core.config import settings
 from app.db.session import AsyncSessionLocal
+from app.jobs.embedding import push_embedding_items
+from app.models import ContextBankRun, User
 
 logger = logging.getLogger(__name__)
 
+SHARD_JOB_ID = "context-bank:{}:{}"  # Fleet run timestamp, shard index
+
 
 async def run_query_agent_context_bank(user_id: str) -> Dict[str, Any]:
     """
@@ -28,6 +45,10 @@ async def run_query_agent_context_bank(user_id: str) -> Dict[str, Any]:
             time_window_hours=24,
         )
         await session.commit()
+        # Only committed events reach the embedding worker
+        await asyncio.to_thread(
+            push_embedding_items, result.pop("embedding_items", None) or []
+        )
 
         logger.info(
             "Query agent context bank job completed",
@@ -40,48 +61,199 @@ async def run_query_agent_context_bank(user_id: str) -> Dict[str, Any]:
         return result
 
 
-async def run_query_agent_for_all_users() -> Dict[str, Any]:
+def _refresh_window_start(now: datetime) -> datetime:
+    """
+    Start of the FLEET_REFRESH_INTERVAL_SECONDS window a scheduled run at
+    now belongs to. Windows are aligned to the epoch (e.g. on the hour), and
+    a tick up to FLEET_SCHEDULE_SLACK_SECONDS early counts for the next one.
     """
-    Background job to run QueryAgent for all active users.
+    interval = max(settings.fleet_refresh_interval_seconds, 1)
+    shifted = now.timestamp() + settings.fleet_schedule_slack_seconds
+    return datetime.fromtimestamp(shifted - shifted % interval, tz=timezone.utc)
 
-    Scheduled to run periodically (e.g., every hour) to keep
-    all users' context banks up to date.
+
+def _due(now: datetime, window_start: datetime):
     """
-    from sqlalchemy import select
+    Users not refreshed since the current window started and without a live
+    refresh in flight (claimed less than FLEET_RUN_LEASE_SECONDS ago and not
+    finished). Users without a context_bank_runs row are due.
 
-    from app.models import User
+    Comparing with the window start, not now minus the interval, keeps a
+    user refreshed late in the previous run due at the next tick.
+    """
+    run = ContextBankRun
+    return and_(
+        or_(
+            run.last_finished_at.is_(None),
+            run.last_finished_at < window_start,
+        ),
+        or_(
+            run.last_started_at.is_(None),
+            run.last_started_at
+            < now - timedelta(seconds=settings.fleet_run_lease_seconds),
+            and_(
+                run.last_finished_at.is_not(None),
+                run.last_started_at <= run.last_finished_at,
+            ),
+        ),
+    )
 
-    results = {}
 
-    async with AsyncSessionLocal() as session:
-        # Get all users
-        query = select(User.id)
+async def run_query_agent_for_all_users(
+    queue=None, session_factory=None, now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Background job to refresh every due user's context bank.
+
+    Scheduled once per FLEET_REFRESH_INTERVAL_SECONDS (e.g., every hour).
+    Users not refreshed since the current window started, least recently
+    refreshed first, are split into shards of FLEET_SHARD_SIZE and enqueued
+    as run_query_agent_shard jobs, so the fleet is refreshed by as many
+    workers as consume FLEET_QUEUE_NAME. Re-running it within the same
+    window after an interruption only enqueues users that were not
+    refreshed.
+    """
+    if queue is None:
+        from rq import Queue
+
+        from app.jobs.worker import get_redis_connection
+
+        queue = Queue(settings.fleet_queue_name, connection=get_redis_connection())
+    session_factory = session_factory or AsyncSessionLocal
+    now = now or datetime.now(timezone.utc)
+    window_start = _refresh_window_start(now)
+
+    async with session_factory() as session:
+        query = (
+            select(User.id)
+            .outerjoin(ContextBankRun, ContextBankRun.user_id == User.id)
+            .where(_due(now, window_start))
+            .order_by(ContextBankRun.last_finished_at.asc().nulls_first(), User.id)
+        )
         result = await session.execute(query)
         user_ids = [str(row[0]) for row in result.fetchall()]
 
-    for user_id in user_ids:
-        try:
-            user_result = await run_query_agent_context_bank(user_id)
-            results[user_id] = {
-                "status": "success",
-                "events_processed": user_result.get("events_processed", 0),
-            }
-        except Exception as exc:
-            logger.error(
-                "Query agent failed for user",
-                extra={"user_id": user_id, "error": str(exc)},
+    shard_size = max(settings.fleet_shard_size, 1)
+    shards = [
+        user_ids[start : start + shard_size]
+        for start in range(0, len(user_ids), shard_size)
+    ]
+    for index, shard in enumerate(shards):
+        queue.enqueue(
+            run_query_agent_shard,
+            shard,
+            window_start,
+            job_id=SHARD_JOB_ID.format(now.strftime("%Y%m%dT%H%M%S"), index),
+            job_timeout=settings.fleet_shard_timeout_seconds,
+        )
+
+    logger.info(
+        "Query agent fleet refresh enqueued",
+        extra={"users_due": len(user_ids), "shards": len(shards)},
+    )
+    return {"users_due": len(user_ids), "shards": len(shards)}
+
+
+async def _claim_user(
+    session, user_id: str, now: datetime, window_start: datetime
+) -> bool:
+    """Mark a refresh as started if the user is still due (atomic upsert)."""
+    stmt = insert(ContextBankRun).values(user_id=user_id, last_started_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContextBankRun.user_id],
+        set_={"last_started_at": now},
+        where=_due(now, window_start),
+    ).returning(ContextBankRun.user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
+async def _refresh_user(
+    user_id: str, window_start: datetime, session_factory
+) -> Dict[str, Any]:
+    """Claim, refresh and record one user's context bank."""
+    async with session_factory() as session:
+        claimed = await _claim_user(
+            session, user_id, datetime.now(timezone.utc), window_start
+        )
+        await session.commit()
+    if not claimed:
+        # Refreshed by an earlier shard of this run, or in flight elsewhere
+        return {"status": "skipped"}
+
+    try:
+        user_result = await run_query_agent_context_bank(user_id)
+        outcome = {
+            "status": "success",
+            "events_processed": user_result.get("events_processed", 0),
+        }
+    except Exception as exc:
+        logger.error(
+            "Query agent failed for user",
+            extra={"user_id": user_id, "error": str(exc)},
+        )
+        outcome = {"status": "error", "error": str(exc)}
+
+    async with session_factory() as session:
+        await session.execute(
+            update(ContextBankRun)
+            .where(ContextBankRun.user_id == user_id)
+            .values(
+                last_finished_at=datetime.now(timezone.utc),
+                last_status=outcome["status"],
+                last_error=outcome.get("error"),
+                events_processed=outcome.get("events_processed", 0),
             )
-            results[user_id] = {
-                "status": "error",
-                "error": str(exc),
-            }
+        )
+        await session.commit()
+    return outcome
+
+
+async def run_query_agent_shard(
+    user_ids: List[str],
+    window_start: Optional[datetime] = None,
+    session_factory=None,
+) -> Dict[str, Any]:
+    """
+    RQ job: refresh a shard of users, FLEET_USER_CONCURRENCY at a time, for
+    the refresh window the scheduler enqueued it in.
+
+    Each refresh starts after a random delay of up to
+    FLEET_START_JITTER_SECONDS, so shards starting together do not hit the
+    provider APIs in one burst. Users are claimed in context_bank_runs
+    before their refresh and skipped if they are no longer due; a shard
+    killed mid-run leaves its claims to expire after FLEET_RUN_LEASE_SECONDS.
+    """
+    session_factory = session_factory or AsyncSessionLocal
+    window_start = window_start or _refresh_window_start(datetime.now(timezone.utc))
+    semaphore = asyncio.Semaphore(max(settings.fleet_user_concurrency, 1))
+    results: Dict[str, Any] = {}
+
+    async def refresh(user_id: str) -> None:
+        await asyncio.sleep(random.uniform(0, settings.fleet_start_jitter_seconds))
+        async with semaphore:
+            results[user_id] = await _refresh_user(
+                user_id, window_start, session_factory
+            )
+
+    await asyncio.gather(*(refresh(user_id) for user_id in user_ids))
 
+    statuses = [result["status"] for result in results.values()]
     logger.info(
-        "Query agent batch job completed",
-        extra={"users_processed": len(results)},
+        "Query agent shard completed",
+        extra={
+            "users_processed": len(results),
+            "succeeded": statuses.count("success"),
+            "failed": statuses.count("error"),
+            "skipped": statuses.count("skipped"),
+        },
     )
 
     return results
 
 
-__all__ = ["run_query_agent_context_bank", "run_query_agent_for_all_users"]
+__all__ = [
+    "run_query_agent_context_bank",
+    "run_query_agent_for_all_users",
+    "run_query_agent_shard",
+]
@@ -0,0 +1,378 @@
+"""Online re-embedding of a user's objects when the embedding model changes."""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.models import Draft, Embedding, EmbeddingModelState, Entity, Note, Thread
+from app.services.embedding import EmbeddingObject, EmbeddingService
+from app.services.vector import VectorStore, create_vector_store
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = "reembed:{}:{}"  # User id, unique per enqueue (continuations included)
+SCHEDULED_KEY = "reembed:scheduled:{}"  # A job for the user is queued
+
+
+def _note_text(note: Note) -> Optional[str]:
+    if note.deleted_at is not None:
+        return None
+    return "\n\n".join(part for part in (note.title, note.body) if part)
+
+
+def _thread_text(thread: Thread) -> Optional[str]:
+    return "\n\n".join(
+        part for part in (thread.subject, thread.content_preview) if part
+    )
+
+
+def _entity_text(entity: Entity) -> Optional[str]:
+    return ", ".join([entity.name, *(str(alias) for alias in entity.aliases or [])])
+
+
+def _draft_text(draft: Draft) -> Optional[str]:
+    return json.dumps(draft.content_json, sort_keys=True, ensure_ascii=False)
+
+
+# Object types whose text can be rebuilt from Postgres. Event text is never
+# stored, so event rows only reach a new model through dual writes at
+# ingestion and age out of the old one through retention.
+TEXT_LOADERS: Dict[str, Tuple[Any, Callable[[Any], Optional[str]]]] = {
+    "note": (Note, _note_text),
+    "thread": (Thread, _thread_text),
+    "entity": (Entity, _entity_text),
+    "draft": (Draft, _draft_text),
+}
+
+
+async def start_model_migration(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    target_model: str,
+    current_model: Optional[str] = None,
+) -> EmbeddingModelState:
+    """
+    Begin backfilling target_model for a user (caller commits, then enqueues
+    reembed_user).
+
+    Searches keep reading the active model (current_model, default
+    EMBEDDING_MODEL, for users that never migrated) until the backfill is
+    complete; from now on new writes go to both models.
+    """
+    state = await session.get(EmbeddingModelState, user_id)
+    if state is None:
+        state = EmbeddingModelState(
+            user_id=user_id,
+            active_model=current_model or settings.embedding_model,
+            status="idle",
+            migrated_count=0,
+        )
+        session.add(state)
+    if state.status == "collecting":
+        raise ValueError("Previous embedding model is still being collected")
+    if state.active_model == target_model:
+        return state
+
+    state.target_model = target_model
+    state.status = "backfilling"
+    state.cursor_object_type = None
+    state.cursor_object_id = None
+    state.migrated_count = 0
+    state.started_at = datetime.now(timezone.utc)
+    state.completed_at = None
+    await session.flush()
+    logger.info(
+        "Embedding model migration started",
+        extra={
+            "user_id": user_id,
+            "from_model": state.active_model,
+            "to_model": target_model,
+        },
+    )
+    return state
+
+
+def _get_queue(queue=None):
+    if queue is None:
+        from rq import Queue
+
+        from app.jobs.worker import get_redis_connection
+
+        queue = Queue(settings.embedding_queue_name, connection=get_redis_connection())
+    return queue
+
+
+def enqueue_reembedding(
+    user_id: str, queue=None, delay_seconds: Optional[float] = None
+) -> bool:
+    """
+    Enqueue (or re-enqueue) the re-embedding job for a user unless one is
+    already queued.
+
+    Every job gets its own id, so a continuation enqueued by a running job
+    does not overwrite that job's RQ record; queued jobs are deduplicated by
+    SCHEDULED_KEY instead, which the job clears when it starts.
+    """
+    queue = _get_queue(queue)
+    ttl = int(delay_seconds or 0) + settings.reembed_scheduled_ttl_seconds
+    if not queue.connection.set(SCHEDULED_KEY.format(user_id), "1", nx=True, ex=ttl):
+        return False
+    job_id = JOB_ID.format(user_id, uuid.uuid4().hex)
+    if delay_seconds:
+        queue.enqueue_in(
+            timedelta(seconds=delay_seconds), reembed_user, user_id, job_id=job_id
+        )
+    else:
+        queue.enqueue(reembed_user, user_id, job_id=job_id)
+    return True
+
+
+async def _next_batch(
+    session: AsyncSession, state: EmbeddingModelState, limit: int
+) -> List[Any]:
+    """Objects with active-model rows after the checkpoint, in keyset order."""
+    emb = Embedding
+    stmt = select(
+        emb.object_type, emb.object_id, emb.meta, emb.occurred_at, emb.source
+    ).where(
+        emb.user_id == state.user_id,
+        emb.embedding_model == state.active_model,
+        emb.chunk_index == 0,  # One row per object (idx_embeddings_user_model_object)
+    )
+    if state.cursor_object_type is not None:
+        stmt = stmt.where(
+            tuple_(emb.object_type, emb.object_id)
+            > tuple_(state.cursor_object_type, state.cursor_object_id)
+        )
+    stmt = stmt.order_by(emb.object_type, emb.object_id).limit(limit)
+    return list((await session.execute(stmt)).all())
+
+
+async def _load_texts(
+    session: AsyncSession, user_id: str, refs: Sequence[Any]
+) -> Dict[Tuple[str, str], str]:
+    """Current text for (object_type, object_id) refs that can be rebuilt."""
+    ids_by_type: Dict[str, List[Any]] = {}
+    for ref in refs:
+        if ref.object_type in TEXT_LOADERS:
+            ids_by_type.setdefault(ref.object_type, []).append(ref.object_id)
+
+    texts: Dict[Tuple[str, str], str] = {}
+    for object_type, ids in ids_by_type.items():
+        model, loader = TEXT_LOADERS[object_type]
+        stmt = select(model).where(model.user_id == user_id, model.id.in_(ids))
+        for obj in (await session.execute(stmt)).scalars():
+            text = loader(obj)
+            if text and text.strip():
+                texts[(object_type, str(obj.id))] = text
+    return texts
+
+
+async def _count_unmigrated(session: AsyncSession, state: EmbeddingModelState) -> int:
+    """Objects with active-model rows but no target-model rows yet."""
+    emb = Embedding
+    target = aliased(Embedding)
+    stmt = (
+        select(func.count())
+        .select_from(emb)
+        .where(
+            emb.user_id == state.user_id,
+            emb.embedding_model == state.active_model,
+            emb.chunk_index == 0,
+            ~exists().where(
+                target.user_id == emb.user_id,
+                target.object_type == emb.object_type,
+                target.object_id == emb.object_id,
+                target.embedding_model == state.target_model,
+            ),
+        )
+    )
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def reembed_user(
+    user_id: str,
+    *,
+    embedding_service: Optional[EmbeddingService] = None,
+    session_factory=None,
+    queue=None,
+    max_batches: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    RQ job: backfill a user's target embedding model in checkpointed batches.
+
+    Walks the objects that have active-model rows in (object_type, object_id)
+    keyset order, re-embeds their current text with the target model and
+    commits the checkpoint with each batch, so a crashed or time-sliced run
+    resumes where it stopped. Batches are spaced REEMBED_BATCH_INTERVAL_SECONDS
+    apart and share the process's embedding rate limits.
+
+    Once every object has target-model rows, searches switch to the target
+    model and the old rows are garbage-collected. Objects whose text cannot
+    be rebuilt (events) hold the cut-over until dual writes or retention
+    resolve them; the job then re-checks every REEMBED_RECHECK_SECONDS.
+    """
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    embedding_service = embedding_service or EmbeddingService()
+    queue = _get_queue(queue)
+    queue.connection.delete(SCHEDULED_KEY.format(user_id))
+    max_batches = max_batches or settings.reembed_max_batches_per_run
+    batch_size = settings.reembed_batch_size
+    stats: Dict[str, Any] = {
+        "batches": 0,
+        "objects": 0,
+        "stored": 0,
+        "orphaned": 0,
+        "status": None,
+    }
+
+    while True:
+        async with session_factory() as session:
+            state = await session.get(EmbeddingModelState, user_id)
+            if state is None or state.status not in ("backfilling", "waiting"):
+                stats["status"] = state.status if state is not None else None
+                break
+            if stats["batches"] >= max_batches:
+                stats["status"] = state.status
+                enqueue_reembedding(
+                    user_id, queue, settings.reembed_batch_interval_seconds
+                )
+                break
+
+            refs = await _next_batch(session, state, batch_size)
+            if not refs:
+                if await _count_unmigrated(session, state):
+                    state.status = "waiting"
+                    await session.commit()
+                    stats["status"] = "waiting"
+                    enqueue_reembedding(
+                        user_id, queue, settings.reembed_recheck_seconds
+                    )
+                    break
+                # Complete: searches switch over, then the old rows go
+                state.previous_model = state.active_model
+                state.active_model = state.target_model
+                state.target_model = None
+                state.status = "collecting"
+                state.cursor_object_type = None
+                state.cursor_object_id = None
+                await session.commit()
+                logger.info(
+                    "Embedding model cut over",
+                    extra={"user_id": user_id, "model": state.active_model},
+                )
+                stats["status"] = "collecting"
+                break
+
+            texts = await _load_texts(session, user_id, refs)
+            objects = []
+            for ref in refs:
+                text = texts.get((ref.object_type, str(ref.object_id)))
+                if text is not None:
+                    objects.append(
+                        EmbeddingObject(
+                            user_id=user_id,
+                            object_type=ref.object_type,
+                            object_id=ref.object_id,
+                            text=text,
+                            metadata=ref.meta or {},
+                            occurred_at=ref.occurred_at,
+                            source=ref.source,
+                        )
+                    )
+                elif ref.object_type in TEXT_LOADERS:
+                    # Source object is gone; its rows are orphans in every model
+                    await embedding_service.vector_store.delete_by_object(
+                        session,
+                        user_id=user_id,
+                        object_type=ref.object_type,
+                        object_id=str(ref.object_id),
+                    )
+                    stats["orphaned"] += 1
+
+            stats["stored"] += await embedding_service.embed_and_store(
+                session, objects, model=state.target_model
+            )
+            state.cursor_object_type = refs[-1].object_type
+            state.cursor_object_id = refs[-1].object_id
+            state.migrated_count += len(objects)
+            await session.commit()
+            stats["batches"] += 1
+            stats["objects"] += len(objects)
+
+        await asyncio.sleep(settings.reembed_batch_interval_seconds)
+
+    if stats["status"] == "collecting":
+        await collect_old_model(
+            user_id,
+            vector_store=embedding_service.vector_store,
+            session_factory=session_factory,
+        )
+        stats["status"] = "idle"
+    logger.info("Re-embedding run finished", extra={"user_id": user_id, **stats})
+    return stats
+
+
+async def collect_old_model(
+    user_id: str,
+    *,
+    vector_store: Optional[VectorStore] = None,
+    session_factory=None,
+) -> int:
+    """
+    Delete the replaced model's rows in REEMBED_COLLECT_BATCH_SIZE batches,
+    one transaction each, then mark the user's migration complete.
+    """
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal
+
+        session_factory = AsyncSessionLocal
+    vector_store = vector_store or create_vector_store()
+    limit = settings.reembed_collect_batch_size
+    total = 0
+
+    while True:
+        async with session_factory() as session:
+            state = await session.get(EmbeddingModelState, user_id)
+            if state is None or state.status != "collecting":
+                break
+            deleted = await vector_store.delete_model_rows(
+                session,
+                user_id=user_id,
+                embedding_model=state.previous_model,
+                limit=limit,
+            )
+            total += deleted
+            if deleted < limit:
+                state.status = "idle"
+                state.previous_model = None
+                state.completed_at = datetime.now(timezone.utc)
+                await session.commit()
+                break
+            await session.commit()
+        await asyncio.sleep(settings.reembed_batch_interval_seconds)
+
+    logger.info(
+        "Old embedding model collected", extra={"user_id": user_id, "deleted": total}
+    )
+    return total
+
+
+__all__ = [
+    "collect_old_model",
+    "enqueue_reembedding",
+    "reembed_user",
+    "start_model_migration",
+]
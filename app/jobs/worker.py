@@ -1,6 +1,7 @@
 """RQ worker bootstrap and runner."""
 
 import logging
+import sys
 
 from redis import from_url
 from rq import Connection, Queue, Worker
@@ -26,4 +27,5 @@ def run_worker(queues: list[str] | None = None) -> None:
 
 
 if __name__ == "__main__":
-    run_worker()
+    # e.g. `python -m app.jobs.worker embeddings` for a dedicated embedding worker
+    run_worker(sys.argv[1:] or None)
@@ -2,8 +2,10 @@
 
 from app.models.agent_execution import AgentExecution
 from app.models.calendar_event import CalendarEvent
+from app.models.context_bank_run import ContextBankRun
 from app.models.draft import Draft
 from app.models.embedding import Embedding
+from app.models.embedding_model_state import EmbeddingModelState
 from app.models.entity import Entity
 from app.models.event import Event
 from app.models.linked_account import LinkedAccount
@@ -11,6 +13,7 @@ from app.models.note import Note
 from app.models.oauth_token import OAuthToken
 from app.models.proposal import Proposal
 from app.models.summary import Summary
+from app.models.sync_cursor import SyncCursor
 from app.models.task import Task
 from app.models.thread import Thread
 from app.models.user import User
@@ -30,4 +33,7 @@ __all__ = [
     "Proposal",
     "Draft",
     "Embedding",
+    "EmbeddingModelState",
+    "SyncCursor",
+    "ContextBankRun",
 ]
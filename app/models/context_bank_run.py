@@ -0,0 +1,53 @@
+"""ContextBankRun model: per-user state of the fleet context-bank refresh."""
+
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ContextBankRun(Base):
+    """When a user's context bank was last refreshed by the fleet scheduler."""
+
+    __tablename__ = "context_bank_runs"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    last_started_at = Column(
+        DateTime(timezone=True), nullable=True
+    )  # Claim time; a newer start than finish means a refresh is in flight
+    last_finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_status = Column(String(20), nullable=True)  # success | error
+    last_error = Column(Text, nullable=True)
+    events_processed = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        CheckConstraint(
+            "last_status IS NULL OR last_status IN ('success', 'error')",
+            name="ck_context_bank_runs_last_status",
+        ),
+        Index("idx_context_bank_runs_last_finished_at", "last_finished_at"),
+    )
+
+    # Relationships
+    user = relationship("User", back_populates="context_bank_run")
@@ -7,7 +7,6 @@ from sqlalchemy import (
     CheckConstraint,
     Column,
     DateTime,
-    Float,
     ForeignKey,
     Index,
     Integer,
@@ -16,8 +15,9 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
+from app.core.config import settings
 from app.db.base import Base
 
 
@@ -41,12 +41,13 @@ class Embedding(Base):
     embedding_model = Column(String(100), nullable=False)
     embedding_dim = Column(Integer, nullable=False)
     distance_metric = Column(String(50), nullable=False, server_default="cosine")
-    embedding = Column(Vector(1536), nullable=False)
+    embedding = Column(Vector(settings.embedding_dimensions), nullable=False)
     content_hash = Column(String(255), nullable=False)
     meta = Column("metadata", JSONB, nullable=False, server_default="{}")
-    recency_score = Column(
-        Float, nullable=True, index=True
-    )  # Stored recency score [0, 1] calculated at embedding creation
+    occurred_at = Column(
+        DateTime(timezone=True), nullable=True
+    )  # Source object timestamp; recency is computed from it at query time
+    source = Column(String(50), nullable=True)  # slack | telegram | outlook (events)
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -69,12 +70,35 @@ class Embedding(Base):
         ),
         Index("idx_embeddings_user_object_type", "user_id", "object_type"),
         Index("idx_embeddings_user_content_hash", "user_id", "content_hash"),
+        # Pre-filtered (exact) search path for time windows and sources
+        Index(
+            "idx_embeddings_user_type_occurred_at",
+            "user_id",
+            "object_type",
+            "occurred_at",
+        ),
+        Index(
+            "idx_embeddings_user_source_occurred_at",
+            "user_id",
+            "source",
+            "occurred_at",
+            postgresql_where=text("object_type = 'event'"),
+        ),
+        # Backfill keyset walk and garbage collection during model migrations
+        Index(
+            "idx_embeddings_user_model_object",
+            "user_id",
+            "embedding_model",
+            "object_type",
+            "object_id",
+            postgresql_where=text("chunk_index = 0"),
+        ),
         CheckConstraint(
             "object_type IN ('event', 'note', 'thread', 'draft', 'entity')",
             name="ck_embeddings_object_type",
         ),
         CheckConstraint(
-            "embedding_dim = 1536",
+            "embedding_dim = vector_dims(embedding)",
             name="ck_embeddings_dim_matches_vector",
         ),
     )
@@ -0,0 +1,51 @@
+"""EmbeddingModelState model for per-user embedding model migrations."""
+
+from sqlalchemy import CheckConstraint, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class EmbeddingModelState(Base):
+    """Which embedding model serves a user's searches, and migration progress."""
+
+    __tablename__ = "embedding_model_states"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    active_model = Column(String(100), nullable=False)  # Model searches read from
+    target_model = Column(
+        String(100), nullable=True
+    )  # Model being backfilled; written alongside active_model
+    previous_model = Column(
+        String(100), nullable=True
+    )  # Replaced model whose rows are being garbage-collected
+    status = Column(
+        String(20), nullable=False, server_default="idle"
+    )  # idle | backfilling | waiting | collecting
+    cursor_object_type = Column(String(50), nullable=True)  # Keyset checkpoint
+    cursor_object_id = Column(UUID(as_uuid=True), nullable=True)
+    migrated_count = Column(Integer, nullable=False, server_default="0")
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('idle', 'backfilling', 'waiting', 'collecting')",
+            name="ck_embedding_model_states_status",
+        ),
+    )
+
+    # Relationships
+    user = relationship("User", back_populates="embedding_model_state")
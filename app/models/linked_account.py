@@ -74,3 +74,6 @@ class LinkedAccount(Base):
     events = relationship(
         "Event", back_populates="source_account", foreign_keys="Event.source_account_id"
     )
+    sync_cursors = relationship(
+        "SyncCursor", back_populates="linked_account", cascade="all, delete-orphan"
+    )
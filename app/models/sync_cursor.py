@@ -0,0 +1,51 @@
+"""SyncCursor model for incremental connector polling."""
+
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class SyncCursor(Base):
+    """Where the last poll of one channel/dialog/folder of an account stopped."""
+
+    __tablename__ = "sync_cursors"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    linked_account_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("linked_accounts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    scope = Column(
+        Text, nullable=False
+    )  # "channel:<id>" (slack) | "dialog:<id>" (telegram) | "calendar" (outlook)
+    cursor = Column(
+        Text, nullable=False
+    )  # Slack ts | Telegram message id | Graph deltaLink
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    # Constraints
+    __table_args__ = (
+        UniqueConstraint(
+            "linked_account_id", "scope", name="uq_sync_cursors_account_scope"
+        ),
+    )
+
+    # Relationships
+    linked_account = relationship("LinkedAccount", back_populates="sync_cursors")
@@ -61,3 +61,15 @@ class User(Base):
     agent_executions = relationship(
         "AgentExecution", back_populates="user", cascade="all, delete-orphan"
     )
+    embedding_model_state = relationship(
+        "EmbeddingModelState",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        uselist=False,
+    )
+    context_bank_run = relationship(
+        "ContextBankRun",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        uselist=False,
+    )
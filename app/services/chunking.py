@@ -0,0 +1,138 @@
+"""Token-aware text chunking on sentence boundaries."""
+
+from __future__ import annotations
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:  # Optional: exact OpenAI token counts
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on the environment
+    tiktoken = None
+
+# Sentence ends followed by whitespace, or line breaks (chat messages, lists)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate (~3 UTF-8 bytes per token) without a tokenizer."""
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Optional[Any]:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Exact token count with tiktoken, else the conservative estimate."""
+    encoding = _encoding(model or "")
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split on sentence ends and line breaks, dropping empty pieces."""
+    return [piece for piece in _SENTENCE_BREAK.split(text.strip()) if piece]
+
+
+def _split_oversize(text: str, max_tokens: int, model: Optional[str]) -> List[str]:
+    """Hard-split one sentence that alone exceeds the budget."""
+    encoding = _encoding(model or "")
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return [
+            encoding.decode(tokens[i : i + max_tokens])
+            for i in range(0, len(tokens), max_tokens)
+        ]
+
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for word in text.split():
+        tokens = estimate_tokens(word)
+        if tokens > max_tokens:
+            # A single unbroken blob: slice by characters (<= 4 bytes each)
+            step = max(max_tokens * 3 // 4, 1)
+            words = [word[i : i + step] for i in range(0, len(word), step)]
+        else:
+            words = [word]
+        for part in words:
+            part_tokens = estimate_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text_tokens(
+    text: str,
+    *,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    model: Optional[str] = None,
+) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most max_tokens.
+
+    Consecutive chunks repeat up to overlap_tokens worth of trailing
+    sentences for context. Texts whose UTF-8 length is within the budget are
+    returned as-is without tokenizing (a token is at least one byte).
+    """
+    if len(text.encode("utf-8")) <= max_tokens:
+        return [text]
+
+    sentences: List[Tuple[str, int]] = []
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence, model)
+        if tokens > max_tokens:
+            sentences.extend(
+                (piece, count_tokens(piece, model))
+                for piece in _split_oversize(sentence, max_tokens, model)
+            )
+        else:
+            sentences.append((sentence, tokens))
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    carried = 0  # Leading sentences of current repeated from the previous chunk
+    for sentence, tokens in sentences:
+        if current and current_tokens + tokens > max_tokens:
+            if len(current) > carried:
+                chunks.append(" ".join(s for s, _ in current))
+                # Carry the longest sentence tail that fits the overlap budget
+                tail: List[Tuple[str, int]] = []
+                tail_tokens = 0
+                for prev in reversed(current):
+                    if tail_tokens + prev[1] > overlap_tokens:
+                        break
+                    tail.insert(0, prev)
+                    tail_tokens += prev[1]
+                current, current_tokens = tail, tail_tokens
+            # Drop carried context rather than exceed the budget
+            while current and current_tokens + tokens > max_tokens:
+                current_tokens -= current.pop(0)[1]
+            carried = len(current)
+        current.append((sentence, tokens))
+        current_tokens += tokens
+    if len(current) > carried:
+        chunks.append(" ".join(s for s, _ in current))
+    return chunks
+
+
+__all__ = ["chunk_text_tokens", "count_tokens", "estimate_tokens", "split_sentences"]
@@ -1,11 +1,20 @@
-from app.services.connector.base import BaseConnector, TokenData
+from app.services.connector.base import (
+    BaseConnector,
+    FetchResult,
+    TokenData,
+    load_sync_cursors,
+    save_sync_cursors,
+)
 from app.services.connector.outlook import OutlookConnector, outlook_connector
 from app.services.connector.slack import SlackConnector, slack_connector
 from app.services.connector.telegram import TelegramConnector, telegram_connector
 
 __all__ = [
     "BaseConnector",
+    "FetchResult",
     "TokenData",
+    "load_sync_cursors",
+    "save_sync_cursors",
     "SlackConnector",
     "slack_connector",
     "TelegramConnector",
@@ -3,14 +3,15 @@
 import secrets
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.crypto import encryption_service
-from app.models import LinkedAccount, OAuthToken
+from app.models import LinkedAccount, OAuthToken, SyncCursor
 
 
 class TokenData:
@@ -37,6 +38,71 @@ class TokenData:
         return datetime.now(timezone.utc) + timedelta(seconds=self.expires_in)
 
 
+class FetchResult(List[Dict[str, Any]]):
+    """
+    Events from one fetch_events call (or one page of iter_event_pages) plus
+    the sync cursors they advance to.
+
+    cursors maps a scope ("channel:<id>", "dialog:<id>", "calendar") to the
+    position after the last fetched item. A page only carries a scope's
+    cursor once every item up to that position has been yielded, so the
+    cursors of a page are safe to save as soon as it and the pages before it
+    are written. The ingestion job saves them with save_sync_cursors in the
+    same transaction as the events, so a failed insert never skips data.
+    """
+
+    def __init__(
+        self,
+        events: Optional[List[Dict[str, Any]]] = None,
+        *,
+        account_id: Any = None,
+        cursors: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(events or [])
+        self.account_id = account_id
+        self.cursors: Dict[str, str] = cursors or {}
+
+
+async def load_sync_cursors(
+    session: AsyncSession, linked_account_id: Any
+) -> Dict[str, str]:
+    """Saved cursors of a linked account, keyed by scope."""
+    result = await session.execute(
+        select(SyncCursor.scope, SyncCursor.cursor).where(
+            SyncCursor.linked_account_id == linked_account_id
+        )
+    )
+    return {row.scope: row.cursor for row in result.all()}
+
+
+async def save_sync_cursors(
+    session: AsyncSession,
+    *,
+    user_id: Any,
+    linked_account_id: Any,
+    cursors: Dict[str, str],
+) -> None:
+    """Upsert cursors for a linked account with one statement."""
+    if not cursors:
+        return
+    stmt = pg_insert(SyncCursor.__table__).values(
+        [
+            {
+                "user_id": user_id,
+                "linked_account_id": linked_account_id,
+                "scope": scope,
+                "cursor": cursor,
+            }
+            for scope, cursor in cursors.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_sync_cursors_account_scope",
+        set_={"cursor": stmt.excluded.cursor, "updated_at": func.now()},
+    )
+    await session.execute(stmt)
+
+
 class BaseConnector(ABC):
     """Abstract connector interface."""
 
@@ -64,7 +130,46 @@ class BaseConnector(ABC):
         user_id: str,
         since: Optional[datetime] = None,
     ) -> List[Dict[str, Any]]:
-        """Fetch new events for a user."""
+        """
+        Fetch new events for a user.
+
+        Incremental connectors return a FetchResult whose cursors the caller
+        persists with save_sync_cursors alongside the events.
+        """
+
+    async def iter_event_pages(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        since: Optional[datetime] = None,
+    ) -> AsyncIterator[FetchResult]:
+        """
+        Yield new events page by page, as FetchResults, while they are fetched.
+
+        Streaming connectors override this so callers can write each page
+        before the next is requested; the default yields fetch_events as a
+        single page.
+        """
+        events = await self.fetch_events(session=session, user_id=user_id, since=since)
+        if not isinstance(events, FetchResult):
+            events = FetchResult(events)
+        yield events
+
+    async def _collect_pages(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        since: Optional[datetime] = None,
+    ) -> FetchResult:
+        """fetch_events for streaming connectors: all pages as one FetchResult."""
+        events = FetchResult()
+        async for page in self.iter_event_pages(
+            session=session, user_id=user_id, since=since
+        ):
+            events.extend(page)
+            events.account_id = page.account_id or events.account_id
+            events.cursors.update(page.cursors)
+        return events
 
     async def _get_or_create_linked_account(
         self,
@@ -163,4 +268,10 @@ class BaseConnector(ABC):
         return token
 
 
-__all__ = ["BaseConnector", "TokenData"]
+__all__ = [
+    "BaseConnector",
+    "FetchResult",
+    "TokenData",
+    "load_sync_cursors",
+    "save_sync_cursors",
+]
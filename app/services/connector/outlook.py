@@ -3,7 +3,7 @@
 import logging
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 from sqlalchemy import select
@@ -11,7 +11,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models import LinkedAccount
-from app.services.connector.base import BaseConnector, TokenData
+from app.services.connector.base import (
+    BaseConnector,
+    FetchResult,
+    TokenData,
+    load_sync_cursors,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,12 @@ class OutlookConnector(BaseConnector):
     """Microsoft Outlook (Graph) connector."""
 
     provider = "outlook"
+    CALENDAR_SCOPE = "calendar"
+    CALENDAR_WINDOW_SCOPE = "calendar:window"  # When the delta window was opened
+    CALENDAR_WINDOW_DAYS = 30  # calendarView delta window on either side of now
+    # Delta links Graph can no longer replay; the next poll starts a new window
+    DELTA_RESET_ERRORS = ("syncStateNotFound", "syncStateInvalid", "resyncRequired")
+    DELTA_PAGE_SIZE = 50
 
     def __init__(self) -> None:
         super().__init__()
@@ -159,17 +170,68 @@ class OutlookConnector(BaseConnector):
             return await self._refresh_access_token(session, account)
         return access
 
+    def _calendar_event(
+        self, account: LinkedAccount, item: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        start_raw = item.get("start", {}).get("dateTime")
+        try:
+            start_dt = (
+                datetime.fromisoformat(start_raw)
+                if start_raw
+                else datetime.now(timezone.utc)
+            )
+        except Exception:
+            start_dt = datetime.now(timezone.utc)
+        # Extract body preview for embedding (not stored in event)
+        body_preview = item.get("bodyPreview")
+        return {
+            "source": "outlook",
+            "source_account_id": account.id,
+            "external_id": item.get("id"),
+            "thread_id": None,
+            "event_type": "calendar",
+            "title": item.get("subject"),
+            # Note: body/text_for_embedding removed - messages not stored
+            "url": item.get("webLink"),
+            "content_hash": item.get("id") or "",
+            "importance_score": 0,
+            "occurred_at": start_dt,
+            "expires_at": start_dt + timedelta(days=30),
+            "raw": {
+                "item_id": item.get("id"),
+                "subject": item.get("subject"),
+            },
+            # Temporary field for embedding generation (not stored in DB)
+            "_embedding_text": body_preview,
+        }
+
     async def fetch_events(
         self,
         session: AsyncSession,
         user_id: str,
         since: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
+        """Fetch events from Outlook (every page of iter_event_pages)."""
+        return await self._collect_pages(session, user_id, since)
+
+    async def iter_event_pages(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        since: Optional[str] = None,
+    ) -> AsyncIterator[FetchResult]:
         """
-        Fetch events from Outlook (mail/calendar).
-        """
-        events: List[Dict[str, Any]] = []
+        Yield Outlook calendar events one Graph delta page at a time.
+
+        Calendar events come from a calendarView delta query: the first poll
+        enumerates the window, later polls replay the saved delta link
+        ("calendar" cursor) and receive only created/updated events. The
+        delta link arrives with the last page.
 
+        The window is fixed when the delta query starts, so once half of it
+        has elapsed the next poll opens a new one around now. A delta link
+        Graph rejects as expired is cleared for the same reason.
+        """
         # Get linked account and token
         result = await session.execute(
             select(LinkedAccount).where(
@@ -179,7 +241,7 @@ class OutlookConnector(BaseConnector):
         )
         account = result.scalars().first()
         if not account:
-            return events
+            return
 
         try:
             access_token = await self._ensure_access_token(session, account)
@@ -187,53 +249,51 @@ class OutlookConnector(BaseConnector):
             logger.warning(
                 "Outlook access token unavailable", extra={"error": str(exc)}
             )
-            return events
+            return
         headers = {"Authorization": f"Bearer {access_token}"}
 
-        # Fetch calendar events as example
-        calendar_resp = await self._client.get(
-            "https://graph.microsoft.com/v1.0/me/events",
-            params={"$top": 50},
-            headers=headers,
-        )
-        data = calendar_resp.json()
-        items = data.get("value", [])
-        for item in items:
-            start_raw = item.get("start", {}).get("dateTime")
-            try:
-                start_dt = (
-                    datetime.fromisoformat(start_raw)
-                    if start_raw
-                    else datetime.now(timezone.utc)
-                )
-            except Exception:
-                start_dt = datetime.now(timezone.utc)
-            # Extract body preview for embedding (not stored in event)
-            body_preview = item.get("bodyPreview")
-            events.append(
-                {
-                    "source": "outlook",
-                    "source_account_id": account.id,
-                    "external_id": item.get("id"),
-                    "thread_id": None,
-                    "event_type": "calendar",
-                    "title": item.get("subject"),
-                    # Note: body/text_for_embedding removed - messages not stored
-                    "url": item.get("webLink"),
-                    "content_hash": item.get("id") or "",
-                    "importance_score": 0,
-                    "occurred_at": start_dt,
-                    "expires_at": start_dt + timedelta(days=30),
-                    "raw": {
-                        "item_id": item.get("id"),
-                        "subject": item.get("subject"),
-                    },
-                    # Temporary field for embedding generation (not stored in DB)
-                    "_embedding_text": body_preview,
-                }
-            )
+        cursors = await load_sync_cursors(session, account.id)
+        headers["Prefer"] = f"odata.maxpagesize={self.DELTA_PAGE_SIZE}"
 
-        return events
+        now = datetime.now(timezone.utc)
+        window = timedelta(days=self.CALENDAR_WINDOW_DAYS)
+        url: Optional[str] = cursors.get(self.CALENDAR_SCOPE) or None
+        opened = cursors.get(self.CALENDAR_WINDOW_SCOPE)
+        if url and (not opened or now - datetime.fromisoformat(opened) >= window / 2):
+            url = None
+        params: Optional[Dict[str, Any]] = None
+        window_cursors: Dict[str, str] = {}
+        if url is None:
+            url = "https://graph.microsoft.com/v1.0/me/calendarView/delta"
+            params = {
+                "startDateTime": (now - window).isoformat(),
+                "endDateTime": (now + window).isoformat(),
+            }
+            window_cursors[self.CALENDAR_WINDOW_SCOPE] = now.isoformat()
+        while url:
+            calendar_resp = await self._client.get(url, params=params, headers=headers)
+            data = calendar_resp.json()
+            if "error" in data:
+                error = data["error"]
+                logger.warning("Outlook calendar delta failed", extra={"error": error})
+                code = error.get("code") if isinstance(error, dict) else None
+                if calendar_resp.status_code == 410 or code in self.DELTA_RESET_ERRORS:
+                    yield FetchResult(
+                        account_id=account.id, cursors={self.CALENDAR_SCOPE: ""}
+                    )
+                break
+            page = FetchResult(account_id=account.id)
+            for item in data.get("value", []):
+                if "@removed" not in item:
+                    page.append(self._calendar_event(account, item))
+            # nextLink/deltaLink carry the query state; params only start it
+            params = None
+            url = data.get("@odata.nextLink")
+            if data.get("@odata.deltaLink"):
+                page.cursors[self.CALENDAR_SCOPE] = data["@odata.deltaLink"]
+                page.cursors.update(window_cursors)
+            if page or page.cursors:
+                yield page
 
 
 outlook_connector = OutlookConnector()
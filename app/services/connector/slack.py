@@ -3,7 +3,7 @@
 import logging
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 from sqlalchemy import select
@@ -11,7 +11,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models import LinkedAccount
-from app.services.connector.base import BaseConnector, TokenData
+from app.services.connector.base import (
+    BaseConnector,
+    FetchResult,
+    TokenData,
+    load_sync_cursors,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,7 @@ class SlackConnector(BaseConnector):
     """Slack OAuth connector."""
 
     provider = "slack"
+    HISTORY_PAGE_SIZE = 50
 
     def __init__(self) -> None:
         super().__init__()
@@ -154,19 +160,57 @@ class SlackConnector(BaseConnector):
             return await self._refresh_access_token(session, account)
         return access
 
+    def _message_event(
+        self, account: LinkedAccount, ch: Dict[str, Any], msg: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        # Extract message text for embedding (not stored in event)
+        message_text = msg.get("text")
+        occurred_at = datetime.fromtimestamp(float(msg.get("ts", "0")), tz=timezone.utc)
+        return {
+            "source": "slack",
+            "source_account_id": account.id,
+            "external_id": msg.get("ts"),
+            "thread_id": None,
+            "event_type": "message",
+            "title": None,
+            # Note: body/text_for_embedding removed - messages not stored
+            "url": None,
+            "content_hash": msg.get("ts") or "",
+            "importance_score": 0,
+            "occurred_at": occurred_at,
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=30),
+            "raw": {
+                "channel": ch.get("id"),
+                "message_id": msg.get("ts"),
+            },
+            # Temporary field for embedding generation (not stored in DB)
+            "_embedding_text": message_text,
+        }
+
     async def fetch_events(
         self,
         session: AsyncSession,
         user_id: str,
         since: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """
-        Fetch events from Slack.
+        """Fetch events from Slack (every page of iter_event_pages)."""
+        return await self._collect_pages(session, user_id, since)
 
-        Uses conversations.history for public channels as an example.
+    async def iter_event_pages(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        since: Optional[str] = None,
+    ) -> AsyncIterator[FetchResult]:
         """
-        events: List[Dict[str, Any]] = []
+        Yield Slack events one conversations.history page at a time.
 
+        Uses conversations.history for public channels as an example. Each
+        channel resumes after its saved "channel:<id>" cursor (the newest ts
+        seen, passed as ``oldest``) and pages through everything newer; a
+        channel without a cursor starts from its latest page. History pages
+        run newest first, so a channel's cursor rides on its last page.
+        """
         # Fetch linked account and token
         result = await session.execute(
             select(LinkedAccount).where(
@@ -176,13 +220,14 @@ class SlackConnector(BaseConnector):
         )
         account = result.scalars().first()
         if not account:
-            return events
+            return
 
         try:
             access_token = await self._ensure_access_token(session, account)
         except Exception as exc:
             logger.warning("Slack access token unavailable", extra={"error": str(exc)})
-            return events
+            return
+        cursors = await load_sync_cursors(session, account.id)
 
         headers = {"Authorization": f"Bearer {access_token}"}
         # Fetch channels
@@ -192,48 +237,55 @@ class SlackConnector(BaseConnector):
         channel_data = channel_resp.json()
         if not channel_data.get("ok"):
             logger.warning("Slack conversations.list failed", extra=channel_data)
-            return events
+            return
 
         channels = channel_data.get("channels", [])
         for ch in channels:
-            history_resp = await self._client.get(
-                "https://slack.com/api/conversations.history",
-                params={"channel": ch.get("id"), "limit": 50, "oldest": since or 0},
-                headers=headers,
-            )
-            hist_json = history_resp.json()
-            if not hist_json.get("ok"):
-                continue
-            for msg in hist_json.get("messages", []):
-                # Extract message text for embedding (not stored in event)
-                message_text = msg.get("text")
-                occurred_at = datetime.fromtimestamp(
-                    float(msg.get("ts", "0")), tz=timezone.utc
+            scope = f"channel:{ch.get('id')}"
+            oldest = cursors.get(scope)
+            newest = oldest
+            page_cursor = None
+            while True:
+                params = {
+                    "channel": ch.get("id"),
+                    "limit": self.HISTORY_PAGE_SIZE,
+                    "oldest": oldest or since or 0,
+                }
+                if page_cursor:
+                    params["cursor"] = page_cursor
+                history_resp = await self._client.get(
+                    "https://slack.com/api/conversations.history",
+                    params=params,
+                    headers=headers,
                 )
-                events.append(
-                    {
-                        "source": "slack",
-                        "source_account_id": account.id,
-                        "external_id": msg.get("ts"),
-                        "thread_id": None,
-                        "event_type": "message",
-                        "title": None,
-                        # Note: body/text_for_embedding removed - messages not stored
-                        "url": None,
-                        "content_hash": msg.get("ts") or "",
-                        "importance_score": 0,
-                        "occurred_at": occurred_at,
-                        "expires_at": datetime.now(timezone.utc) + timedelta(days=30),
-                        "raw": {
+                hist_json = history_resp.json()
+                if not hist_json.get("ok"):
+                    # Unfetched older pages sit below newest: keep the old
+                    # cursor so the next poll pages through them again
+                    logger.warning(
+                        "Slack conversations.history failed",
+                        extra={
                             "channel": ch.get("id"),
-                            "message_id": msg.get("ts"),
+                            "error": hist_json.get("error"),
                         },
-                        # Temporary field for embedding generation (not stored in DB)
-                        "_embedding_text": message_text,
-                    }
+                    )
+                    break
+                page = FetchResult(account_id=account.id)
+                for msg in hist_json.get("messages", []):
+                    ts = msg.get("ts")
+                    if ts and (newest is None or float(ts) > float(newest)):
+                        newest = ts
+                    page.append(self._message_event(account, ch, msg))
+                page_cursor = (hist_json.get("response_metadata") or {}).get(
+                    "next_cursor"
                 )
-
-        return events
+                last = not (oldest and hist_json.get("has_more") and page_cursor)
+                if last and newest and newest != oldest:
+                    page.cursors[scope] = newest
+                if page or page.cursors:
+                    yield page
+                if last:
+                    break
 
 
 slack_connector = SlackConnector()
@@ -1,7 +1,7 @@
 """Telegram connector implementation (MTProto via Telethon)."""
 
 import secrets
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import logging
 from datetime import datetime, timedelta, timezone
 
@@ -12,7 +12,12 @@ from telethon.sessions import StringSession
 from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
 
 from app.core.config import settings
-from app.services.connector.base import BaseConnector, TokenData
+from app.services.connector.base import (
+    BaseConnector,
+    FetchResult,
+    TokenData,
+    load_sync_cursors,
+)
 from app.models import LinkedAccount
 
 logger = logging.getLogger(__name__)
@@ -22,6 +27,7 @@ class TelegramConnector(BaseConnector):
     """Telegram connector using Telethon (stubbed for structure)."""
 
     provider = "telegram"
+    PAGE_SIZE = 50  # Messages per yielded page
 
     def __init__(self) -> None:
         super().__init__()
@@ -132,11 +138,24 @@ class TelegramConnector(BaseConnector):
         user_id: str,
         since: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
+        """Fetch events from Telegram (every page of iter_event_pages)."""
+        return await self._collect_pages(session, user_id, since)
+
+    async def iter_event_pages(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        since: Optional[str] = None,
+    ) -> AsyncIterator[FetchResult]:
         """
-        Fetch events from Telegram personal chats.
-        """
-        events: List[Dict[str, Any]] = []
+        Yield events from Telegram personal chats, PAGE_SIZE messages at a time.
 
+        Each dialog resumes after its saved "dialog:<id>" cursor (the highest
+        message id seen, passed as ``min_id``), so only new messages are
+        transferred; a dialog without a cursor starts from its latest 50.
+        Messages arrive newest first, so a dialog's cursor rides on its last
+        page.
+        """
         # Get linked account and token
         result = await session.execute(
             select(LinkedAccount).where(
@@ -146,12 +165,13 @@ class TelegramConnector(BaseConnector):
         )
         account = result.scalars().first()
         if not account:
-            return events
+            return
 
         token_row = await self._latest_token(session, account.id)
         if not token_row:
-            return events
+            return
         access_token, _ = self._decrypt_token(token_row)
+        cursors = await load_sync_cursors(session, account.id)
 
         client = TelegramClient(
             StringSession(access_token),
@@ -159,37 +179,54 @@ class TelegramConnector(BaseConnector):
             settings.telegram_api_hash,
         )
         await client.connect()
+        # Disconnect even when the ingestion timeout cancels the fetch
+        try:
+            async for dialog in client.iter_dialogs(limit=5):
+                scope = f"dialog:{dialog.id}"
+                min_id = int(cursors.get(scope) or 0)
+                newest = min_id
+                page = FetchResult(account_id=account.id)
+                # New messages since the cursor (all of them), else the last 50
+                async for message in client.iter_messages(
+                    dialog.id, limit=None if min_id else 50, min_id=min_id
+                ):
+                    newest = max(newest, message.id)
+                    page.append(self._message_event(account, dialog, message))
+                    if len(page) >= self.PAGE_SIZE:
+                        yield page
+                        page = FetchResult(account_id=account.id)
+                if newest > min_id:
+                    page.cursors[scope] = str(newest)
+                if page or page.cursors:
+                    yield page
+        finally:
+            await client.disconnect()
 
-        # Fetch last 50 messages from dialogs
-        async for dialog in client.iter_dialogs(limit=5):
-            async for message in client.iter_messages(dialog.id, limit=50):
-                # Extract message text for embedding (not stored in event)
-                message_text = message.message or ""
-                events.append(
-                    {
-                        "source": "telegram",
-                        "source_account_id": account.id,
-                        "external_id": str(message.id),
-                        "thread_id": None,
-                        "event_type": "message",
-                        "title": None,
-                        # Note: body/text_for_embedding removed - messages not stored
-                        "url": None,
-                        "content_hash": str(message.id),
-                        "importance_score": 0,
-                        "occurred_at": message.date,
-                        "expires_at": datetime.now(timezone.utc) + timedelta(days=30),
-                        "raw": {
-                            "dialog_id": dialog.id,
-                            "message_id": message.id,
-                        },
-                        # Temporary field for embedding generation (not stored in DB)
-                        "_embedding_text": message_text,
-                    }
-                )
-
-        await client.disconnect()
-        return events
+    def _message_event(
+        self, account: LinkedAccount, dialog: Any, message: Any
+    ) -> Dict[str, Any]:
+        # Extract message text for embedding (not stored in event)
+        message_text = message.message or ""
+        return {
+            "source": "telegram",
+            "source_account_id": account.id,
+            "external_id": str(message.id),
+            "thread_id": None,
+            "event_type": "message",
+            "title": None,
+            # Note: body/text_for_embedding removed - messages not stored
+            "url": None,
+            "content_hash": str(message.id),
+            "importance_score": 0,
+            "occurred_at": message.date,
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=30),
+            "raw": {
+                "dialog_id": dialog.id,
+                "message_id": message.id,
+            },
+            # Temporary field for embedding generation (not stored in DB)
+            "_embedding_text": message_text,
+        }
 
 
 telegram_connector = TelegramConnector()
@@ -1,4 +1,4 @@
-"""Embedding service using OpenAI and VectorStore."""
+"""Embedding service using pluggable providers and VectorStore."""
 
 from __future__ import annotations
 
@@ -7,12 +7,21 @@ import hashlib
 import logging
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from openai import AsyncOpenAI, OpenAIError
+import numpy as np
 
 from app.core.config import settings
-from app.services.vector import VectorStore
+from app.services.chunking import chunk_text_tokens, estimate_tokens
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_dispatch import EmbeddingDispatcher, embedding_dispatcher
+from app.services.embedding_providers import (
+    EmbeddingProvider,
+    LocalEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    decode_embedding,
+)
+from app.services.vector import EmbeddingWrite, VectorStore, create_vector_store
 
 
 def compute_content_hash(text: str) -> str:
@@ -21,7 +30,12 @@ def compute_content_hash(text: str) -> str:
 
 
 def chunk_text(text: str, max_chars: int = 3500) -> List[str]:
-    """Simple character-based chunking to avoid overly long payloads."""
+    """
+    Simple character-based chunking to avoid overly long payloads.
+
+    Kept for callers that need fixed-size slices; embed_and_store uses the
+    sentence-aware chunk_text_tokens.
+    """
     if len(text) <= max_chars:
         return [text]
     chunks: List[str] = []
@@ -30,6 +44,32 @@ def chunk_text(text: str, max_chars: int = 3500) -> List[str]:
     return chunks
 
 
+def plan_batches(
+    texts: Sequence[str], *, max_inputs: int, max_tokens: int
+) -> List[List[int]]:
+    """
+    Greedily pack texts, in order, into request batches.
+
+    Returns lists of indexes into texts; each batch stays within max_inputs
+    and (estimated) max_tokens. A single oversize text gets its own batch.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for idx, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (
+            len(current) >= max_inputs or current_tokens + tokens > max_tokens
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 @dataclass
 class EmbeddingObject:
     """Embedding payload for a single object."""
@@ -40,79 +80,247 @@ class EmbeddingObject:
     text: str
     content_hash: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
-    occurred_at: Optional[datetime] = None  # For recency score calculation
+    occurred_at: Optional[datetime] = None  # Stored for query-time recency scoring
+    source: Optional[str] = None  # Denormalized onto the row for search filters
 
 
 class EmbeddingService:
-    """OpenAI embedding service with VectorStore integration."""
+    """
+    Embedding service with VectorStore integration.
+
+    The provider follows the model name: ``local-*`` models are computed
+    in-process (LocalEmbeddingProvider), everything else goes to OpenAI.
+    EMBEDDING_MODEL picks the deployment's model and
+    EMBEDDING_OBJECT_TYPE_MODELS overrides it per object type.
+    """
 
     def __init__(
         self,
         *,
-        model: str = "text-embedding-ada-002",
+        model: Optional[str] = None,
+        dimensions: Optional[int] = None,
         vector_store: Optional[VectorStore] = None,
+        cache: Optional[EmbeddingCache] = None,
+        dispatcher: Optional[EmbeddingDispatcher] = None,
+        object_type_models: Optional[Dict[str, str]] = None,
     ):
-        self.model = model
-        self.vector_store = vector_store or VectorStore()
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.model = model or settings.embedding_model
+        # Size of the embeddings.embedding column (EMBEDDING_DIMENSIONS)
+        self.dimensions = dimensions or settings.embedding_dimensions
+        self.object_type_models = (
+            settings.embedding_object_type_models
+            if object_type_models is None
+            else object_type_models
+        )
+        self.vector_store = vector_store or create_vector_store()
+        if cache is None and settings.embedding_cache_enabled:
+            cache = EmbeddingCache()
+        self.cache = cache
+        self.openai = OpenAIEmbeddingProvider(
+            dispatcher=dispatcher or embedding_dispatcher, dimensions=self.dimensions
+        )
+        self.local = LocalEmbeddingProvider(dimensions=self.dimensions)
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    async def embed_text(self, texts: Sequence[str]) -> List[List[float]]:
-        """Call OpenAI embeddings API with basic retry and timeout."""
-        attempts = 3
-        for attempt in range(attempts):
-            try:
-                resp = await self.client.embeddings.create(
-                    model=self.model, input=list(texts), timeout=30
-                )
-                return [item.embedding for item in resp.data]
-            except OpenAIError as exc:
-                if attempt == attempts - 1:
-                    self.logger.error(
-                        "Embedding request failed", extra={"error": str(exc)}
-                    )
-                    raise RuntimeError("Embedding request failed") from exc
-                await asyncio.sleep(0.5 * (attempt + 1))
-            except Exception as exc:
-                self.logger.error(
-                    "Embedding response parsing failed", extra={"error": str(exc)}
-                )
-                raise RuntimeError("Embedding response invalid") from exc
+    def provider_for(self, model: str) -> EmbeddingProvider:
+        """Provider that serves an embedding model."""
+        if LocalEmbeddingProvider.handles(model):
+            return self.local
+        return self.openai
+
+    def model_for(self, object_type: str, model: Optional[str] = None) -> str:
+        """Model for an object type: its override, else model (or self.model)."""
+        return self.object_type_models.get(object_type) or model or self.model
+
+    async def embed_text(
+        self, texts: Sequence[str], model: Optional[str] = None
+    ) -> List[np.ndarray]:
+        """
+        Embed texts, consulting the content-addressed cache first.
+
+        Only distinct cache misses are sent to the provider; their vectors
+        are cached for every user and later run. Local models skip the cache
+        (computing a vector is cheaper than a Redis round trip). model
+        defaults to self.model; queries pass the user's VectorStore.read_model.
+        """
+        model = model or self.model
+        if self.cache is None or not self.provider_for(model).remote:
+            return await self._request_embeddings(texts, model)
+
+        cached = await self.cache.get_many(model, self.dimensions, texts)
+        missing = list(
+            dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None)
+        )
+        if missing:
+            fresh = dict(zip(missing, await self._request_embeddings(missing, model)))
+            await self.cache.set_many(model, self.dimensions, fresh)
+            cached = [
+                vector if vector is not None else fresh[text]
+                for text, vector in zip(texts, cached)
+            ]
+        return cached
+
+    async def _request_embeddings(
+        self, texts: Sequence[str], model: Optional[str] = None
+    ) -> List[np.ndarray]:
+        """Embed texts with the model's provider (no cache)."""
+        model = model or self.model
+        return await self.provider_for(model).embed(texts, model)
 
     async def embed_and_store(
         self,
         session,
         objects: Sequence[EmbeddingObject],
-        chunk_size_chars: int = 3500,
+        chunk_tokens: Optional[int] = None,
+        model: Optional[str] = None,
     ) -> int:
         """
         Generate embeddings for given objects and store via VectorStore.
-        Skips objects if hashes match existing rows.
-        Calculates recency_score based on occurred_at timestamp.
+        Skips objects whose content_hash already has rows for this model.
+        Stores occurred_at so recency can be scored at query time.
+
+        Without an explicit model, each object is embedded with its user's
+        VectorStore.write_models: the active model, plus the target model
+        while a model migration is backfilling.
+
+        Text is chunked on sentence boundaries up to chunk_tokens
+        (EMBEDDING_CHUNK_TOKENS) with EMBEDDING_CHUNK_OVERLAP_TOKENS overlap.
+        Chunks from all objects are packed into as few embedding requests as
+        the provider's input-count and token limits allow, then scattered back
+        to their objects and written with one bulk upsert.
         """
-        total = 0
+        pending: List[Tuple[EmbeddingObject, str]] = []
         for obj in objects:
             text = obj.text or ""
             if not text.strip():
                 continue
-            content_hash = obj.content_hash or compute_content_hash(text)
-            chunks = chunk_text(text, max_chars=chunk_size_chars)
-            embeddings = await self.embed_text(chunks)
-            for idx, emb in enumerate(embeddings):
-                await self.vector_store.store_embedding(
-                    session,
+            pending.append((obj, obj.content_hash or compute_content_hash(text)))
+        if not pending:
+            return 0
+
+        if model is not None:
+            return await self._embed_and_store_model(
+                session, pending, model, chunk_tokens
+            )
+        write_models = await self.vector_store.write_models(
+            session, [obj.user_id for obj, _ in pending], self.model
+        )
+        by_model: Dict[str, List[Tuple[EmbeddingObject, str]]] = {}
+        for obj, content_hash in pending:
+            models = {
+                self.model_for(obj.object_type, write_model)
+                for write_model in write_models[str(obj.user_id)]
+            }
+            for write_model in sorted(models):
+                by_model.setdefault(write_model, []).append((obj, content_hash))
+        stored = 0
+        for write_model, model_pending in by_model.items():
+            stored += await self._embed_and_store_model(
+                session, model_pending, write_model, chunk_tokens
+            )
+        return stored
+
+    async def _embed_and_store_model(
+        self,
+        session,
+        pending: List[Tuple[EmbeddingObject, str]],
+        model: str,
+        chunk_tokens: Optional[int],
+    ) -> int:
+        """embed_and_store for (object, content_hash) pairs and one model."""
+        # Unchanged objects already embedded with this model cost nothing
+        existing = await self.vector_store.existing_content_hashes(
+            session,
+            [
+                (str(obj.user_id), obj.object_type, str(obj.object_id), content_hash)
+                for obj, content_hash in pending
+            ],
+            embedding_model=model,
+        )
+        if existing:
+            before = len(pending)
+            pending = [
+                (obj, content_hash)
+                for obj, content_hash in pending
+                if (str(obj.user_id), obj.object_type, str(obj.object_id), content_hash)
+                not in existing
+            ]
+            self.logger.debug(
+                "Skipped unchanged objects",
+                extra={"skipped": before - len(pending)},
+            )
+
+        # (object, content_hash, chunk_index) for every chunk, in order
+        chunk_refs: List[Tuple[EmbeddingObject, str, int]] = []
+        chunk_texts: List[str] = []
+        for obj, content_hash in pending:
+            chunks = chunk_text_tokens(
+                obj.text,
+                max_tokens=chunk_tokens or settings.embedding_chunk_tokens,
+                overlap_tokens=settings.embedding_chunk_overlap_tokens,
+                model=model,
+            )
+            for idx, chunk in enumerate(chunks):
+                chunk_refs.append((obj, content_hash, idx))
+                chunk_texts.append(chunk)
+        if not chunk_texts:
+            return 0
+
+        embeddings: List[Optional[np.ndarray]] = [None] * len(chunk_texts)
+        batches = plan_batches(
+            chunk_texts,
+            max_inputs=settings.embedding_batch_max_inputs,
+            max_tokens=settings.embedding_batch_max_tokens,
+        )
+        # Batches run concurrently; the dispatcher bounds in-flight requests
+        batch_vectors = await asyncio.gather(
+            *(
+                self.embed_text([chunk_texts[i] for i in batch], model)
+                for batch in batches
+            )
+        )
+        for batch, vectors in zip(batches, batch_vectors):
+            if len(vectors) != len(batch):
+                raise RuntimeError("Embedding response invalid")
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector
+        self.logger.debug(
+            "Embedded chunks",
+            extra={
+                "model": model,
+                "objects": len(pending),
+                "chunks": len(chunk_texts),
+                "requests": len(batches),
+            },
+        )
+
+        results = await self.vector_store.store_embeddings_bulk(
+            session,
+            [
+                EmbeddingWrite(
                     user_id=obj.user_id,
                     object_type=obj.object_type,
                     object_id=obj.object_id,
                     chunk_index=idx,
                     embedding=emb,
-                    embedding_model=self.model,
+                    embedding_model=model,
                     content_hash=content_hash,
                     metadata=obj.metadata or {},
-                    occurred_at=obj.occurred_at,  # For recency score calculation
+                    occurred_at=obj.occurred_at,
+                    source=obj.source,
                 )
-                total += 1
-        return total
+                for (obj, content_hash, idx), emb in zip(chunk_refs, embeddings)
+            ],
+        )
+        return len(results)
 
 
-__all__ = ["EmbeddingService", "EmbeddingObject", "compute_content_hash", "chunk_text"]
+__all__ = [
+    "EmbeddingService",
+    "EmbeddingObject",
+    "compute_content_hash",
+    "chunk_text",
+    "decode_embedding",
+    "estimate_tokens",
+    "plan_batches",
+]
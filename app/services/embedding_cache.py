@@ -0,0 +1,124 @@
+"""Content-addressed embedding cache (Redis) shared across users and runs."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors keyed by (embedding_model, dimensions, sha256(text)).
+
+    Vectors are stored as float32 bytes with a sliding TTL (refreshed on every
+    hit); with Redis maxmemory-policy allkeys-lru, memory pressure evicts the
+    least recently used vectors first. Redis failures are logged and treated
+    as misses so embedding never depends on the cache being up.
+    """
+
+    STATS_KEY = "stats"
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis] = None,
+        *,
+        ttl_seconds: Optional[int] = None,
+        prefix: str = "embcache",
+    ):
+        self.redis = redis or aioredis.from_url(settings.redis_url)
+        self.ttl_seconds = ttl_seconds or settings.embedding_cache_ttl_seconds
+        self.prefix = prefix
+        # Process-local counters; Redis keeps the cross-process totals
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, model: str, dimensions: Optional[int], text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{model}:{dimensions or 'default'}:{digest}"
+
+    async def get_many(
+        self, model: str, dimensions: Optional[int], texts: Sequence[str]
+    ) -> List[Optional[np.ndarray]]:
+        """Cached vectors for texts, None where missing."""
+        if not texts:
+            return []
+        keys = [self.key(model, dimensions, text) for text in texts]
+        try:
+            values = await self.redis.mget(keys)
+        except RedisError as exc:
+            logger.warning("Embedding cache read failed", extra={"error": str(exc)})
+            self.misses += len(texts)
+            return [None] * len(texts)
+
+        vectors: List[Optional[np.ndarray]] = [
+            np.frombuffer(value, dtype=np.float32) if value else None
+            for value in values
+        ]
+        hit_keys = [key for key, vector in zip(keys, vectors) if vector is not None]
+        hits, misses = len(hit_keys), len(texts) - len(hit_keys)
+        self.hits += hits
+        self.misses += misses
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in hit_keys:
+                    pipe.expire(key, self.ttl_seconds)
+                pipe.hincrby(f"{self.prefix}:{self.STATS_KEY}", "hits", hits)
+                pipe.hincrby(f"{self.prefix}:{self.STATS_KEY}", "misses", misses)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Embedding cache touch failed", extra={"error": str(exc)})
+        return vectors
+
+    async def set_many(
+        self,
+        model: str,
+        dimensions: Optional[int],
+        items: Dict[str, Sequence[float]],
+    ) -> None:
+        """Store vectors keyed by their text."""
+        if not items:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for text, vector in items.items():
+                    pipe.set(
+                        self.key(model, dimensions, text),
+                        np.asarray(vector, dtype=np.float32).tobytes(),
+                        ex=self.ttl_seconds,
+                    )
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Embedding cache write failed", extra={"error": str(exc)})
+
+    def stats(self) -> Dict[str, float]:
+        """Process-local hit/miss counters and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def global_stats(self) -> Dict[str, float]:
+        """Hit/miss totals across all processes sharing the cache."""
+        raw = await self.redis.hgetall(f"{self.prefix}:{self.STATS_KEY}")
+        hits = int(raw.get(b"hits", 0))
+        misses = int(raw.get(b"misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+__all__ = ["EmbeddingCache"]
@@ -0,0 +1,224 @@
+"""Bounded-concurrency, rate-limited dispatcher for embedding API calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from an x-ratelimit-reset-* header such as "6m0s" or "20ms"."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Continuous-refill token bucket for a per-minute quota.
+
+    Capacity and refill rate start from settings and are corrected from the
+    provider's x-ratelimit-* headers after every response.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount tokens are available, then take them."""
+        amount = min(amount, self.capacity)  # Oversize requests wait for a full bucket
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def observe(
+        self,
+        limit: Optional[float],
+        remaining: Optional[float],
+        reset_seconds: Optional[float],
+    ) -> None:
+        """Align the bucket with the provider's view of the quota."""
+        self._refill()
+        if limit:
+            self.capacity = limit
+            self.rate = limit / 60.0
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+            if reset_seconds:
+                # Time until the provider considers the quota fully replenished
+                self.rate = max((self.capacity - remaining) / reset_seconds, self.rate)
+
+
+class EmbeddingDispatcher:
+    """
+    Keeps up to EMBEDDING_MAX_CONCURRENCY embedding requests in flight.
+
+    Requests wait on request and token buckets driven by rate-limit headers.
+    429s pause every caller for a jittered exponential backoff (or the
+    server's retry-after). Transient connection/5xx errors are retried per
+    request. in_flight and queued are gauges for dashboards and logs.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        max_retries: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.queued = 0
+        self.rate_limited = 0  # 429s seen
+        self._paused_until = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_settings(cls) -> "EmbeddingDispatcher":
+        return cls(
+            max_concurrency=settings.embedding_max_concurrency,
+            max_retries=settings.embedding_max_retries,
+            requests_per_minute=settings.embedding_requests_per_minute,
+            tokens_per_minute=settings.embedding_tokens_per_minute,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rate_limited": self.rate_limited,
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # RQ jobs run each job in a fresh event loop; primitives are per loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than retry-after."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        return max(delay, retry_after or 0.0)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Feed x-ratelimit-* response headers into the buckets."""
+        self.requests.observe(
+            _header_float(headers, "x-ratelimit-limit-requests"),
+            _header_float(headers, "x-ratelimit-remaining-requests"),
+            parse_reset(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.observe(
+            _header_float(headers, "x-ratelimit-limit-tokens"),
+            _header_float(headers, "x-ratelimit-remaining-tokens"),
+            parse_reset(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+    async def _wait_for_pause(self) -> None:
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def submit(self, call: Callable[[], Awaitable[Any]], *, tokens: int) -> Any:
+        """
+        Run call (returning a raw response with .headers) under the limits.
+
+        Raises the last error once max_retries is exhausted; non-transient
+        API errors (e.g. 400) are raised immediately.
+        """
+        semaphore = self._get_semaphore()
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_for_pause()
+                await self.requests.acquire(1)
+                await self.tokens.acquire(tokens)
+                try:
+                    raw = await call()
+                except RateLimitError as exc:
+                    self.rate_limited += 1
+                    if attempt == self.max_retries:
+                        raise
+                    retry_after = _header_float(exc.response.headers, "retry-after")
+                    delay = self.backoff(attempt, retry_after)
+                    # Everyone shares the quota, so everyone backs off
+                    self._paused_until = max(
+                        self._paused_until, time.monotonic() + delay
+                    )
+                    logger.warning(
+                        "Embedding request rate limited",
+                        extra={"attempt": attempt + 1, "delay": round(delay, 2)},
+                    )
+                except (APIConnectionError, APITimeoutError, InternalServerError):
+                    if attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(self.backoff(attempt))
+                else:
+                    self.observe(raw.headers)
+                    return raw
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+
+# Shared by every EmbeddingService in the process (the quota is per API key)
+embedding_dispatcher = EmbeddingDispatcher.from_settings()
+
+
+__all__ = ["EmbeddingDispatcher", "TokenBucket", "embedding_dispatcher", "parse_reset"]
@@ -0,0 +1,160 @@
+"""Embedding providers: the OpenAI API and an in-process CPU fallback."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAIError
+
+from app.core.config import settings
+from app.services.chunking import estimate_tokens
+from app.services.embedding_dispatch import EmbeddingDispatcher
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+
+def decode_embedding(data: Union[str, Sequence[float]]) -> np.ndarray:
+    """float32 array from a base64 payload (little-endian float32) or float list."""
+    if isinstance(data, str):
+        return np.frombuffer(base64.b64decode(data), dtype="<f4")
+    return np.asarray(data, dtype=np.float32)
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into float32 vectors for a named embedding model."""
+
+    remote: bool = True  # Worth caching: each call costs a network round trip
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str], model: str) -> List[np.ndarray]:
+        """One vector per text, in order."""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API behind the shared rate-limited dispatcher."""
+
+    SIZED_MODEL_PREFIX = "text-embedding-3"
+
+    def __init__(
+        self,
+        *,
+        dispatcher: EmbeddingDispatcher,
+        dimensions: Optional[int] = None,
+        client: Optional[AsyncOpenAI] = None,
+    ):
+        self.dispatcher = dispatcher
+        self.dimensions = dimensions
+        # Retries (with backoff and rate-limit accounting) are the dispatcher's
+        self.client = client or AsyncOpenAI(
+            api_key=settings.openai_api_key, max_retries=0
+        )
+
+    async def embed(self, texts: Sequence[str], model: str) -> List[np.ndarray]:
+        """
+        Vectors travel as base64 float32 and are decoded straight into NumPy
+        arrays, skipping JSON float parsing and per-value Python objects.
+        """
+        extra: Dict[str, Any] = {}
+        # Only text-embedding-3-* models accept a custom output size
+        if self.dimensions and model.startswith(self.SIZED_MODEL_PREFIX):
+            extra["dimensions"] = self.dimensions
+        try:
+            raw = await self.dispatcher.submit(
+                lambda: self.client.embeddings.with_raw_response.create(
+                    model=model,
+                    input=list(texts),
+                    encoding_format="base64",
+                    timeout=30,
+                    **extra,
+                ),
+                tokens=sum(estimate_tokens(text) for text in texts),
+            )
+        except OpenAIError as exc:
+            logger.error("Embedding request failed", extra={"error": str(exc)})
+            raise RuntimeError("Embedding request failed") from exc
+        try:
+            return [decode_embedding(item.embedding) for item in raw.parse().data]
+        except Exception as exc:
+            logger.error("Embedding response parsing failed", extra={"error": str(exc)})
+            raise RuntimeError("Embedding response invalid") from exc
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Feature-hashing embeddings computed on the CPU, with no network access.
+
+    Words and their character trigrams are hashed (CRC32, stable across
+    processes) into signed buckets, i.e. a sparse random projection of the
+    bag of features, then log-scaled and L2-normalized. Texts sharing words
+    or word pieces land close in cosine space; there is no semantic
+    generalization beyond that. Models named ``local-*`` use this provider.
+    """
+
+    remote = False
+    MODEL_PREFIX = "local-"
+    WORD_WEIGHT = 1.0
+    TRIGRAM_WEIGHT = 0.5
+    # Larger batches are embedded off the event loop
+    THREAD_MIN_TEXTS = 64
+
+    def __init__(self, dimensions: Optional[int] = None):
+        self.dimensions = dimensions or settings.embedding_dimensions
+
+    @classmethod
+    def handles(cls, model: str) -> bool:
+        return model.startswith(cls.MODEL_PREFIX)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        features: List[bytes] = []
+        weights: List[float] = []
+        for word in _WORD.findall(text.lower()):
+            features.append(word.encode("utf-8"))
+            weights.append(self.WORD_WEIGHT)
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                features.append(padded[i : i + 3].encode("utf-8"))
+                weights.append(self.TRIGRAM_WEIGHT)
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not features:
+            return vector
+        hashes = np.fromiter(
+            (zlib.crc32(feature) for feature in features),
+            dtype=np.uint32,
+            count=len(features),
+        )
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        np.add.at(
+            vector,
+            (hashes % self.dimensions).astype(np.intp),
+            signs * np.asarray(weights, dtype=np.float32),
+        )
+        # Dampen repeated features so long texts are not dominated by them
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def _embed_all(self, texts: Sequence[str]) -> List[np.ndarray]:
+        return [self.embed_one(text) for text in texts]
+
+    async def embed(self, texts: Sequence[str], model: str) -> List[np.ndarray]:
+        if len(texts) >= self.THREAD_MIN_TEXTS:
+            return await asyncio.to_thread(self._embed_all, texts)
+        return self._embed_all(texts)
+
+
+__all__ = [
+    "EmbeddingProvider",
+    "LocalEmbeddingProvider",
+    "OpenAIEmbeddingProvider",
+    "decode_embedding",
+]
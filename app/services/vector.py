@@ -2,20 +2,35 @@
 
 from __future__ import annotations
 
-import math
+import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Sequence, Tuple
-
-from sqlalchemy import and_, delete, func, select
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import (
+    Boolean,
+    Integer,
+    cast,
+    delete,
+    func,
+    literal_column,
+    select,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.models import Embedding, Event
+from app.models import Embedding, EmbeddingModelState, Event
+from app.services.embedding_providers import OpenAIEmbeddingProvider
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class VectorRecord:
     """Returned vector search record."""
 
@@ -25,17 +40,145 @@ class VectorRecord:
     chunk_index: int
     score: float  # Original cosine distance
     metadata: Dict[str, Any]
-    recency_score: Optional[float] = None  # Stored recency score [0, 1]
+    recency_score: Optional[float] = None  # Query-time recency score [0, 1]
     semantic_score: Optional[float] = None  # Normalized similarity [0, 1]
     final_score: Optional[float] = None  # Combined score
 
 
+@dataclass
+class VectorQuery:
+    """Single query in a batched vector search."""
+
+    query_embedding: Sequence[float]
+    top_k: int = 20
+    object_types: Optional[List[str]] = None
+    time_start: Optional[datetime] = None
+    time_end: Optional[datetime] = None
+    sources: Optional[List[str]] = None
+    query_text: Optional[str] = None  # Used to adjust ranking params
+    embedding_model: Optional[str] = None  # Only this model's rows; None = any
+
+
+@dataclass
+class EmbeddingWrite:
+    """One embedding row for VectorStore.store_embeddings_bulk."""
+
+    user_id: str
+    object_type: str
+    object_id: str
+    chunk_index: int
+    embedding: Sequence[float]  # float32 ndarray from EmbeddingService
+    embedding_model: str
+    content_hash: str
+    metadata: Optional[Dict[str, Any]] = None
+    occurred_at: Optional[datetime] = None
+    source: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, str, str, int, str]:
+        """Unique key (uq_embeddings_user_object_chunk_model)."""
+        return (
+            str(self.user_id),
+            self.object_type,
+            str(self.object_id),
+            self.chunk_index,
+            self.embedding_model,
+        )
+
+
+@dataclass(slots=True)
+class EmbeddingWriteResult:
+    """Outcome of one row of a bulk upsert."""
+
+    id: Any
+    inserted: bool  # False when an existing row was updated
+
+
+@dataclass
+class SearchPlan:
+    """Access path and index parameters used to answer a query."""
+
+    strategy: str  # "exact" (pre-filtered scan) or "hnsw"
+    ef_search: int
+    iterative_scan: str
+    attempts: int  # 1 unless the query was escalated
+    candidates: int  # Stage A rows returned on the final attempt
+
+
+class VectorSearchResult(List[VectorRecord]):
+    """Ranked VectorRecords with the SearchPlan that produced them."""
+
+    def __init__(self, records: Sequence[VectorRecord], plan: SearchPlan):
+        super().__init__(records)
+        self.plan = plan
+
+
+def hybrid_rerank(
+    distances: np.ndarray,
+    recency: np.ndarray,
+    *,
+    alpha: float,
+    top_k: int,
+    mode: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score all candidates in one vectorized pass and select the top_k.
+
+    Returns (top_k candidate indices best-first, semantic scores, final scores);
+    the score arrays cover every candidate. Ties on final score are broken by
+    semantic score.
+    """
+    mode = mode or settings.ranking_mode
+    similarity = 1.0 - distances
+    if mode == "multiplier":
+        final = similarity * (0.5 + 0.5 * recency)
+    else:  # weighted
+        final = alpha * similarity + (1 - alpha) * recency
+
+    k = min(top_k, final.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), similarity, final
+    if k < final.shape[0]:
+        top = np.argpartition(-final, k - 1)[:k]
+    else:
+        top = np.arange(final.shape[0])
+    order = top[np.lexsort((-similarity[top], -final[top]))]
+    return order, similarity, final
+
+
 class VectorStore:
     """VectorStore abstraction with pgvector backend."""
 
-    def __init__(self, embedding_dim: int = 1536, distance_metric: str = "cosine"):
-        self.embedding_dim = embedding_dim
+    STORAGE_MODES = ("full", "halfvec", "binary", "matryoshka")
+    # 13 bind params per row; stays well under the 32767 asyncpg limit
+    BULK_UPSERT_ROWS = 1000
+    # Largest age/tau passed to exp(); Postgres raises below about -745
+    MAX_RECENCY_DECAY = 700.0
+
+    def __init__(
+        self,
+        embedding_dim: Optional[int] = None,
+        distance_metric: str = "cosine",
+        storage_mode: Optional[str] = None,
+    ):
+        self.embedding_dim = embedding_dim or settings.embedding_dimensions
         self.distance_metric = distance_metric
+        # Index used for HNSW candidate generation (see migrations 010 and 011)
+        self.storage_mode = storage_mode or settings.vector_storage_mode
+        if self.storage_mode not in self.STORAGE_MODES:
+            raise ValueError(f"Unsupported vector storage mode: {self.storage_mode}")
+        # Only Matryoshka-trained models keep their meaning in a short prefix;
+        # truncating other models' vectors silently wrecks shortlist recall
+        if (
+            self.storage_mode == "matryoshka"
+            and not settings.embedding_model.startswith(
+                OpenAIEmbeddingProvider.SIZED_MODEL_PREFIX
+            )
+        ):
+            raise ValueError(
+                "Vector storage mode 'matryoshka' needs a text-embedding-3-* "
+                f"EMBEDDING_MODEL, got {settings.embedding_model}"
+            )
 
     async def store_embedding(
         self,
@@ -50,17 +193,15 @@ class VectorStore:
         content_hash: str,
         metadata: Optional[Dict[str, Any]] = None,
         occurred_at: Optional[datetime] = None,
-    ) -> None:
-        """Upsert an embedding row with recency score calculation."""
-        metadata = metadata or {}
+        source: Optional[str] = None,
+    ) -> Any:
+        """
+        Upsert an embedding row and return its id.
 
-        # Calculate recency score if occurred_at provided
-        recency_score = None
-        if occurred_at:
-            now = datetime.now(timezone.utc)
-            age_days = (now - occurred_at).total_seconds() / 86400
-            tau_days = settings.ranking_tau_days
-            recency_score = math.exp(-age_days / tau_days)
+        occurred_at is stored on the row so recency can be computed at query time;
+        occurred_at and source also serve as search filters without a join.
+        """
+        metadata = metadata or {}
 
         stmt = (
             pg_insert(Embedding.__table__)
@@ -75,7 +216,8 @@ class VectorStore:
                 embedding=embedding,
                 content_hash=content_hash,
                 metadata=metadata,
-                recency_score=recency_score,
+                occurred_at=occurred_at,
+                source=source,
             )
             .on_conflict_do_update(
                 index_elements=[
@@ -89,12 +231,134 @@ class VectorStore:
                     "embedding": embedding,
                     "content_hash": content_hash,
                     "metadata": metadata,
-                    "recency_score": recency_score,
+                    "occurred_at": occurred_at,
+                    "source": source,
                     "updated_at": func.now(),
                 },
             )
+            .returning(Embedding.id)
         )
-        await session.execute(stmt)
+        result = await session.execute(stmt)
+        return result.scalar_one()
+
+    async def store_embeddings_bulk(
+        self, session: AsyncSession, rows: Sequence[EmbeddingWrite]
+    ) -> List[EmbeddingWriteResult]:
+        """
+        Upsert many embedding rows with one multi-row INSERT ... ON CONFLICT
+        per BULK_UPSERT_ROWS rows.
+
+        Returns one result per input row, in input order. Rows repeating a key
+        within the batch collapse onto the last occurrence (Postgres cannot
+        update the same row twice in one statement) and share its result.
+        """
+        latest: Dict[Tuple[str, str, str, int, str], EmbeddingWrite] = {}
+        for row in rows:
+            latest.pop(row.key, None)
+            latest[row.key] = row
+        unique = list(latest.values())
+
+        table = Embedding.__table__
+        outcomes: Dict[Tuple[str, str, str, int, str], EmbeddingWriteResult] = {}
+        for start in range(0, len(unique), self.BULK_UPSERT_ROWS):
+            stmt = pg_insert(table).values(
+                [
+                    {
+                        "user_id": row.user_id,
+                        "object_type": row.object_type,
+                        "object_id": row.object_id,
+                        "chunk_index": row.chunk_index,
+                        "embedding_model": row.embedding_model,
+                        "embedding_dim": len(row.embedding),
+                        "distance_metric": self.distance_metric,
+                        "embedding": row.embedding,
+                        "content_hash": row.content_hash,
+                        "metadata": row.metadata or {},
+                        "occurred_at": row.occurred_at,
+                        "source": row.source,
+                    }
+                    for row in unique[start : start + self.BULK_UPSERT_ROWS]
+                ]
+            )
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    table.c.user_id,
+                    table.c.object_type,
+                    table.c.object_id,
+                    table.c.chunk_index,
+                    table.c.embedding_model,
+                ],
+                set_={
+                    name: excluded[name]
+                    for name in (
+                        "embedding",
+                        "embedding_dim",
+                        "content_hash",
+                        "metadata",
+                        "occurred_at",
+                        "source",
+                    )
+                }
+                | {"updated_at": func.now()},
+            ).returning(
+                table.c.id,
+                table.c.user_id,
+                table.c.object_type,
+                table.c.object_id,
+                table.c.chunk_index,
+                table.c.embedding_model,
+                # xmax is 0 only for freshly inserted tuples
+                literal_column("xmax = 0", Boolean).label("inserted"),
+            )
+            for ret in (await session.execute(stmt)).all():
+                key = (
+                    str(ret.user_id),
+                    ret.object_type,
+                    str(ret.object_id),
+                    ret.chunk_index,
+                    ret.embedding_model,
+                )
+                outcomes[key] = EmbeddingWriteResult(
+                    id=ret.id, inserted=bool(ret.inserted)
+                )
+        return [outcomes[row.key] for row in rows]
+
+    async def existing_content_hashes(
+        self,
+        session: AsyncSession,
+        keys: Sequence[Tuple[str, str, str, str]],
+        *,
+        embedding_model: str,
+    ) -> Set[Tuple[str, str, str, str]]:
+        """
+        Which (user_id, object_type, object_id, content_hash) keys already have
+        embeddings for embedding_model (served by idx_embeddings_user_content_hash).
+        """
+        emb = Embedding
+        found: Set[Tuple[str, str, str, str]] = set()
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), self.BULK_UPSERT_ROWS):
+            stmt = (
+                select(emb.user_id, emb.object_type, emb.object_id, emb.content_hash)
+                .where(
+                    emb.embedding_model == embedding_model,
+                    tuple_(
+                        emb.user_id, emb.object_type, emb.object_id, emb.content_hash
+                    ).in_(unique[start : start + self.BULK_UPSERT_ROWS]),
+                )
+                .distinct()
+            )
+            for row in (await session.execute(stmt)).all():
+                found.add(
+                    (
+                        str(row.user_id),
+                        row.object_type,
+                        str(row.object_id),
+                        row.content_hash,
+                    )
+                )
+        return found
 
     def _get_ranking_params(self, query_text: Optional[str]) -> Tuple[float, float]:
         """Adjust alpha/tau based on query intent."""
@@ -111,6 +375,347 @@ class VectorStore:
 
         return alpha, tau_days
 
+    def _filter_conditions(self, user_id: str, query: VectorQuery) -> List[Any]:
+        """WHERE conditions for a query, using the denormalized filter columns."""
+        emb = Embedding
+        conditions = [emb.user_id == user_id]
+
+        if query.embedding_model:
+            conditions.append(emb.embedding_model == query.embedding_model)
+        if query.object_types:
+            conditions.append(emb.object_type.in_(query.object_types))
+
+        # Time and source filters only apply to events
+        need_event_filter = (query.time_start or query.time_end or query.sources) and (
+            not query.object_types or "event" in query.object_types
+        )
+        if need_event_filter:
+            conditions.append(emb.object_type == "event")
+            if query.time_start:
+                conditions.append(emb.occurred_at >= query.time_start)
+            if query.time_end:
+                conditions.append(emb.occurred_at <= query.time_end)
+            if query.sources:
+                conditions.append(emb.source.in_(query.sources))
+
+        return conditions
+
+    def _scored_columns(
+        self, source: Any, query: VectorQuery, query_idx: int
+    ) -> Tuple[Any, List[Any]]:
+        """
+        Full-precision distance and the Stage A columns for a row source.
+
+        source is the Embedding model or a subquery's columns exposing id,
+        embedding and occurred_at.
+        """
+        _, tau_days = self._get_ranking_params(query.query_text)
+        distance = source.embedding.cosine_distance(query.query_embedding)
+        # Future-dated rows (e.g. upcoming calendar events) count as brand new
+        age_days = func.greatest(
+            func.extract("epoch", func.now() - source.occurred_at) / 86400.0, 0.0
+        )
+        # Postgres exp() raises on underflow (argument below about -745), so
+        # very old rows are clamped to a recency of exp(-700), i.e. zero
+        decay = func.least(age_days / tau_days, self.MAX_RECENCY_DECAY)
+        # Rows without occurred_at get a neutral recency of 0.5
+        recency = func.coalesce(func.exp(-decay), 0.5)
+        return distance, [
+            literal_column(str(int(query_idx)), Integer).label("query_idx"),
+            source.id,
+            distance.label("score"),
+            recency.label("recency_score"),
+        ]
+
+    def _index_distance(self, query_embedding: Sequence[float]) -> Any:
+        """
+        Distance on the reduced index expression for the storage mode.
+
+        The expressions must match the expression indexes from migrations 010
+        and 011 exactly (including literal constants) for the planner to use
+        them.
+        """
+        emb = Embedding
+        if self.storage_mode == "halfvec":
+            half = HALFVEC(self.embedding_dim)
+            return cast(emb.embedding, half).cosine_distance(
+                cast(query_embedding, half)
+            )
+        if self.storage_mode == "matryoshka":
+            # Cosine distance is scale-invariant, so comparing raw prefixes is
+            # the same as comparing renormalized ones
+            short_dim = settings.embedding_short_dim
+            short = Vector(short_dim)
+            prefix = func.subvector(
+                emb.embedding, literal_column("1"), literal_column(str(int(short_dim)))
+            )
+            return cast(prefix, short).cosine_distance(
+                cast(list(query_embedding[:short_dim]), short)
+            )
+        bits = BIT(self.embedding_dim)
+        return cast(func.binary_quantize(emb.embedding), bits).hamming_distance(
+            func.binary_quantize(cast(query_embedding, Vector(self.embedding_dim)))
+        )
+
+    def _shortlist_size(self) -> int:
+        """Candidates taken from a reduced index before full-precision rescoring."""
+        return settings.rerank_candidates_topn * settings.vector_quantized_oversample
+
+    def _candidate_query(
+        self,
+        user_id: str,
+        query: VectorQuery,
+        query_idx: int,
+        force_exact: bool = False,
+    ):
+        """
+        Build the Stage A candidate select for a single query.
+
+        Recency is computed here from occurred_at using the per-query tau, so it
+        is always current at query time; Stage B combines it with similarity.
+        Only (id, distance, recency) is selected; metadata is hydrated later for
+        the final top_k rows.
+
+        The statement picks its own access path: a bounded count of the rows
+        passing the filters is evaluated once, and only one of two branches
+        runs. Small candidate sets get an exact scan over the pre-filtered rows
+        (btree indexes, full recall); larger ones use the HNSW index, which in
+        the halfvec/binary/matryoshka storage modes is the reduced index
+        followed by a full-precision rescore of the shortlist.
+        force_exact skips the estimate and always runs the exact scan.
+        """
+        emb = Embedding
+        conditions = self._filter_conditions(user_id, query)
+        distance, columns = self._scored_columns(emb, query, query_idx)
+
+        # Ordering by distance + 0 keeps the planner off the HNSW index
+        exact = (
+            select(*columns, literal_column("'exact'").label("strategy"))
+            .where(*conditions)
+            .order_by(distance + 0.0)
+            .limit(settings.rerank_candidates_topn)
+        )
+        if force_exact:
+            return exact
+
+        max_exact = settings.vector_exact_scan_max_rows
+        estimate = (
+            select(func.count().label("n"))
+            .select_from(
+                select(emb.id).where(*conditions).limit(max_exact + 1).subquery()
+            )
+            .cte(f"candidate_estimate_{query_idx}")
+        )
+        estimated_rows = select(estimate.c.n).scalar_subquery()
+
+        exact = exact.where(estimated_rows <= max_exact)
+        if self.storage_mode == "full":
+            hnsw = (
+                select(*columns, literal_column("'hnsw'").label("strategy"))
+                .where(*conditions, estimated_rows > max_exact)
+                .order_by("score")
+                .limit(settings.rerank_candidates_topn)
+            )
+        else:
+            # Walk the reduced index for an oversampled shortlist, then
+            # rescore only the shortlist against the full-precision vectors
+            shortlist = (
+                select(emb.id, emb.embedding, emb.occurred_at)
+                .where(*conditions, estimated_rows > max_exact)
+                .order_by(self._index_distance(query.query_embedding))
+                .limit(self._shortlist_size())
+                .subquery()
+            )
+            _, shortlist_columns = self._scored_columns(shortlist.c, query, query_idx)
+            hnsw = (
+                select(*shortlist_columns, literal_column("'hnsw'").label("strategy"))
+                .order_by("score")
+                .limit(settings.rerank_candidates_topn)
+            )
+        return union_all(
+            *(
+                select(*sub.c).select_from(sub)
+                for sub in (exact.subquery(), hnsw.subquery())
+            )
+        )
+
+    def _rerank(
+        self, rows: Sequence[Any], query: VectorQuery
+    ) -> List[Tuple[Any, float, float, float, float]]:
+        """
+        Stage B: vectorized hybrid rerank of the candidates.
+
+        Returns (id, distance, recency, semantic, final) for the top_k rows,
+        best first.
+        """
+        if not rows:
+            return []
+        alpha, _ = self._get_ranking_params(query.query_text)
+
+        count = len(rows)
+        distances = np.fromiter((r.score for r in rows), dtype=np.float64, count=count)
+        recency = np.fromiter(
+            (r.recency_score for r in rows), dtype=np.float64, count=count
+        )
+        order, similarity, final = hybrid_rerank(
+            distances, recency, alpha=alpha, top_k=query.top_k
+        )
+        return [
+            (
+                rows[i].id,
+                float(distances[i]),
+                float(recency[i]),
+                float(similarity[i]),
+                float(final[i]),
+            )
+            for i in order.tolist()
+        ]
+
+    async def _hydrate(
+        self, session: AsyncSession, user_id: str, ids: Sequence[Any]
+    ) -> Dict[Any, Any]:
+        """Fetch descriptive columns and metadata for the final result rows."""
+        if not ids:
+            return {}
+        emb = Embedding
+        stmt = select(
+            emb.id, emb.object_type, emb.object_id, emb.chunk_index, emb.meta
+        ).where(emb.user_id == user_id, emb.id.in_(ids))
+        rows = (await session.execute(stmt)).all()
+        return {row.id: row for row in rows}
+
+    async def _set_hnsw_params(self, session: AsyncSession, ef_search: int) -> None:
+        """Apply HNSW scan settings for the current transaction (SET LOCAL)."""
+        params = [func.set_config("hnsw.ef_search", str(ef_search), True)]
+        if settings.hnsw_iterative_scan:
+            params.append(
+                func.set_config(
+                    "hnsw.iterative_scan", settings.hnsw_iterative_scan, True
+                )
+            )
+        await session.execute(select(*params))
+
+    async def search_many(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        queries: Sequence[VectorQuery],
+    ) -> List[VectorSearchResult]:
+        """
+        Resolve several queries for one user with shared SQL round trips.
+
+        Each query keeps its own filters and top_k; Stage A candidates for all
+        queries are fetched with one UNION ALL statement and reranked per query,
+        then metadata for every query's top_k is hydrated with one more query.
+        Results are returned in the same order as ``queries``.
+
+        The HNSW index is shared by all users, so its nearest neighbours can be
+        filtered away and leave a query short of top_k. Short HNSW queries are
+        retried with a doubled hnsw.ef_search up to HNSW_EF_SEARCH_MAX, then
+        with an exact scan. Each result's ``plan`` records what was used.
+        """
+        if not queries:
+            return []
+
+        # ef_search bounds how many rows an HNSW scan can return
+        index_limit = (
+            settings.rerank_candidates_topn
+            if self.storage_mode == "full"
+            else self._shortlist_size()
+        )
+        ef_search = max(settings.hnsw_ef_search, index_limit)
+        pending: Dict[int, bool] = {idx: False for idx in range(len(queries))}
+        rows_by_query: Dict[int, List[Any]] = {}
+        plans: Dict[int, SearchPlan] = {}
+        attempt = 0
+
+        while pending:
+            attempt += 1
+            if not all(pending.values()):
+                await self._set_hnsw_params(session, ef_search)
+
+            selects = [
+                select(*subq.c).select_from(subq)
+                for subq in (
+                    self._candidate_query(
+                        user_id, queries[idx], idx, force_exact=force_exact
+                    ).subquery()
+                    for idx, force_exact in pending.items()
+                )
+            ]
+            stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+            rows = (await session.execute(stmt)).all()
+
+            grouped: Dict[int, List[Any]] = {idx: [] for idx in pending}
+            for row in rows:
+                grouped[row.query_idx].append(row)
+
+            retry: Dict[int, bool] = {}
+            for idx, force_exact in pending.items():
+                query_rows = grouped[idx]
+                strategy = query_rows[0].strategy if query_rows else "exact"
+                rows_by_query[idx] = query_rows
+                plans[idx] = SearchPlan(
+                    strategy=strategy,
+                    ef_search=ef_search,
+                    iterative_scan=settings.hnsw_iterative_scan or "off",
+                    attempts=attempt,
+                    candidates=len(query_rows),
+                )
+
+                wanted = min(queries[idx].top_k, settings.rerank_candidates_topn)
+                if force_exact or len(query_rows) >= wanted:
+                    continue
+                if strategy == "hnsw" and ef_search < settings.hnsw_ef_search_max:
+                    retry[idx] = False
+                elif strategy == "hnsw" or not query_rows:
+                    # No rows tells us nothing about the branch taken; an
+                    # exact scan settles it (cheap when nothing matches)
+                    retry[idx] = True
+
+            if retry:
+                logger.debug(
+                    "Escalating short vector search",
+                    extra={"queries": sorted(retry), "ef_search": ef_search},
+                )
+            if not all(retry.values()):
+                ef_search = min(ef_search * 2, settings.hnsw_ef_search_max)
+            pending = retry
+
+        ranked = {
+            idx: self._rerank(rows_by_query[idx], query)
+            for idx, query in enumerate(queries)
+        }
+        hydrated = await self._hydrate(
+            session,
+            user_id,
+            list({entry[0] for entries in ranked.values() for entry in entries}),
+        )
+
+        results = []
+        for idx in range(len(queries)):
+            records = []
+            for emb_id, distance, recency, semantic, final in ranked[idx]:
+                row = hydrated.get(emb_id)
+                if row is None:  # Deleted between the two phases
+                    continue
+                records.append(
+                    VectorRecord(
+                        id=row.id,
+                        object_type=row.object_type,
+                        object_id=row.object_id,
+                        chunk_index=row.chunk_index,
+                        score=distance,
+                        metadata=row.meta or {},
+                        recency_score=recency,
+                        semantic_score=semantic,
+                        final_score=final,
+                    )
+                )
+            results.append(VectorSearchResult(records, plans[idx]))
+        return results
+
     async def search(
         self,
         session: AsyncSession,
@@ -123,86 +728,70 @@ class VectorStore:
         time_end: Optional[datetime] = None,
         sources: Optional[List[str]] = None,
         query_text: Optional[str] = None,
-    ) -> List[VectorRecord]:
+        embedding_model: Optional[str] = None,
+    ) -> VectorSearchResult:
         """
-        Semantic search using stored recency_score from embeddings.
-        Hybrid ranking: semantic_score (from cosine distance) + recency_score (stored).
-        """
-        emb = Embedding
+        Semantic search with hybrid ranking.
+        Hybrid ranking: semantic_score (from cosine distance) + recency_score
+        (computed at query time from occurred_at).
 
-        # Stage A: Get topN candidates by semantic similarity
-        query = (
-            select(
-                emb.id,
-                emb.object_type,
-                emb.object_id,
-                emb.chunk_index,
-                emb.meta,
-                emb.recency_score,
-                emb.embedding.cosine_distance(query_embedding).label("score"),
-            )
-            .where(emb.user_id == user_id)
-            .order_by("score")
-            .limit(settings.rerank_candidates_topn)
+        Pass the user's read_model as embedding_model (and embed the query
+        with it) so rows of a model being migrated to are never mixed in.
+        """
+        results = await self.search_many(
+            session,
+            user_id=user_id,
+            queries=[
+                VectorQuery(
+                    query_embedding=query_embedding,
+                    top_k=top_k,
+                    object_types=object_types,
+                    time_start=time_start,
+                    time_end=time_end,
+                    sources=sources,
+                    query_text=query_text,
+                    embedding_model=embedding_model,
+                )
+            ],
         )
+        return results[0]
 
-        if object_types:
-            query = query.where(emb.object_type.in_(object_types))
+    async def read_model(
+        self, session: AsyncSession, user_id: str, default: str
+    ) -> str:
+        """
+        Embedding model that serves the user's searches.
 
-        # If filtering by time or sources, join to events when object_type == "event"
-        need_event_filter = (time_start or time_end or sources) and (
-            not object_types or "event" in object_types
+        During a migration this stays on the old model until the backfill of
+        the new one is complete; users that never migrated use default.
+        """
+        stmt = select(EmbeddingModelState.active_model).where(
+            EmbeddingModelState.user_id == user_id
         )
-        if need_event_filter:
-            evt = Event
-            conditions = [emb.object_type == "event", emb.object_id == evt.id]
-            if time_start:
-                conditions.append(evt.occurred_at >= time_start)
-            if time_end:
-                conditions.append(evt.occurred_at <= time_end)
-            if sources:
-                conditions.append(evt.source.in_(sources))
-            query = query.select_from(
-                emb.__table__.join(evt.__table__, and_(*conditions))
-            )
-
-        rows = (await session.execute(query)).all()
+        return (await session.execute(stmt)).scalar_one_or_none() or default
 
-        # Stage B: Rerank with hybrid scoring using stored recency_score
-        alpha, _ = self._get_ranking_params(query_text)
-
-        reranked = []
-        for row in rows:
-            # Convert distance to similarity [0, 1]
-            sim = 1.0 - row.score
-            # Use stored recency, default to 0.5 if not available
-            recency = row.recency_score if row.recency_score is not None else 0.5
-
-            # Calculate final score
-            if settings.ranking_mode == "multiplier":
-                final_score = sim * (0.5 + 0.5 * recency)
-            else:  # weighted
-                final_score = alpha * sim + (1 - alpha) * recency
-
-            reranked.append(
-                VectorRecord(
-                    id=row.id,
-                    object_type=row.object_type,
-                    object_id=row.object_id,
-                    chunk_index=row.chunk_index,
-                    score=row.score,
-                    metadata=row.meta or {},
-                    recency_score=recency,
-                    semantic_score=sim,
-                    final_score=final_score,
-                )
-            )
+    async def write_models(
+        self, session: AsyncSession, user_ids: Sequence[str], default: str
+    ) -> Dict[str, List[str]]:
+        """
+        Embedding models new rows are written with, per user.
 
-        # Sort by final_score (desc), then semantic_score (desc)
-        reranked.sort(
-            key=lambda x: (x.final_score or 0, x.semantic_score or 0), reverse=True
+        Users migrating to a new model get rows for both the active and the
+        target model so the backfill never falls behind fresh writes.
+        """
+        unique = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        models = {user_id: [default] for user_id in unique}
+        if not unique:
+            return models
+        state = EmbeddingModelState
+        stmt = select(state.user_id, state.active_model, state.target_model).where(
+            state.user_id.in_(unique)
         )
-        return reranked[:top_k]
+        for row in (await session.execute(stmt)).all():
+            models[str(row.user_id)] = [row.active_model] + (
+                [row.target_model] if row.target_model else []
+            )
+        return models
 
     async def delete_by_object(
         self,
@@ -249,5 +838,50 @@ class VectorStore:
         result = await session.execute(stmt)
         return result.rowcount or 0
 
+    async def delete_model_rows(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        embedding_model: str,
+        limit: int,
+    ) -> int:
+        """Delete up to limit of a user's rows for a retired embedding model."""
+        emb = Embedding
+        batch = (
+            select(emb.id)
+            .where(emb.user_id == user_id, emb.embedding_model == embedding_model)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        stmt = (
+            delete(Embedding)
+            .where(emb.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.rowcount or 0
+
 
-__all__ = ["VectorStore", "VectorRecord"]
+def create_vector_store(**kwargs: Any) -> VectorStore:
+    """Build the VectorStore selected by settings.vector_backend."""
+    if settings.vector_backend == "memory":
+        from app.services.vector_memory import InMemoryVectorStore
+
+        return InMemoryVectorStore(**kwargs)
+    if settings.vector_backend != "pgvector":
+        raise ValueError(f"Unsupported vector backend: {settings.vector_backend}")
+    return VectorStore(**kwargs)
+
+
+__all__ = [
+    "VectorStore",
+    "create_vector_store",
+    "VectorRecord",
+    "VectorQuery",
+    "VectorSearchResult",
+    "EmbeddingWrite",
+    "EmbeddingWriteResult",
+    "SearchPlan",
+    "hybrid_rerank",
+]
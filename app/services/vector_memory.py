@@ -0,0 +1,571 @@
+"""In-process VectorStore backend: per-user NumPy matrices with brute-force search."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Embedding
+from app.services.vector import (
+    EmbeddingWrite,
+    EmbeddingWriteResult,
+    SearchPlan,
+    VectorQuery,
+    VectorRecord,
+    VectorSearchResult,
+    VectorStore,
+    hybrid_rerank,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough per-row cost of the Python-side columns (ids, metadata dicts)
+_ROW_OVERHEAD_BYTES = 512
+# Session.info key for cache patches waiting on the transaction's commit
+_PENDING_KEY = "vector_memory_pending"
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    """Seconds since the epoch, NaN for missing timestamps (fails every filter)."""
+    if value is None:
+        return float("nan")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    """L2-normalized float32 copy; zero vectors are left as zeros."""
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm > 0 else arr
+
+
+@dataclass(eq=False)
+class UserIndex:
+    """
+    One user's embeddings as a contiguous row-normalized float32 matrix.
+
+    Rows [0, size) of ``matrix`` and of the parallel NumPy filter columns
+    are live; ``rows`` maps embedding id to row position. All of them share
+    one capacity that grows geometrically, so incremental appends stay
+    amortized O(dim).
+    """
+
+    dim: int
+    matrix: np.ndarray
+    ids: List[Any]
+    object_types: np.ndarray
+    models: np.ndarray
+    object_ids: List[Any]
+    chunk_indexes: List[int]
+    metadata: List[Dict[str, Any]]
+    sources: np.ndarray
+    occurred_at: np.ndarray
+    loaded_at: float = field(default_factory=time.monotonic)
+    rows: Dict[Any, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.rows = {emb_id: pos for pos, emb_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any], dim: int) -> "UserIndex":
+        count = len(rows)
+        capacity = max(count, 1)
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        object_types = np.empty(capacity, dtype=object)
+        models = np.empty(capacity, dtype=object)
+        sources = np.empty(capacity, dtype=object)
+        occurred_at = np.full(capacity, np.nan, dtype=np.float64)
+        for pos, row in enumerate(rows):
+            matrix[pos] = _normalize(row.embedding)
+            object_types[pos] = row.object_type
+            models[pos] = row.embedding_model
+            sources[pos] = row.source
+            occurred_at[pos] = _epoch(row.occurred_at)
+        return cls(
+            dim=dim,
+            matrix=matrix,
+            ids=[row.id for row in rows],
+            object_types=object_types,
+            models=models,
+            object_ids=[row.object_id for row in rows],
+            chunk_indexes=[row.chunk_index for row in rows],
+            metadata=[row.meta or {} for row in rows],
+            sources=sources,
+            occurred_at=occurred_at,
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.matrix.nbytes
+            + self.occurred_at.nbytes
+            + self.size * _ROW_OVERHEAD_BYTES
+        )
+
+    def _resize(self, capacity: int) -> None:
+        """Reallocate the matrix and filter columns, keeping the live rows."""
+        size = self.size
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:size] = self.matrix[:size]
+        self.matrix = matrix
+        for name in ("object_types", "models", "sources"):
+            column = np.empty(capacity, dtype=object)
+            column[:size] = getattr(self, name)[:size]
+            setattr(self, name, column)
+        occurred_at = np.full(capacity, np.nan, dtype=np.float64)
+        occurred_at[:size] = self.occurred_at[:size]
+        self.occurred_at = occurred_at
+
+    def upsert(
+        self,
+        emb_id: Any,
+        *,
+        embedding: Sequence[float],
+        object_type: str,
+        embedding_model: str,
+        object_id: Any,
+        chunk_index: int,
+        metadata: Dict[str, Any],
+        source: Optional[str],
+        occurred_at: Optional[datetime],
+    ) -> None:
+        """Replace the row for emb_id in place, or append it."""
+        pos = self.rows.get(emb_id)
+        if pos is None:
+            pos = self.size
+            if pos >= self.matrix.shape[0]:
+                self._resize(max(pos * 2, 1))
+            self.rows[emb_id] = pos
+            self.ids.append(emb_id)
+            self.object_ids.append(object_id)
+            self.chunk_indexes.append(chunk_index)
+            self.metadata.append(metadata)
+        else:
+            self.object_ids[pos] = object_id
+            self.chunk_indexes[pos] = chunk_index
+            self.metadata[pos] = metadata
+        self.object_types[pos] = object_type
+        self.models[pos] = embedding_model
+        self.sources[pos] = source
+        self.occurred_at[pos] = _epoch(occurred_at)
+        self.matrix[pos] = _normalize(embedding)
+
+    def remove(self, keep: np.ndarray) -> int:
+        """Drop rows where keep is False; returns the number removed."""
+        removed = int(self.size - np.count_nonzero(keep))
+        if not removed:
+            return 0
+        positions = np.flatnonzero(keep)
+        # Compact into the front rows; capacity is kept for later appends
+        for name in ("matrix", "object_types", "models", "sources", "occurred_at"):
+            column = getattr(self, name)
+            column[: positions.size] = column[positions]
+        for column in (self.object_types, self.models, self.sources):
+            column[positions.size :] = None  # Release the dropped values
+        self.ids = [self.ids[i] for i in positions]
+        self.object_ids = [self.object_ids[i] for i in positions]
+        self.chunk_indexes = [self.chunk_indexes[i] for i in positions]
+        self.metadata = [self.metadata[i] for i in positions]
+        self.rows = {emb_id: pos for pos, emb_id in enumerate(self.ids)}
+        return removed
+
+    def filter_mask(self, query: VectorQuery) -> np.ndarray:
+        """Boolean row mask equivalent to VectorStore._filter_conditions."""
+        size = self.size
+        object_types = self.object_types[:size]
+        mask = np.ones(size, dtype=bool)
+        if query.embedding_model:
+            mask &= self.models[:size] == query.embedding_model
+        if query.object_types:
+            mask &= np.isin(object_types, list(query.object_types))
+
+        need_event_filter = (query.time_start or query.time_end or query.sources) and (
+            not query.object_types or "event" in query.object_types
+        )
+        if need_event_filter:
+            mask &= object_types == "event"
+            occurred_at = self.occurred_at[:size]
+            # NaN never compares true, matching NULL occurred_at in SQL
+            if query.time_start:
+                mask &= occurred_at >= _epoch(query.time_start)
+            if query.time_end:
+                mask &= occurred_at <= _epoch(query.time_end)
+            if query.sources:
+                mask &= np.isin(self.sources[:size], list(query.sources))
+        return mask
+
+
+class UserIndexCache:
+    """Byte-bounded LRU of UserIndex entries with a freshness TTL."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, UserIndex]" = OrderedDict()
+        # Load locks live only while a load holds or awaits them, so the map
+        # stays as small as the number of users loading right now
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, user_id: str) -> Optional[UserIndex]:
+        """Cached index for a user if present and fresh (marks it recently used)."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl_seconds:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def put(self, user_id: str, entry: UserIndex) -> None:
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used users until under budget (keeps the newest)."""
+        total = self.nbytes
+        while total > self.max_bytes and len(self._entries) > 1:
+            evicted_user, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+            logger.debug(
+                "Evicted in-memory vector index",
+                extra={"user_id": evicted_user, "bytes": evicted.nbytes},
+            )
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def lock(self, user_id: str) -> asyncio.Lock:
+        """Lock serializing loads of one user (shared while anyone holds it)."""
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+
+def _apply_pending(sync_session: Any) -> None:
+    """after_commit: apply the cache patches of the committed transaction."""
+    for cache, user_id, patch in sync_session.info.pop(_PENDING_KEY, []):
+        try:
+            patch()
+        except Exception:
+            logger.exception(
+                "In-memory vector index patch failed", extra={"user_id": user_id}
+            )
+            cache.invalidate(user_id)
+
+
+def _drop_pending(sync_session: Any, transaction: Any) -> None:
+    """
+    after_transaction_end: patches still pending when the outermost
+    transaction ends were rolled back (or closed) with their rows.
+    """
+    if transaction.parent is None:
+        sync_session.info.pop(_PENDING_KEY, None)
+
+
+# Shared by every InMemoryVectorStore in the process
+_default_cache = UserIndexCache(
+    max_bytes=settings.vector_memory_max_bytes,
+    ttl_seconds=settings.vector_memory_ttl_seconds,
+)
+
+
+class InMemoryVectorStore(VectorStore):
+    """
+    VectorStore that answers searches from per-user NumPy matrices.
+
+    A user's embeddings are loaded on first search and kept in a process-wide
+    byte-bounded LRU; each query is one matrix-vector product over the
+    filtered rows, so recall is exact regardless of filters. Writes go to
+    Postgres and update the cached matrix in place once the session commits
+    (a rolled back write never reaches the cache). Other processes' writes
+    (e.g. ingestion workers) become visible after VECTOR_MEMORY_TTL_SECONDS.
+    Users are cached under str(user_id).
+    """
+
+    def __init__(self, *args: Any, cache: Optional[UserIndexCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache or _default_cache
+
+    def _after_commit(
+        self, session: AsyncSession, user_id: Any, patch: Callable[[], None]
+    ) -> None:
+        """Run a cache patch for user_id once the session's transaction commits."""
+        sync_session = session.sync_session
+        if not event.contains(sync_session, "after_commit", _apply_pending):
+            event.listen(sync_session, "after_commit", _apply_pending)
+            event.listen(sync_session, "after_transaction_end", _drop_pending)
+        pending = sync_session.info.setdefault(_PENDING_KEY, [])
+        pending.append((self.cache, str(user_id), patch))
+
+    async def _load(self, session: AsyncSession, user_id: str) -> UserIndex:
+        """Cached index for a user, reading it from Postgres on a miss."""
+        user_id = str(user_id)
+        entry = self.cache.get(user_id)
+        if entry is not None:
+            return entry
+        async with self.cache.lock(user_id):
+            entry = self.cache.get(user_id)
+            if entry is not None:
+                return entry
+            emb = Embedding
+            stmt = select(
+                emb.id,
+                emb.object_type,
+                emb.embedding_model,
+                emb.object_id,
+                emb.chunk_index,
+                emb.meta,
+                emb.source,
+                emb.occurred_at,
+                emb.embedding,
+            ).where(emb.user_id == user_id)
+            rows = (await session.execute(stmt)).all()
+            entry = UserIndex.from_rows(rows, self.embedding_dim)
+            self.cache.put(user_id, entry)
+            logger.debug(
+                "Loaded in-memory vector index",
+                extra={"user_id": user_id, "rows": entry.size, "bytes": entry.nbytes},
+            )
+            return entry
+
+    def _search_index(self, index: UserIndex, query: VectorQuery) -> VectorSearchResult:
+        """Exact Stage A over the filtered rows, then the shared Stage B rerank."""
+        alpha, tau_days = self._get_ranking_params(query.query_text)
+        candidates = np.flatnonzero(index.filter_mask(query))
+
+        # Same candidate pool as the SQL path: nearest rerank_candidates_topn
+        distances = 1.0 - index.matrix[candidates] @ _normalize(query.query_embedding)
+        limit = settings.rerank_candidates_topn
+        if candidates.size > limit:
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[nearest], distances[nearest]
+        distances = distances.astype(np.float64)
+
+        # Future-dated rows count as brand new; missing occurred_at is neutral
+        age_days = np.maximum(
+            (time.time() - index.occurred_at[candidates]) / 86400.0, 0.0
+        )
+        recency = np.exp(-age_days / tau_days)
+        recency[np.isnan(recency)] = 0.5
+
+        order, similarity, final = hybrid_rerank(
+            distances, recency, alpha=alpha, top_k=query.top_k
+        )
+        records = []
+        for i in order.tolist():
+            pos = int(candidates[i])
+            records.append(
+                VectorRecord(
+                    id=index.ids[pos],
+                    object_type=str(index.object_types[pos]),
+                    object_id=index.object_ids[pos],
+                    chunk_index=index.chunk_indexes[pos],
+                    score=float(distances[i]),
+                    metadata=index.metadata[pos],
+                    recency_score=float(recency[i]),
+                    semantic_score=float(similarity[i]),
+                    final_score=float(final[i]),
+                )
+            )
+        plan = SearchPlan(
+            strategy="memory",
+            ef_search=0,
+            iterative_scan="off",
+            attempts=1,
+            candidates=int(candidates.size),
+        )
+        return VectorSearchResult(records, plan)
+
+    async def search_many(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        queries: Sequence[VectorQuery],
+    ) -> List[VectorSearchResult]:
+        """Resolve queries from the user's in-memory index (one load on a miss)."""
+        if not queries:
+            return []
+        index = await self._load(session, user_id)
+        return [self._search_index(index, query) for query in queries]
+
+    async def store_embedding(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        object_type: str,
+        object_id: str,
+        chunk_index: int,
+        embedding: Sequence[float],
+        embedding_model: str,
+        content_hash: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        occurred_at: Optional[datetime] = None,
+        source: Optional[str] = None,
+    ) -> Any:
+        """Upsert in Postgres; the user's cached matrix is patched on commit."""
+        emb_id = await super().store_embedding(
+            session,
+            user_id=user_id,
+            object_type=object_type,
+            object_id=object_id,
+            chunk_index=chunk_index,
+            embedding=embedding,
+            embedding_model=embedding_model,
+            content_hash=content_hash,
+            metadata=metadata,
+            occurred_at=occurred_at,
+            source=source,
+        )
+
+        def patch() -> None:
+            index = self.cache.get(str(user_id))
+            if index is not None:
+                index.upsert(
+                    emb_id,
+                    embedding=embedding,
+                    object_type=object_type,
+                    embedding_model=embedding_model,
+                    object_id=object_id,
+                    chunk_index=chunk_index,
+                    metadata=metadata or {},
+                    source=source,
+                    occurred_at=occurred_at,
+                )
+                self.cache.evict()
+
+        self._after_commit(session, user_id, patch)
+        return emb_id
+
+    async def store_embeddings_bulk(
+        self, session: AsyncSession, rows: Sequence[EmbeddingWrite]
+    ) -> List[EmbeddingWriteResult]:
+        """Bulk upsert in Postgres; cached users' matrices are patched on commit."""
+        results = await super().store_embeddings_bulk(session, rows)
+        writes: Dict[str, List[Any]] = {}
+        for row, result in zip(rows, results):
+            writes.setdefault(str(row.user_id), []).append((row, result.id))
+
+        def patch(user_id: str, user_writes: List[Any]) -> None:
+            index = self.cache.get(user_id)
+            if index is None:
+                return
+            for row, emb_id in user_writes:
+                index.upsert(
+                    emb_id,
+                    embedding=row.embedding,
+                    object_type=row.object_type,
+                    embedding_model=row.embedding_model,
+                    object_id=row.object_id,
+                    chunk_index=row.chunk_index,
+                    metadata=row.metadata or {},
+                    source=row.source,
+                    occurred_at=row.occurred_at,
+                )
+            self.cache.evict()
+
+        for user_id, user_writes in writes.items():
+            self._after_commit(
+                session, user_id, functools.partial(patch, user_id, user_writes)
+            )
+        return results
+
+    async def delete_by_object(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        object_type: str,
+        object_id: str,
+    ) -> int:
+        """Delete in Postgres; the object's cached rows are dropped on commit."""
+        deleted = await super().delete_by_object(
+            session, user_id=user_id, object_type=object_type, object_id=object_id
+        )
+
+        def patch() -> None:
+            index = self.cache.get(str(user_id))
+            if index is not None:
+                keep = np.fromiter(
+                    (
+                        not (otype == object_type and str(oid) == str(object_id))
+                        for otype, oid in zip(index.object_types, index.object_ids)
+                    ),
+                    dtype=bool,
+                    count=index.size,
+                )
+                index.remove(keep)
+
+        self._after_commit(session, user_id, patch)
+        return deleted
+
+    async def delete_by_user_time_range(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        time_end: datetime,
+        object_types: Optional[List[str]] = None,
+    ) -> int:
+        """Retention delete; the user's index is reloaded after the commit."""
+        deleted = await super().delete_by_user_time_range(
+            session, user_id=user_id, time_end=time_end, object_types=object_types
+        )
+        self._after_commit(
+            session, user_id, functools.partial(self.cache.invalidate, str(user_id))
+        )
+        return deleted
+
+    async def delete_model_rows(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        embedding_model: str,
+        limit: int,
+    ) -> int:
+        """Batched model delete; the user's index is reloaded after the commit."""
+        deleted = await super().delete_model_rows(
+            session, user_id=user_id, embedding_model=embedding_model, limit=limit
+        )
+        if deleted:
+            self._after_commit(
+                session,
+                user_id,
+                functools.partial(self.cache.invalidate, str(user_id)),
+            )
+        return deleted
+
+
+__all__ = ["InMemoryVectorStore", "UserIndex", "UserIndexCache"]
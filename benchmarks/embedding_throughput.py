@@ -0,0 +1,108 @@
+"""
+Throughput benchmark for EmbeddingService.embed_text.
+
+Generates seeded synthetic message texts, embeds them in batches through
+EmbeddingService (no cache) and reports texts/s, estimated tokens/s and
+per-batch p50/p95 latency. The default local-hash-v1 model runs in-process,
+so the benchmark needs no network or API key.
+
+Usage:
+    python -m benchmarks.embedding_throughput
+    python -m benchmarks.embedding_throughput --model text-embedding-3-small
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.services.chunking import estimate_tokens
+from app.services.embedding import EmbeddingService
+
+_VOCABULARY = (
+    "deploy review budget meeting invoice launch customer contract roadmap "
+    "incident migration release hiring design report travel schedule vendor "
+    "quarter metrics feedback security onboarding outage pricing proposal"
+).split()
+
+
+@dataclass
+class EmbeddingReport:
+    model: str
+    texts: int
+    batch_size: int
+    texts_per_second: float
+    tokens_per_second: float
+    p50_batch_ms: float
+    p95_batch_ms: float
+
+
+def generate_texts(count: int, *, words: int = 40, seed: int = 7) -> List[str]:
+    """Seeded message-like texts of roughly words words each."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        picks = rng.choice(_VOCABULARY, size=max(int(rng.poisson(words)), 1))
+        sentences = [" ".join(part) for part in np.array_split(picks, 4) if part.size]
+        texts.append(". ".join(sentences).capitalize() + ".")
+    return texts
+
+
+async def run_embedding_benchmark(
+    texts: Sequence[str], *, model: str, batch_size: int
+) -> EmbeddingReport:
+    """Embed texts in batches of batch_size and time each batch."""
+    service = EmbeddingService(model=model)
+    service.cache = None  # Measure the provider, not Redis
+    latencies = []
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        batch_started = time.perf_counter()
+        await service.embed_text(texts[start : start + batch_size])
+        latencies.append((time.perf_counter() - batch_started) * 1000)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    tokens = sum(estimate_tokens(text) for text in texts)
+    return EmbeddingReport(
+        model=model,
+        texts=len(texts),
+        batch_size=batch_size,
+        texts_per_second=len(texts) / elapsed,
+        tokens_per_second=tokens / elapsed,
+        p50_batch_ms=float(np.percentile(latencies, 50)),
+        p95_batch_ms=float(np.percentile(latencies, 95)),
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> EmbeddingReport:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default="local-hash-v1")
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=40, help="Mean words per text")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args(argv)
+
+    texts = generate_texts(args.texts, words=args.words, seed=args.seed)
+    report = asyncio.run(
+        run_embedding_benchmark(texts, model=args.model, batch_size=args.batch_size)
+    )
+    if args.json:
+        print(json.dumps(asdict(report), indent=2))
+    else:
+        print(
+            f"{report.model}: {report.texts_per_second:,.0f} texts/s, "
+            f"{report.tokens_per_second:,.0f} tokens/s, batch p50 "
+            f"{report.p50_batch_ms:.1f} ms, p95 {report.p95_batch_ms:.1f} ms"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    main()
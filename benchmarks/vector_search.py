@@ -0,0 +1,454 @@
+"""
+Latency and recall benchmark for VectorStore.search.
+
+Generates synthetic per-user corpora, runs a query workload through
+VectorStore.search on one or more backends and reports p50/p95/p99 latency
+and recall@k against a brute-force ground truth (exact filtered scan + the
+same hybrid rerank the stores use).
+
+Usage:
+    python -m benchmarks.vector_search --backend memory
+    python -m benchmarks.vector_search --backend pgvector --storage-mode halfvec
+
+The pgvector backend seeds synthetic users into DATABASE_URL and deletes them
+afterwards; the embeddings column is vector(1536), so keep --dim at 1536.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector import (
+    VectorQuery,
+    VectorSearchResult,
+    VectorStore,
+    hybrid_rerank,
+)
+
+SOURCES = ("slack", "telegram", "outlook")
+
+
+@dataclass
+class CorpusConfig:
+    """Shape of the synthetic corpus."""
+
+    users: int = 10
+    events_per_user: int = 2000
+    clusters: int = 20  # Topics per user; rows are noisy copies of a centre
+    dim: int = 1536
+    time_spread_days: float = 90.0
+    noise: float = 0.35  # Row noise relative to the (unit) cluster centre
+    seed: int = 7
+
+
+@dataclass
+class WorkloadConfig:
+    """Shape of the query workload."""
+
+    queries: int = 200
+    top_k: int = 20
+    filtered_fraction: float = 0.3  # Queries with a time window or source filter
+    recency_fraction: float = 0.2  # Queries whose text triggers recency boosting
+    warmup: int = 10
+    seed: int = 11
+
+
+@dataclass
+class SyntheticRow:
+    """One embedding row as the stores see it."""
+
+    id: Any
+    object_type: str
+    object_id: Any
+    chunk_index: int
+    meta: Dict[str, Any]
+    source: str
+    occurred_at: datetime
+    embedding: np.ndarray
+    embedding_model: str = settings.embedding_model
+
+
+@dataclass
+class Corpus:
+    config: CorpusConfig
+    rows: Dict[str, List[SyntheticRow]]  # user_id -> rows
+    centres: Dict[str, np.ndarray]  # user_id -> (clusters, dim)
+    now: datetime
+
+
+@dataclass
+class BenchmarkQuery:
+    user_id: str
+    query: VectorQuery
+
+
+@dataclass
+class BenchmarkReport:
+    backend: str
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    recall_at_k: float
+    strategies: Dict[str, int] = field(default_factory=dict)
+
+
+def _uuid(rng: np.random.Generator) -> uuid.UUID:
+    return uuid.UUID(bytes=rng.bytes(16), version=4)
+
+
+def _unit(rng: np.random.Generator, shape: Sequence[int]) -> np.ndarray:
+    vectors = rng.standard_normal(shape).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def generate_corpus(config: CorpusConfig) -> Corpus:
+    """Clustered unit vectors with uniform occurred_at over the time spread."""
+    rng = np.random.default_rng(config.seed)
+    now = datetime.now(timezone.utc)
+    rows: Dict[str, List[SyntheticRow]] = {}
+    centres: Dict[str, np.ndarray] = {}
+    for _ in range(config.users):
+        user_id = str(_uuid(rng))
+        user_centres = _unit(rng, (config.clusters, config.dim))
+        labels = rng.integers(config.clusters, size=config.events_per_user)
+        noise = rng.standard_normal((config.events_per_user, config.dim)).astype(
+            np.float32
+        ) * (config.noise / np.sqrt(config.dim))
+        vectors = user_centres[labels] + noise
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ages = rng.uniform(0, config.time_spread_days, size=config.events_per_user)
+        sources = rng.integers(len(SOURCES), size=config.events_per_user)
+        rows[user_id] = [
+            SyntheticRow(
+                id=_uuid(rng),
+                object_type="event",
+                object_id=_uuid(rng),
+                chunk_index=0,
+                meta={"cluster": int(labels[i])},
+                source=SOURCES[sources[i]],
+                occurred_at=now - timedelta(days=float(ages[i])),
+                embedding=vectors[i],
+            )
+            for i in range(config.events_per_user)
+        ]
+        centres[user_id] = user_centres
+    return Corpus(config=config, rows=rows, centres=centres, now=now)
+
+
+def generate_queries(corpus: Corpus, config: WorkloadConfig) -> List[BenchmarkQuery]:
+    """Queries near a random cluster centre of a random user, some filtered."""
+    rng = np.random.default_rng(config.seed)
+    users = sorted(corpus.rows)
+    spread = corpus.config.time_spread_days
+    workload = []
+    for _ in range(config.queries):
+        user_id = users[int(rng.integers(len(users)))]
+        centres = corpus.centres[user_id]
+        vector = centres[int(rng.integers(len(centres)))] + rng.standard_normal(
+            corpus.config.dim
+        ).astype(np.float32) * (0.5 / np.sqrt(corpus.config.dim))
+        query = VectorQuery(
+            query_embedding=(vector / np.linalg.norm(vector)).tolist(),
+            top_k=config.top_k,
+        )
+        if rng.random() < config.filtered_fraction:
+            if rng.random() < 0.5:
+                start = float(rng.uniform(0, spread * 0.9))
+                query.time_start = corpus.now - timedelta(days=start + spread * 0.1)
+                query.time_end = corpus.now - timedelta(days=start)
+            else:
+                query.sources = [SOURCES[int(rng.integers(len(SOURCES)))]]
+        if rng.random() < config.recency_fraction:
+            query.query_text = "latest updates"
+        workload.append(BenchmarkQuery(user_id=user_id, query=query))
+    return workload
+
+
+def ground_truth(
+    store: VectorStore, rows: Sequence[SyntheticRow], query: VectorQuery
+) -> List[Any]:
+    """Exact filtered scan, nearest rerank_candidates_topn, then hybrid rerank."""
+    alpha, tau_days = store._get_ranking_params(query.query_text)
+    eligible = [
+        row
+        for row in rows
+        if (not query.time_start or row.occurred_at >= query.time_start)
+        and (not query.time_end or row.occurred_at <= query.time_end)
+        and (not query.sources or row.source in query.sources)
+    ]
+    if not eligible:
+        return []
+    matrix = np.stack([row.embedding for row in eligible]).astype(np.float64)
+    vector = np.asarray(query.query_embedding, dtype=np.float64)
+    distances = 1.0 - (matrix @ vector) / (
+        np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    )
+    nearest = np.argsort(distances, kind="stable")[: settings.rerank_candidates_topn]
+    now = datetime.now(timezone.utc)
+    ages = np.array(
+        [
+            max((now - eligible[i].occurred_at).total_seconds() / 86400.0, 0.0)
+            for i in nearest
+        ]
+    )
+    order, _, _ = hybrid_rerank(
+        distances[nearest], np.exp(-ages / tau_days), alpha=alpha, top_k=query.top_k
+    )
+    return [eligible[nearest[i]].object_id for i in order]
+
+
+class Backend(Protocol):
+    """A VectorStore plus whatever it needs to answer searches for the corpus."""
+
+    name: str
+
+    async def setup(self, corpus: Corpus) -> None: ...
+
+    async def search(self, user_id: str, query: VectorQuery) -> VectorSearchResult: ...
+
+    async def teardown(self) -> None: ...
+
+
+class MemoryBackend:
+    """InMemoryVectorStore with every user's index preloaded (no database)."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        from app.services.vector_memory import InMemoryVectorStore, UserIndexCache
+
+        self._cache = UserIndexCache(max_bytes=1 << 62, ttl_seconds=float("inf"))
+        self.store = InMemoryVectorStore(cache=self._cache)
+
+    async def setup(self, corpus: Corpus) -> None:
+        from app.services.vector_memory import UserIndex
+
+        for user_id, rows in corpus.rows.items():
+            self._cache.put(user_id, UserIndex.from_rows(rows, corpus.config.dim))
+
+    async def search(self, user_id: str, query: VectorQuery) -> VectorSearchResult:
+        # Every user is cached, so the session is never used
+        results = await self.store.search_many(None, user_id=user_id, queries=[query])
+        return results[0]
+
+    async def teardown(self) -> None:
+        self._cache.clear()
+
+
+class PgvectorBackend:
+    """VectorStore against DATABASE_URL; synthetic users are seeded and removed."""
+
+    name = "pgvector"
+
+    def __init__(self, storage_mode: Optional[str] = None, batch_size: int = 1000):
+        self.store = VectorStore(storage_mode=storage_mode)
+        self.batch_size = batch_size
+        self._user_ids: List[str] = []
+
+    async def setup(self, corpus: Corpus) -> None:
+        from sqlalchemy import insert, text
+
+        from app.db.session import AsyncSessionLocal
+        from app.models import Embedding, User
+
+        async with AsyncSessionLocal() as session:
+            for user_id, rows in corpus.rows.items():
+                session.add(User(id=uuid.UUID(user_id), display_name="benchmark"))
+                await session.flush()
+                self._user_ids.append(user_id)
+                for start in range(0, len(rows), self.batch_size):
+                    await session.execute(
+                        insert(Embedding.__table__),
+                        [
+                            {
+                                "id": row.id,
+                                "user_id": user_id,
+                                "object_type": row.object_type,
+                                "object_id": row.object_id,
+                                "chunk_index": row.chunk_index,
+                                "embedding_model": settings.embedding_model,
+                                "embedding_dim": corpus.config.dim,
+                                "embedding": row.embedding.tolist(),
+                                "content_hash": str(row.object_id),
+                                "metadata": row.meta,
+                                "occurred_at": row.occurred_at,
+                                "source": row.source,
+                            }
+                            for row in rows[start : start + self.batch_size]
+                        ],
+                    )
+            # Fresh planner statistics for the seeded rows (filter index and
+            # HNSW plans); the exact/HNSW choice itself is the bounded count
+            await session.execute(text("ANALYZE embeddings"))
+            await session.commit()
+
+    async def search(self, user_id: str, query: VectorQuery) -> VectorSearchResult:
+        from app.db.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                return await self.store.search(
+                    session,
+                    user_id=user_id,
+                    query_embedding=query.query_embedding,
+                    top_k=query.top_k,
+                    object_types=query.object_types,
+                    time_start=query.time_start,
+                    time_end=query.time_end,
+                    sources=query.sources,
+                    query_text=query.query_text,
+                )
+
+    async def teardown(self) -> None:
+        from sqlalchemy import delete
+
+        from app.db.session import AsyncSessionLocal
+        from app.models import User
+
+        if not self._user_ids:
+            return
+        async with AsyncSessionLocal() as session:
+            # Embeddings go with the users (ON DELETE CASCADE)
+            await session.execute(
+                delete(User).where(User.id.in_([uuid.UUID(u) for u in self._user_ids]))
+            )
+            await session.commit()
+        self._user_ids = []
+
+
+BACKENDS = {"memory": MemoryBackend, "pgvector": PgvectorBackend}
+
+
+async def run_benchmark(
+    backend: Backend,
+    corpus: Corpus,
+    workload: Sequence[BenchmarkQuery],
+    *,
+    warmup: int = 0,
+) -> BenchmarkReport:
+    """Time each search and score it against the brute-force ground truth."""
+    latencies = []
+    recalls = []
+    strategies: Counter = Counter()
+    await backend.setup(corpus)
+    try:
+        for item in workload[:warmup]:
+            await backend.search(item.user_id, item.query)
+        for item in workload:
+            started = time.perf_counter()
+            result = await backend.search(item.user_id, item.query)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            strategies[result.plan.strategy] += 1
+
+            truth = ground_truth(backend.store, corpus.rows[item.user_id], item.query)
+            if truth:
+                found = {str(record.object_id) for record in result}
+                recalls.append(sum(str(oid) in found for oid in truth) / len(truth))
+    finally:
+        await backend.teardown()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0, 0, 0)
+    return BenchmarkReport(
+        backend=backend.name,
+        queries=len(latencies),
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        mean_ms=float(np.mean(latencies)) if latencies else 0.0,
+        recall_at_k=float(np.mean(recalls)) if recalls else 1.0,
+        strategies=dict(strategies),
+    )
+
+
+def format_reports(reports: Sequence[BenchmarkReport], top_k: int) -> str:
+    header = (
+        f"{'backend':<12}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{f'recall@{top_k}':>12}  strategies"
+    )
+    lines = [header, "-" * len(header)]
+    for r in reports:
+        lines.append(
+            f"{r.backend:<12}{r.queries:>8}{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}"
+            f"{r.p99_ms:>10.2f}{r.recall_at_k:>12.4f}  {r.strategies}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> List[BenchmarkReport]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backend", action="append", choices=sorted(BACKENDS), default=None
+    )
+    parser.add_argument("--storage-mode", default=None, help="pgvector index mode")
+    parser.add_argument("--users", type=int, default=CorpusConfig.users)
+    parser.add_argument(
+        "--events-per-user", type=int, default=CorpusConfig.events_per_user
+    )
+    parser.add_argument("--clusters", type=int, default=CorpusConfig.clusters)
+    parser.add_argument("--dim", type=int, default=CorpusConfig.dim)
+    parser.add_argument(
+        "--time-spread-days", type=float, default=CorpusConfig.time_spread_days
+    )
+    parser.add_argument("--queries", type=int, default=WorkloadConfig.queries)
+    parser.add_argument("--top-k", type=int, default=WorkloadConfig.top_k)
+    parser.add_argument(
+        "--filtered-fraction", type=float, default=WorkloadConfig.filtered_fraction
+    )
+    parser.add_argument("--warmup", type=int, default=WorkloadConfig.warmup)
+    parser.add_argument("--seed", type=int, default=CorpusConfig.seed)
+    parser.add_argument("--json", action="store_true", help="Print JSON reports")
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(
+        CorpusConfig(
+            users=args.users,
+            events_per_user=args.events_per_user,
+            clusters=args.clusters,
+            dim=args.dim,
+            time_spread_days=args.time_spread_days,
+            seed=args.seed,
+        )
+    )
+    workload = generate_queries(
+        corpus,
+        WorkloadConfig(
+            queries=args.queries,
+            top_k=args.top_k,
+            filtered_fraction=args.filtered_fraction,
+            seed=args.seed + 1,
+        ),
+    )
+
+    reports = []
+    for name in args.backend or ["memory"]:
+        backend = (
+            PgvectorBackend(storage_mode=args.storage_mode)
+            if name == "pgvector"
+            else BACKENDS[name]()
+        )
+        reports.append(
+            asyncio.run(run_benchmark(backend, corpus, workload, warmup=args.warmup))
+        )
+
+    if args.json:
+        print(json.dumps([asdict(r) for r in reports], indent=2))
+    else:
+        print(format_reports(reports, args.top_k))
+    return reports
+
+
+if __name__ == "__main__":
+    main()
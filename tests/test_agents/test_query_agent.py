@@ -23,6 +23,7 @@ class TestQueryAgent:
         """Create a mock vector store."""
         store = MagicMock()
         store.search = AsyncMock(return_value=[])
+        store.read_model = AsyncMock(return_value="text-embedding-ada-002")
         store.store_embedding = AsyncMock()
         return store
 
@@ -31,6 +32,7 @@ class TestQueryAgent:
         """Create a mock embedding service."""
         service = MagicMock()
         service.embed_text = AsyncMock(return_value=[[0.1] * 1536])
+        service.model_for = lambda object_type, model=None: model
         service.embed_and_store = AsyncMock(return_value=1)
         return service
 
@@ -45,7 +47,11 @@ class TestQueryAgent:
             "app.jobs.ingestion.ingest_events_for_user",
             new_callable=AsyncMock,
         ) as mock_ingest:
-            mock_ingest.return_value = 5
+            mock_ingest.return_value = {
+                "events": 5,
+                "connectors": {},
+                "embedding_items": [],
+            }
 
             agent = QueryAgent(
                 vector_store=mock_vector_store,
@@ -173,3 +179,179 @@ class TestQueryAgentBackgroundJob:
 
                 mock_agent.build_context_bank.assert_called_once()
                 assert result["events_processed"] == 10
+
+    @pytest.mark.asyncio
+    async def test_background_job_queues_embeddings_after_commit(self):
+        """Staged embedding items are pushed only once the events commit."""
+        calls = []
+        with patch("app.jobs.query_agent.AsyncSessionLocal") as mock_session_local:
+            mock_session = MagicMock()
+            mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+            mock_session.__aexit__ = AsyncMock(return_value=None)
+            mock_session.commit = AsyncMock(side_effect=lambda: calls.append("commit"))
+            mock_session_local.return_value = mock_session
+
+            with patch(
+                "app.jobs.query_agent.QueryAgent"
+            ) as mock_query_agent_class, patch(
+                "app.jobs.query_agent.push_embedding_items",
+                side_effect=lambda items: calls.append(("push", items)),
+            ):
+                mock_agent = MagicMock()
+                mock_agent.build_context_bank = AsyncMock(
+                    return_value={"events_processed": 1, "embedding_items": ["i1"]}
+                )
+                mock_query_agent_class.return_value = mock_agent
+
+                from app.jobs.query_agent import run_query_agent_context_bank
+
+                result = await run_query_agent_context_bank("test-user-id")
+
+        assert calls == ["commit", ("push", ["i1"])]
+        assert "embedding_items" not in result
+
+    @staticmethod
+    def _session_factory(execute):
+        """Session factory whose sessions share one execute mock."""
+
+        def factory():
+            session = MagicMock()
+            session.__aenter__ = AsyncMock(return_value=session)
+            session.__aexit__ = AsyncMock(return_value=None)
+            session.execute = execute
+            session.commit = AsyncMock()
+            return session
+
+        return factory
+
+    @pytest.mark.asyncio
+    async def test_fleet_refresh_enqueues_shards_of_due_users(self, monkeypatch):
+        """Due users are split into shard jobs on the fleet queue."""
+        from app.core.config import settings
+        from app.jobs.query_agent import (
+            run_query_agent_for_all_users,
+            run_query_agent_shard,
+        )
+
+        monkeypatch.setattr(settings, "fleet_shard_size", 2)
+        result = MagicMock()
+        result.fetchall.return_value = [(f"u{i}",) for i in range(5)]
+        execute = AsyncMock(return_value=result)
+        queue = MagicMock()
+
+        stats = await run_query_agent_for_all_users(
+            queue=queue, session_factory=self._session_factory(execute)
+        )
+
+        query = str(execute.await_args.args[0])
+        assert "LEFT OUTER JOIN context_bank_runs" in query
+        assert stats == {"users_due": 5, "shards": 3}
+        shards = [call.args for call in queue.enqueue.call_args_list]
+        assert [args[0] for args in shards] == [run_query_agent_shard] * 3
+        assert [args[1] for args in shards] == [["u0", "u1"], ["u2", "u3"], ["u4"]]
+        job_ids = {call.kwargs["job_id"] for call in queue.enqueue.call_args_list}
+        assert len(job_ids) == 3
+
+    @pytest.mark.asyncio
+    async def test_shard_refreshes_claimed_users_with_bounded_concurrency(
+        self, monkeypatch
+    ):
+        """Claimed users refresh concurrently up to the limit; others skip."""
+        import asyncio
+
+        from app.core.config import settings
+        from app.jobs import query_agent
+
+        monkeypatch.setattr(settings, "fleet_user_concurrency", 2)
+        monkeypatch.setattr(settings, "fleet_start_jitter_seconds", 0)
+        finished = []
+
+        async def fake_execute(stmt):
+            sql = str(stmt)
+            params = stmt.compile().params
+            result = MagicMock()
+            if sql.startswith("INSERT INTO context_bank_runs"):
+                # u3 was refreshed by an earlier, interrupted run
+                claimed = params["user_id"] != "u3"
+                result.scalar_one_or_none.return_value = (
+                    params["user_id"] if claimed else None
+                )
+            else:
+                finished.append((params["user_id_1"], params["last_status"]))
+            return result
+
+        in_flight, peak = 0, 0
+
+        async def fake_refresh(user_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if user_id == "u2":
+                raise RuntimeError("slack down")
+            return {"events_processed": 1}
+
+        monkeypatch.setattr(
+            query_agent,
+            "run_query_agent_context_bank",
+            AsyncMock(side_effect=fake_refresh),
+        )
+        results = await query_agent.run_query_agent_shard(
+            ["u0", "u1", "u2", "u3", "u4"],
+            session_factory=self._session_factory(AsyncMock(side_effect=fake_execute)),
+        )
+
+        assert peak == 2
+        assert results["u0"] == {"status": "success", "events_processed": 1}
+        assert results["u2"]["status"] == "error"
+        assert results["u3"] == {"status": "skipped"}
+        assert sorted(finished) == [
+            ("u0", "success"),
+            ("u1", "success"),
+            ("u2", "error"),
+            ("u4", "success"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_consecutive_scheduled_runs_refresh_every_user(self, monkeypatch):
+        """Users refreshed late in one hourly run are due at the next tick."""
+        from app.core.config import settings
+        from app.jobs.query_agent import run_query_agent_for_all_users
+
+        monkeypatch.setattr(settings, "fleet_refresh_interval_seconds", 3600)
+        monkeypatch.setattr(settings, "fleet_schedule_slack_seconds", 120)
+        finished_at = {"u0": None, "u1": None}
+
+        async def fake_execute(stmt):
+            cutoff = stmt.compile().params["last_finished_at_1"]
+            result = MagicMock()
+            result.fetchall.return_value = [
+                (user_id,)
+                for user_id, finished in finished_at.items()
+                if finished is None or finished < cutoff
+            ]
+            return result
+
+        factory = self._session_factory(AsyncMock(side_effect=fake_execute))
+
+        async def tick(now):
+            queue = MagicMock()
+            stats = await run_query_agent_for_all_users(
+                queue=queue, session_factory=factory, now=now
+            )
+            return stats["users_due"], queue
+
+        first = datetime(2026, 1, 1, 0, 0, 5, tzinfo=timezone.utc)
+        assert (await tick(first))[0] == 2
+        finished_at["u0"] = first + timedelta(minutes=2)
+        finished_at["u1"] = first + timedelta(minutes=40)
+
+        # A re-run within the same window skips users already refreshed in it
+        assert (await tick(first + timedelta(minutes=30)))[0] == 0
+
+        # The next tick, even slightly early, refreshes everyone again
+        due, queue = await tick(datetime(2026, 1, 1, 0, 59, 58, tzinfo=timezone.utc))
+        assert due == 2
+        window_start = queue.enqueue.call_args.args[2]
+        assert window_start == datetime(2026, 1, 1, 1, tzinfo=timezone.utc)
@@ -13,7 +13,10 @@ async def test_summarize_agent(monkeypatch, dummy_session, dummy_vector_results)
     """Test SummarizeAgent with new time_start/time_end signature."""
     agent = SummarizeAgent()
 
-    async def fake_embed(texts):
+    async def fake_read_model(session, user_id, default):
+        return default
+
+    async def fake_embed(texts, model=None):
         return [[0.1, 0.2]]
 
     async def fake_search(
@@ -26,6 +29,7 @@ async def test_summarize_agent(monkeypatch, dummy_session, dummy_vector_results)
         time_end,
         sources,
         query_text=None,
+        embedding_model=None,
     ):
         return dummy_vector_results
 
@@ -33,6 +37,7 @@ async def test_summarize_agent(monkeypatch, dummy_session, dummy_vector_results)
         return {"overview": "ok", "key_events": [], "themes": []}
 
     monkeypatch.setattr(agent.embedding_service, "embed_text", fake_embed)
+    monkeypatch.setattr(agent.vector_store, "read_model", fake_read_model)
     monkeypatch.setattr(agent.vector_store, "search", fake_search)
     monkeypatch.setattr(agent, "complete_json", fake_complete)
 
@@ -55,7 +60,10 @@ async def test_task_agent(monkeypatch, dummy_session, dummy_vector_results):
     """Test TaskAgent with new time_start/time_end signature."""
     agent = TaskAgent()
 
-    async def fake_embed(texts):
+    async def fake_read_model(session, user_id, default):
+        return default
+
+    async def fake_embed(texts, model=None):
         return [[0.1, 0.2]]
 
     async def fake_search(
@@ -68,6 +76,7 @@ async def test_task_agent(monkeypatch, dummy_session, dummy_vector_results):
         time_end,
         sources,
         query_text=None,
+        embedding_model=None,
     ):
         return dummy_vector_results
 
@@ -75,6 +84,7 @@ async def test_task_agent(monkeypatch, dummy_session, dummy_vector_results):
         return {"tasks": [{"title": "Do it", "priority": "high", "details": "X"}]}
 
     monkeypatch.setattr(agent.embedding_service, "embed_text", fake_embed)
+    monkeypatch.setattr(agent.vector_store, "read_model", fake_read_model)
     monkeypatch.setattr(agent.vector_store, "search", fake_search)
     monkeypatch.setattr(agent, "complete_json", fake_complete)
 
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.embedding_throughput import generate_texts, run_embedding_benchmark
+
+
+@pytest.mark.asyncio
+async def test_local_embedding_benchmark_runs_offline():
+    texts = generate_texts(50, words=20)
+    assert texts == generate_texts(50, words=20)
+
+    report = await run_embedding_benchmark(texts, model="local-hash-v1", batch_size=16)
+
+    assert report.texts == 50
+    assert report.texts_per_second > 0
+    assert report.p95_batch_ms >= report.p50_batch_ms
@@ -0,0 +1,39 @@
+import pytest
+
+from benchmarks.vector_search import (
+    CorpusConfig,
+    MemoryBackend,
+    WorkloadConfig,
+    generate_corpus,
+    generate_queries,
+    run_benchmark,
+)
+
+
+def test_generate_corpus_is_reproducible():
+    config = CorpusConfig(users=2, events_per_user=30, clusters=3, dim=8)
+    first, second = generate_corpus(config), generate_corpus(config)
+
+    assert sorted(first.rows) == sorted(second.rows)
+    user_id = next(iter(first.rows))
+    assert len(first.rows[user_id]) == 30
+    assert [r.object_id for r in first.rows[user_id]] == [
+        r.object_id for r in second.rows[user_id]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_matches_brute_force():
+    corpus = generate_corpus(
+        CorpusConfig(users=2, events_per_user=200, clusters=4, dim=16)
+    )
+    workload = generate_queries(
+        corpus, WorkloadConfig(queries=20, top_k=5, filtered_fraction=0.5)
+    )
+
+    report = await run_benchmark(MemoryBackend(), corpus, workload, warmup=2)
+
+    assert report.queries == 20
+    assert report.recall_at_k == pytest.approx(1.0)
+    assert report.strategies == {"memory": 20}
+    assert 0 <= report.p50_ms <= report.p95_ms <= report.p99_ms
@@ -1,9 +1,14 @@
 """Tests for embedding job."""
 
+import json
+from datetime import timedelta
+
 import pytest
 from unittest.mock import Mock, AsyncMock
 from uuid import uuid4
 
+from app.core.config import settings
+
 
 @pytest.mark.asyncio
 async def test_embed_objects_empty_list():
@@ -42,3 +47,295 @@ async def test_embed_objects_success():
     await embed_objects(mock_db, objects, mock_service)
 
     mock_service.embed_and_store.assert_called_once_with(mock_db, objects)
+
+
+class FakeRedis:
+    """In-memory stand-in for the sync Redis commands the embedding queue uses."""
+
+    def __init__(self):
+        self.values, self.lists = {}, {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def expire(self, key, seconds):
+        return key in self.values
+
+    def eval(self, script, numkeys, key, token, *args):
+        # Compare-and-expire / compare-and-delete lock scripts
+        if self.values.get(key) != token.encode():
+            return 0
+        if "del" in script:
+            self.delete(key)
+        return 1
+
+    def hincrby(self, key, field, amount):
+        counts = self.lists.setdefault(key, {})
+        counts[field] = counts.get(field, 0) + amount
+        return counts[field]
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.lists.get(key, {}).pop(field, None)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def lpush(self, key, *items):
+        self.lists.setdefault(key, [])[:0] = [
+            i.encode() if isinstance(i, str) else i for i in reversed(items)
+        ]
+
+    def rpoplpush(self, src, dst):
+        items = self.lists.get(src)
+        if not items:
+            return None
+        item = items.pop()
+        self.lists.setdefault(dst, []).insert(0, item)
+        return item
+
+    def lrem(self, key, count, item):
+        self.lists[key].remove(item)
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def pipeline(self, transaction=True):
+        redis, calls = self, []
+
+        class Pipe:
+            def __getattr__(self, name):
+                return lambda *a, **kw: calls.append((name, a, kw))
+
+            def execute(self):
+                return [getattr(redis, n)(*a, **kw) for n, a, kw in calls]
+
+        return Pipe()
+
+
+@pytest.mark.asyncio
+async def test_embedding_queue_enqueue_and_drain_across_users():
+    from contextlib import asynccontextmanager
+    from datetime import datetime, timezone
+
+    from app.jobs.embedding import (
+        PENDING_KEY,
+        PROCESSING_KEY,
+        drain_embedding_queue,
+        enqueue_embedding_objects,
+    )
+    from app.services.embedding import EmbeddingObject
+
+    redis = FakeRedis()
+    queue = Mock()
+    occurred = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    for user in ("u1", "u2"):
+        enqueue_embedding_objects(
+            [
+                EmbeddingObject(
+                    user_id=user,
+                    object_type="event",
+                    object_id=f"{user}-evt",
+                    text=f"hello from {user}",
+                    occurred_at=occurred,
+                    source="slack",
+                ),
+                EmbeddingObject(
+                    user_id=user, object_type="event", object_id="x", text="  "
+                ),
+            ],
+            redis=redis,
+            queue=queue,
+        )
+    # One drain job for both users' work
+    queue.enqueue.assert_called_once_with(drain_embedding_queue)
+    assert redis.llen(PENDING_KEY) == 2
+
+    session = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    service = Mock()
+    service.embed_and_store = AsyncMock(side_effect=lambda s, objs: len(objs))
+    stats = await drain_embedding_queue(
+        redis=redis, embedding_service=service, session_factory=session_factory
+    )
+
+    (_, objects), _ = service.embed_and_store.await_args
+    assert [(o.user_id, o.text, o.source) for o in objects] == [
+        ("u1", "hello from u1", "slack"),
+        ("u2", "hello from u2", "slack"),
+    ]
+    assert objects[0].occurred_at == occurred
+    assert stats == {
+        "batches": 1,
+        "objects": 2,
+        "stored": 2,
+        "missing_text": 0,
+        "retried": 0,
+        "dead_lettered": 0,
+    }
+    session.commit.assert_awaited_once()
+    assert redis.llen(PENDING_KEY) == 0 and redis.llen(PROCESSING_KEY) == 0
+    assert "embedding:drain:lock" not in redis.values  # Released by its owner
+
+
+@pytest.mark.asyncio
+async def test_drainer_that_lost_its_lease_leaves_the_new_lock_alone(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from app.jobs.embedding import (
+        LOCK_KEY,
+        PENDING_KEY,
+        drain_embedding_queue,
+        enqueue_embedding_objects,
+    )
+    from app.services.embedding import EmbeddingObject
+
+    redis = FakeRedis()
+    enqueue_embedding_objects(
+        [
+            EmbeddingObject(user_id="u1", object_type="event", object_id=o, text=o)
+            for o in ("a", "b")
+        ],
+        redis=redis,
+        queue=Mock(),
+    )
+
+    @asynccontextmanager
+    async def session_factory():
+        yield AsyncMock()
+
+    async def slow_store(session, objects):
+        # The lease runs out mid-batch and another drainer takes the lock
+        redis.values[LOCK_KEY] = b"other-drainer"
+        return len(objects)
+
+    service = Mock()
+    service.embed_and_store = AsyncMock(side_effect=slow_store)
+    monkeypatch.setattr(settings, "embedding_drain_batch_size", 1)
+    stats = await drain_embedding_queue(
+        redis=redis,
+        embedding_service=service,
+        session_factory=session_factory,
+        queue=Mock(),
+    )
+
+    # Stopped after the batch in flight and kept the successor's lock
+    assert stats["batches"] == 1
+    assert redis.values[LOCK_KEY] == b"other-drainer"
+    assert redis.llen(PENDING_KEY) == 1
+
+
+@pytest.mark.asyncio
+async def test_embedding_queue_redelivers_after_failed_batch():
+    from contextlib import asynccontextmanager
+
+    from app.jobs.embedding import (
+        ATTEMPTS_KEY,
+        PROCESSING_KEY,
+        drain_embedding_queue,
+        enqueue_embedding_objects,
+    )
+    from app.services.embedding import EmbeddingObject
+
+    redis = FakeRedis()
+    enqueue_embedding_objects(
+        [EmbeddingObject(user_id="u1", object_type="event", object_id="e", text="t")],
+        redis=redis,
+        queue=Mock(),
+    )
+
+    @asynccontextmanager
+    async def session_factory():
+        yield AsyncMock()
+
+    failing = Mock()
+    failing.embed_and_store = AsyncMock(side_effect=RuntimeError("provider down"))
+    queue = Mock()
+    stats = await drain_embedding_queue(
+        redis=redis,
+        embedding_service=failing,
+        session_factory=session_factory,
+        queue=queue,
+    )
+    # Unacknowledged work stays on the processing list for a delayed retry
+    assert stats["retried"] == 1
+    assert redis.llen(PROCESSING_KEY) == 1
+    (delay, job), _ = queue.enqueue_in.call_args
+    assert delay == timedelta(seconds=settings.embedding_drain_retry_seconds)
+    assert job is drain_embedding_queue
+
+    service = Mock()
+    service.embed_and_store = AsyncMock(return_value=1)
+    stats = await drain_embedding_queue(
+        redis=redis, embedding_service=service, session_factory=session_factory
+    )
+    assert stats["stored"] == 1
+    assert redis.llen(PROCESSING_KEY) == 0
+    assert redis.lists[ATTEMPTS_KEY] == {}
+
+
+@pytest.mark.asyncio
+async def test_embedding_queue_bisects_and_dead_letters_poison_items(monkeypatch):
+    """One always-failing item is isolated; the rest of its batch is stored."""
+    from contextlib import asynccontextmanager
+
+    from app.jobs.embedding import (
+        DEAD_KEY,
+        PENDING_KEY,
+        PROCESSING_KEY,
+        drain_embedding_queue,
+        enqueue_embedding_objects,
+    )
+    from app.services.embedding import EmbeddingObject
+
+    monkeypatch.setattr(settings, "embedding_drain_max_attempts", 2)
+    redis = FakeRedis()
+    enqueue_embedding_objects(
+        [
+            EmbeddingObject(
+                user_id=f"u{i % 3}", object_type="event", object_id=f"e{i}", text=t
+            )
+            for i, t in enumerate(["a", "b", "bad", "c", "d", "e", "f", "g"])
+        ],
+        redis=redis,
+        queue=Mock(),
+    )
+
+    @asynccontextmanager
+    async def session_factory():
+        yield AsyncMock()
+
+    stored_ids = []
+
+    async def embed_and_store(session, objects):
+        if any(obj.text == "bad" for obj in objects):
+            raise RuntimeError("400 invalid input")
+        stored_ids.extend(obj.object_id for obj in objects)
+        return len(objects)
+
+    service = Mock()
+    service.embed_and_store = AsyncMock(side_effect=embed_and_store)
+    for _ in range(2):
+        redis.values.pop("embedding:drain:scheduled", None)
+        stats = await drain_embedding_queue(
+            redis=redis,
+            embedding_service=service,
+            session_factory=session_factory,
+            queue=Mock(),
+        )
+
+    assert sorted(stored_ids) == ["e0", "e1", "e3", "e4", "e5", "e6", "e7"]
+    # Second failure of the isolated item moves it to the dead-letter list
+    assert stats["dead_lettered"] == 1
+    assert [json.loads(raw)["object_id"] for raw in redis.lists[DEAD_KEY]] == ["e2"]
+    assert redis.llen(PENDING_KEY) == 0 and redis.llen(PROCESSING_KEY) == 0
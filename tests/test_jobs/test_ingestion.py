@@ -1,10 +1,38 @@
 """Tests for ingestion job."""
 
+import asyncio
+
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from uuid import uuid4
 
 
+class FakeFetchSession:
+    """Per-connector fetch session handed out by the session factory."""
+
+    def __init__(self):
+        self.commit = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def paged_connector(provider, *pages):
+    """Connector double whose iter_event_pages yields the given pages."""
+
+    async def iter_event_pages(session, user_id, since):
+        for page in pages:
+            yield page
+
+    connector = Mock()
+    connector.provider = provider
+    connector.iter_event_pages = Mock(side_effect=iter_event_pages)
+    return connector
+
+
 @pytest.mark.asyncio
 async def test_ingest_events_for_user_no_accounts():
     """Test ingestion when user has no linked accounts."""
@@ -43,11 +71,282 @@ async def test_ingest_events_for_user_with_slack():
     mock_result.scalars.return_value.all.return_value = [mock_account]
     mock_db.execute = AsyncMock(return_value=mock_result)
 
+    mock_slack = paged_connector("slack", [])
+
+    fetch_session = FakeFetchSession()
+    with patch("app.jobs.ingestion.slack_connector", mock_slack):
+        result = await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=lambda: fetch_session
+        )
+
+    mock_slack.iter_event_pages.assert_called_once()
+    # Fetches use their own session, committed so token refreshes persist
+    assert mock_slack.iter_event_pages.call_args.kwargs["session"] is fetch_session
+    fetch_session.commit.assert_awaited_once()
+    assert result["events"] == 0
+    assert result["connectors"]["slack"]["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_ingest_events_saves_cursors_with_events():
+    """Advanced sync cursors are upserted in the ingestion transaction."""
+    from sqlalchemy.dialects import postgresql
+
+    from app.jobs.ingestion import ingest_events_for_user
+    from app.models.linked_account import LinkedAccount
+    from app.services.connector import FetchResult
+
+    user_id = uuid4()
+    account = LinkedAccount(
+        id=uuid4(), user_id=user_id, provider="slack", provider_account_id="U1"
+    )
+    accounts_result = Mock()
+    accounts_result.scalars.return_value.all.return_value = [account]
+    statements = []
+
+    async def fake_execute(stmt):
+        statements.append(stmt)
+        return accounts_result
+
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=fake_execute)
+    mock_slack = paged_connector(
+        "slack", FetchResult(account_id=account.id, cursors={"channel:C1": "9.1"})
+    )
+
+    with patch("app.jobs.ingestion.slack_connector", mock_slack):
+        await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=FakeFetchSession
+        )
+
+    cursor_stmt = statements[-1].compile(dialect=postgresql.dialect())
+    assert "INSERT INTO sync_cursors" in str(cursor_stmt)
+    assert "ON CONFLICT ON CONSTRAINT uq_sync_cursors_account_scope" in str(cursor_stmt)
+    assert cursor_stmt.params["cursor_m0"] == "9.1"
+
+
+@pytest.mark.asyncio
+async def test_ingest_events_fetches_connectors_concurrently(monkeypatch):
+    """Fetches overlap; a hung connector times out without blocking the rest."""
+    from app.core.config import settings
+    from app.jobs.ingestion import ingest_events_for_user
+    from app.models.linked_account import LinkedAccount
+
+    monkeypatch.setattr(settings, "ingestion_fetch_timeout_seconds", 0.2)
+    user_id = uuid4()
+    accounts = [
+        LinkedAccount(id=uuid4(), user_id=user_id, provider=provider)
+        for provider in ("slack", "telegram", "outlook")
+    ]
+    accounts_result = Mock()
+    accounts_result.scalars.return_value.all.return_value = accounts
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(return_value=accounts_result)
+
+    in_flight, peak = 0, 0
+
+    def connector(provider, delay):
+        async def iter_event_pages(session, user_id, since):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                in_flight -= 1
+            yield []
+
+        mock = Mock()
+        mock.provider = provider
+        mock.iter_event_pages = iter_event_pages
+        return mock
+
+    with patch("app.jobs.ingestion.slack_connector", connector("slack", 0.05)), patch(
+        "app.jobs.ingestion.telegram_connector", connector("telegram", 0.05)
+    ), patch("app.jobs.ingestion.outlook_connector", connector("outlook", 5)):
+        result = await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=FakeFetchSession
+        )
+
+    assert peak == 3
+    report = result["connectors"]
+    assert report["slack"]["status"] == "ok"
+    assert report["telegram"]["status"] == "ok"
+    assert report["outlook"]["status"] == "timeout"
+    assert report["outlook"]["duration_ms"] < 1000
+    assert all(entry["duration_ms"] > 0 for entry in report.values())
+
+
+@pytest.mark.asyncio
+async def test_ingest_events_inserts_in_multi_row_batches(monkeypatch):
+    """Events go in batched INSERTs; RETURNING maps new ids to their texts."""
+    from app.core.config import settings
+    from app.jobs.ingestion import ingest_events_for_user
+    from app.models.linked_account import LinkedAccount
+
+    monkeypatch.setattr(settings, "ingestion_insert_batch_size", 2)
+    monkeypatch.setattr(settings, "embedding_queue_enabled", True)
+    user_id = uuid4()
+    account = LinkedAccount(id=uuid4(), user_id=user_id, provider="slack")
+    accounts_result = Mock()
+    accounts_result.scalars.return_value.all.return_value = [account]
+    statements = []
+
+    async def fake_execute(stmt):
+        statements.append(stmt)
+        if len(statements) == 1:
+            return accounts_result
+        # m1 already exists; m2 and m3 are new
+        params = stmt.compile().params
+        new_ids = {"m2": "e2", "m3": "e3"}
+        result = Mock()
+        result.all.return_value = [
+            (new_ids[value], "slack", value)
+            for key, value in params.items()
+            if key.startswith("external_id") and value in new_ids
+        ]
+        return result
+
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=fake_execute)
+    events = [
+        {"source": "slack", "external_id": f"m{i}", "_embedding_text": f"text {i}"}
+        for i in (1, 2, 2, 3)
+    ]
+    mock_slack = paged_connector("slack", events)
+    stage = Mock(side_effect=lambda objects: [obj.object_id for obj in objects])
+    monkeypatch.setattr("app.jobs.ingestion.stage_embedding_objects", stage)
+
+    with patch("app.jobs.ingestion.slack_connector", mock_slack):
+        result = await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=FakeFetchSession
+        )
+
+    # Three distinct events in batches of two: two INSERT statements
+    inserts = statements[1:]
+    assert len(inserts) == 2
+    assert all("RETURNING" in str(stmt) for stmt in inserts)
+    assert result["events"] == 2
+    assert result["connectors"]["slack"]["inserted"] == 2
+    # Each insert batch hands its new events to the embed stage
+    assert [
+        [(obj.object_id, obj.text) for obj in call.args[0]]
+        for call in stage.call_args_list
+    ] == [[("e2", "text 2")], [("e3", "text 3")]]
+    # Nothing is queued before the caller commits; it pushes these items
+    assert result["embedding_items"] == ["e2", "e3"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_pipeline_bounds_fetch_lead_over_inserts(monkeypatch):
+    """Bounded queues keep fetching at most a few pages ahead of inserts."""
+    from app.core.config import settings
+    from app.jobs.ingestion import ingest_events_for_user
+    from app.models.linked_account import LinkedAccount
+    from app.services.connector import FetchResult
+
+    monkeypatch.setattr(settings, "ingestion_pipeline_queue_size", 1)
+    monkeypatch.setattr(
+        "app.jobs.ingestion.stage_embedding_objects", Mock(return_value=[])
+    )
+    user_id = uuid4()
+    account = LinkedAccount(id=uuid4(), user_id=user_id, provider="slack")
+    accounts_result = Mock()
+    accounts_result.scalars.return_value.all.return_value = [account]
+    yielded, lead = 0, []
+
+    async def iter_event_pages(session, user_id, since):
+        nonlocal yielded
+        for i in range(20):
+            yielded += 1
+            yield FetchResult(
+                [{"external_id": str(i), "_embedding_text": "hi"}],
+                account_id=account.id,
+            )
+
+    inserts = 0
+
+    async def fake_execute(stmt):
+        nonlocal inserts
+        if "linked_accounts" in str(stmt):
+            return accounts_result
+        inserts += 1
+        lead.append(yielded - inserts)
+        await asyncio.sleep(0)
+        result = Mock()
+        result.all.return_value = [(uuid4(), "slack", str(inserts - 1))]
+        return result
+
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=fake_execute)
+    mock_slack = Mock()
+    mock_slack.provider = "slack"
+    mock_slack.iter_event_pages = iter_event_pages
+
+    with patch("app.jobs.ingestion.slack_connector", mock_slack):
+        result = await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=FakeFetchSession
+        )
+
+    assert result["connectors"]["slack"]["pages"] == 20
+    assert result["events"] == 20
+    # One page in each queue plus one held by each stage, never the backlog
+    assert max(lead) <= 5
+
+
+@pytest.mark.asyncio
+async def test_ingest_keeps_pages_fetched_before_a_timeout(monkeypatch):
+    """A connector that stalls mid-stream keeps the pages it already yielded."""
+    from app.core.config import settings
+    from app.jobs.ingestion import ingest_events_for_user
+    from app.models.linked_account import LinkedAccount
+    from app.services.connector import FetchResult
+
+    monkeypatch.setattr(settings, "ingestion_fetch_timeout_seconds", 0.1)
+    monkeypatch.setattr(
+        "app.jobs.ingestion.stage_embedding_objects", Mock(return_value=[])
+    )
+    user_id = uuid4()
+    account = LinkedAccount(id=uuid4(), user_id=user_id, provider="slack")
+    accounts_result = Mock()
+    accounts_result.scalars.return_value.all.return_value = [account]
+    statements = []
+    closed = []
+
+    async def fake_execute(stmt):
+        statements.append(str(stmt))
+        if len(statements) == 1:
+            return accounts_result
+        result = Mock()
+        result.all.return_value = [(uuid4(), "slack", "1")]
+        return result
+
+    async def iter_event_pages(session, user_id, since):
+        try:
+            yield FetchResult(
+                [{"external_id": "1"}],
+                account_id=account.id,
+                cursors={"channel:C1": "1"},
+            )
+            await asyncio.sleep(5)
+            yield FetchResult([{"external_id": "2"}], account_id=account.id)
+        finally:
+            closed.append(True)
+
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=fake_execute)
     mock_slack = Mock()
     mock_slack.provider = "slack"
-    mock_slack.fetch_events = AsyncMock(return_value=[])
+    mock_slack.iter_event_pages = iter_event_pages
 
     with patch("app.jobs.ingestion.slack_connector", mock_slack):
-        await ingest_events_for_user(mock_db, str(user_id))
+        result = await ingest_events_for_user(
+            mock_db, str(user_id), session_factory=FakeFetchSession
+        )
 
-    mock_slack.fetch_events.assert_called_once()
+    report = result["connectors"]["slack"]
+    assert report["status"] == "timeout"
+    assert report["pages"] == 1 and report["inserted"] == 1
+    assert closed == [True]
+    assert "INSERT INTO events" in statements[1]
+    assert "INSERT INTO sync_cursors" in statements[2]
@@ -0,0 +1,167 @@
+"""Tests for the online re-embedding job."""
+
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.core.config import settings
+from app.jobs import reembedding
+
+
+def _state(**overrides):
+    fields = {
+        "user_id": "u1",
+        "active_model": "old",
+        "target_model": "new",
+        "previous_model": None,
+        "status": "backfilling",
+        "cursor_object_type": None,
+        "cursor_object_id": None,
+        "migrated_count": 0,
+        "completed_at": None,
+    }
+    return SimpleNamespace(**(fields | overrides))
+
+
+def _session_factory(state, commits):
+    class FakeSession:
+        async def get(self, model, user_id):
+            return state
+
+        async def commit(self):
+            commits.append(
+                (state.status, state.cursor_object_type, state.cursor_object_id)
+            )
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    return FakeSession
+
+
+def _ref(object_type, object_id):
+    return SimpleNamespace(
+        object_type=object_type,
+        object_id=object_id,
+        meta={},
+        occurred_at=None,
+        source=None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reembed_user_checkpoints_cuts_over_and_collects(monkeypatch):
+    monkeypatch.setattr(settings, "reembed_batch_size", 2)
+    monkeypatch.setattr(settings, "reembed_batch_interval_seconds", 0)
+    refs = [_ref("note", "n1"), _ref("note", "n2"), _ref("thread", "t1")]
+
+    async def fake_next_batch(session, state, limit):
+        keys = [(ref.object_type, ref.object_id) for ref in refs]
+        start = 0
+        if state.cursor_object_type is not None:
+            start = keys.index((state.cursor_object_type, state.cursor_object_id)) + 1
+        return refs[start : start + limit]
+
+    async def fake_load_texts(session, user_id, batch):
+        # n2 was deleted since it was embedded
+        texts = {("note", "n1"): "first", ("thread", "t1"): "third"}
+        return {
+            (r.object_type, r.object_id): texts[(r.object_type, r.object_id)]
+            for r in batch
+            if (r.object_type, r.object_id) in texts
+        }
+
+    monkeypatch.setattr(reembedding, "_next_batch", fake_next_batch)
+    monkeypatch.setattr(reembedding, "_load_texts", fake_load_texts)
+    monkeypatch.setattr(reembedding, "_count_unmigrated", AsyncMock(return_value=0))
+
+    state = _state()
+    commits = []
+    service = Mock()
+    service.embed_and_store = AsyncMock(side_effect=lambda s, objs, model: len(objs))
+    service.vector_store.delete_by_object = AsyncMock(return_value=1)
+    service.vector_store.delete_model_rows = AsyncMock(return_value=0)
+
+    stats = await reembedding.reembed_user(
+        "u1",
+        embedding_service=service,
+        session_factory=_session_factory(state, commits),
+        queue=Mock(),
+    )
+
+    # One checkpoint per batch, then the cut-over, then collection
+    assert commits == [
+        ("backfilling", "note", "n2"),
+        ("backfilling", "thread", "t1"),
+        ("collecting", None, None),
+        ("idle", None, None),
+    ]
+    assert [
+        [obj.object_id for obj in call.args[1]]
+        for call in service.embed_and_store.await_args_list
+    ] == [["n1"], ["t1"]]
+    assert {
+        call.kwargs["model"] for call in service.embed_and_store.await_args_list
+    } == {"new"}
+    service.vector_store.delete_by_object.assert_awaited_once()
+    service.vector_store.delete_model_rows.assert_awaited_once()
+    collect_kwargs = service.vector_store.delete_model_rows.await_args.kwargs
+    assert collect_kwargs["embedding_model"] == "old"
+    assert state.active_model == "new"
+    assert state.target_model is None and state.previous_model is None
+    assert state.migrated_count == 2
+    assert stats["batches"] == 2 and stats["orphaned"] == 1
+    assert stats["status"] == "idle"
+
+
+@pytest.mark.asyncio
+async def test_reembed_user_waits_on_rows_it_cannot_rebuild(monkeypatch):
+    monkeypatch.setattr(settings, "reembed_batch_interval_seconds", 0)
+    monkeypatch.setattr(reembedding, "_next_batch", AsyncMock(return_value=[]))
+    monkeypatch.setattr(reembedding, "_count_unmigrated", AsyncMock(return_value=3))
+
+    state = _state(cursor_object_type="thread", cursor_object_id="t9")
+    commits = []
+    queue = Mock()
+    stats = await reembedding.reembed_user(
+        "u1",
+        embedding_service=Mock(),
+        session_factory=_session_factory(state, commits),
+        queue=queue,
+    )
+
+    # Searches stay on the old model; the cut-over is re-checked later
+    assert stats["status"] == "waiting"
+    assert state.active_model == "old"
+    assert commits == [("waiting", "thread", "t9")]
+    (delay, job, user_id), kwargs = queue.enqueue_in.call_args
+    assert delay == timedelta(seconds=settings.reembed_recheck_seconds)
+    assert job is reembedding.reembed_user and user_id == "u1"
+    assert kwargs["job_id"].startswith("reembed:u1:")
+
+
+def test_enqueue_reembedding_uses_unique_job_ids_and_dedupes_queued_jobs():
+    queued = set()
+    queue = Mock()
+    queue.connection.set.side_effect = lambda key, value, nx, ex: (
+        key not in queued and not queued.add(key)
+    )
+    queue.connection.delete.side_effect = queued.discard
+
+    assert reembedding.enqueue_reembedding("u1", queue)
+    # Already queued: no second job
+    assert not reembedding.enqueue_reembedding("u1", queue, 5)
+    # The job started and enqueued its continuation
+    queue.connection.delete("reembed:scheduled:u1")
+    assert reembedding.enqueue_reembedding("u1", queue, 5)
+
+    first = queue.enqueue.call_args.kwargs["job_id"]
+    follow_up = queue.enqueue_in.call_args.kwargs["job_id"]
+    assert queue.enqueue.call_count == 1 and queue.enqueue_in.call_count == 1
+    assert first.startswith("reembed:u1:") and follow_up.startswith("reembed:u1:")
+    assert first != follow_up
@@ -0,0 +1,108 @@
+"""Tests for Outlook connector."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+
+DELTA_URL = "https://graph.microsoft.com/v1.0/me/calendarView/delta"
+
+
+async def _fetch(connector, saved_cursors, responses):
+    """Run fetch_events against saved cursors and canned Graph responses."""
+    mock_account = Mock()
+    mock_account.id = uuid4()
+    mock_account_result = Mock()
+    mock_account_result.scalars.return_value.first.return_value = mock_account
+    mock_cursor_result = Mock()
+    mock_cursor_result.all.return_value = [
+        SimpleNamespace(scope=scope, cursor=cursor)
+        for scope, cursor in saved_cursors.items()
+    ]
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[mock_account_result, mock_cursor_result])
+
+    with patch.object(
+        connector, "_ensure_access_token", new_callable=AsyncMock
+    ) as mock_ensure:
+        mock_ensure.return_value = "token"
+        with patch.object(connector._client, "get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [
+                Mock(status_code=status, json=lambda body=body: body)
+                for status, body in responses
+            ]
+            events = await connector.fetch_events(mock_db, "u1")
+    return events, mock_get.await_args_list
+
+
+@pytest.mark.asyncio
+async def test_outlook_replays_delta_link_within_window():
+    """A delta link from a recent window is replayed as is."""
+    from app.services.connector.outlook import OutlookConnector
+
+    opened = datetime.now(timezone.utc) - timedelta(days=1)
+    events, calls = await _fetch(
+        OutlookConnector(),
+        {"calendar": "https://delta/old", "calendar:window": opened.isoformat()},
+        [(200, {"value": [], "@odata.deltaLink": "https://delta/new"})],
+    )
+
+    assert calls[0].args == ("https://delta/old",)
+    assert calls[0].kwargs["params"] is None
+    # The window keeps its original start
+    assert events.cursors == {"calendar": "https://delta/new"}
+
+
+@pytest.mark.asyncio
+async def test_outlook_restarts_delta_when_half_the_window_elapsed():
+    """The next poll after half the window opens a new one around now."""
+    from app.services.connector.outlook import OutlookConnector
+
+    connector = OutlookConnector()
+    opened = datetime.now(timezone.utc) - timedelta(
+        days=connector.CALENDAR_WINDOW_DAYS / 2
+    )
+    events, calls = await _fetch(
+        connector,
+        {"calendar": "https://delta/old", "calendar:window": opened.isoformat()},
+        [(200, {"value": [], "@odata.deltaLink": "https://delta/new"})],
+    )
+
+    assert calls[0].args == (DELTA_URL,)
+    start = datetime.fromisoformat(calls[0].kwargs["params"]["startDateTime"])
+    assert start > opened - timedelta(days=connector.CALENDAR_WINDOW_DAYS)
+    assert events.cursors["calendar"] == "https://delta/new"
+    assert datetime.fromisoformat(events.cursors["calendar:window"]) > opened
+
+
+@pytest.mark.asyncio
+async def test_outlook_clears_expired_delta_link():
+    """A delta link Graph no longer accepts is cleared, not kept forever."""
+    from app.services.connector.outlook import OutlookConnector
+
+    opened = datetime.now(timezone.utc) - timedelta(days=1)
+    events, _ = await _fetch(
+        OutlookConnector(),
+        {"calendar": "https://delta/old", "calendar:window": opened.isoformat()},
+        [(410, {"error": {"code": "syncStateNotFound", "message": "expired"}})],
+    )
+
+    assert list(events) == []
+    assert events.cursors == {"calendar": ""}
+
+
+@pytest.mark.asyncio
+async def test_outlook_keeps_delta_link_on_transient_error():
+    """Throttling and server errors retry the same delta link next poll."""
+    from app.services.connector.outlook import OutlookConnector
+
+    opened = datetime.now(timezone.utc) - timedelta(days=1)
+    events, _ = await _fetch(
+        OutlookConnector(),
+        {"calendar": "https://delta/old", "calendar:window": opened.isoformat()},
+        [(429, {"error": {"code": "TooManyRequests", "message": "slow down"}})],
+    )
+
+    assert events.cursors == {}
@@ -68,7 +68,9 @@ async def test_slack_fetch_events():
 
     mock_account_result = Mock()
     mock_account_result.scalars.return_value.first.return_value = mock_account
-    mock_db.execute = AsyncMock(return_value=mock_account_result)
+    mock_cursor_result = Mock()
+    mock_cursor_result.all.return_value = []
+    mock_db.execute = AsyncMock(side_effect=[mock_account_result, mock_cursor_result])
 
     with patch.object(
         connector, "_ensure_access_token", new_callable=AsyncMock
@@ -89,3 +91,137 @@ async def test_slack_fetch_events():
 
             assert isinstance(events, list)
             assert len(events) >= 0
+            assert events.cursors == {"channel:C1": "1234.5678"}
+
+
+@pytest.mark.asyncio
+async def test_slack_fetch_events_resumes_from_cursor():
+    """Channels with a saved cursor page through only newer messages."""
+    from types import SimpleNamespace
+
+    from app.services.connector.slack import SlackConnector
+
+    connector = SlackConnector()
+    mock_account = Mock()
+    mock_account.id = uuid4()
+    mock_account_result = Mock()
+    mock_account_result.scalars.return_value.first.return_value = mock_account
+    mock_cursor_result = Mock()
+    mock_cursor_result.all.return_value = [
+        SimpleNamespace(scope="channel:C1", cursor="100.0001")
+    ]
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[mock_account_result, mock_cursor_result])
+
+    pages = [
+        {"ok": True, "channels": [{"id": "C1"}]},
+        {
+            "ok": True,
+            "messages": [{"ts": "300.0001", "text": "c"}, {"ts": "200.0001"}],
+            "has_more": True,
+            "response_metadata": {"next_cursor": "page2"},
+        },
+        {"ok": True, "messages": [{"ts": "150.0001", "text": "a"}], "has_more": False},
+    ]
+    with patch.object(
+        connector, "_ensure_access_token", new_callable=AsyncMock
+    ) as mock_ensure:
+        mock_ensure.return_value = "xoxb-token"
+        with patch.object(connector._client, "get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [Mock(json=lambda page=page: page) for page in pages]
+
+            events = await connector.fetch_events(mock_db, str(uuid4()))
+
+    history_params = [call.kwargs["params"] for call in mock_get.await_args_list[1:]]
+    assert [p["oldest"] for p in history_params] == ["100.0001", "100.0001"]
+    assert history_params[1]["cursor"] == "page2"
+    assert [e["external_id"] for e in events] == ["300.0001", "200.0001", "150.0001"]
+    assert events.account_id == mock_account.id
+    assert events.cursors == {"channel:C1": "300.0001"}
+
+
+@pytest.mark.asyncio
+async def test_slack_iter_event_pages_puts_cursor_on_last_page():
+    """Pages stream as fetched; a channel's cursor rides on its last page."""
+    from types import SimpleNamespace
+
+    from app.services.connector.slack import SlackConnector
+
+    connector = SlackConnector()
+    mock_account = Mock()
+    mock_account.id = uuid4()
+    mock_account_result = Mock()
+    mock_account_result.scalars.return_value.first.return_value = mock_account
+    mock_cursor_result = Mock()
+    mock_cursor_result.all.return_value = [
+        SimpleNamespace(scope="channel:C1", cursor="100.0001")
+    ]
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[mock_account_result, mock_cursor_result])
+
+    responses = [
+        {"ok": True, "channels": [{"id": "C1"}]},
+        {
+            "ok": True,
+            "messages": [{"ts": "300.0001"}],
+            "has_more": True,
+            "response_metadata": {"next_cursor": "page2"},
+        },
+        {"ok": True, "messages": [{"ts": "150.0001"}], "has_more": False},
+    ]
+    with patch.object(
+        connector, "_ensure_access_token", new_callable=AsyncMock
+    ) as mock_ensure:
+        mock_ensure.return_value = "xoxb-token"
+        with patch.object(connector._client, "get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [Mock(json=lambda r=r: r) for r in responses]
+            pages = [page async for page in connector.iter_event_pages(mock_db, "u1")]
+
+    assert [[e["external_id"] for e in page] for page in pages] == [
+        ["300.0001"],
+        ["150.0001"],
+    ]
+    assert [page.cursors for page in pages] == [{}, {"channel:C1": "300.0001"}]
+    assert all(page.account_id == mock_account.id for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_slack_fetch_events_keeps_cursor_when_paging_fails():
+    """A failed page mid-pagination must not advance the channel cursor."""
+    from types import SimpleNamespace
+
+    from app.services.connector.slack import SlackConnector
+
+    connector = SlackConnector()
+    mock_account = Mock()
+    mock_account.id = uuid4()
+    mock_account_result = Mock()
+    mock_account_result.scalars.return_value.first.return_value = mock_account
+    mock_cursor_result = Mock()
+    mock_cursor_result.all.return_value = [
+        SimpleNamespace(scope="channel:C1", cursor="100.0001")
+    ]
+    mock_db = AsyncMock()
+    mock_db.execute = AsyncMock(side_effect=[mock_account_result, mock_cursor_result])
+
+    responses = [
+        {"ok": True, "channels": [{"id": "C1"}]},
+        {
+            "ok": True,
+            "messages": [{"ts": "300.0001"}],
+            "has_more": True,
+            "response_metadata": {"next_cursor": "page2"},
+        },
+        {"ok": False, "error": "ratelimited"},
+    ]
+    with patch.object(
+        connector, "_ensure_access_token", new_callable=AsyncMock
+    ) as mock_ensure:
+        mock_ensure.return_value = "xoxb-token"
+        with patch.object(connector._client, "get", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = [Mock(json=lambda r=r: r) for r in responses]
+            events = await connector.fetch_events(mock_db, "u1")
+
+    assert [e["external_id"] for e in events] == ["300.0001"]
+    # The next poll resumes from the old cursor and refetches the gap
+    assert events.cursors == {}
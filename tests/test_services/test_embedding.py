@@ -10,3 +10,301 @@ def test_chunk_text_splits():
 def test_compute_content_hash_deterministic():
     assert compute_content_hash("hello") == compute_content_hash("hello")
     assert compute_content_hash("hello") != compute_content_hash("world")
+
+
+def test_embedding_service_model_and_dimensions_from_settings(monkeypatch):
+    from app.core.config import settings
+    from app.services.embedding import EmbeddingService
+
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-3-small")
+    monkeypatch.setattr(settings, "embedding_dimensions", 1536)
+    service = EmbeddingService()
+    assert service.model == "text-embedding-3-small"
+    assert service.dimensions == 1536
+
+    assert EmbeddingService(model="text-embedding-ada-002").model == (
+        "text-embedding-ada-002"
+    )
+
+
+def test_chunk_text_tokens_packs_sentences_with_overlap(monkeypatch):
+    from app.services import chunking
+
+    monkeypatch.setattr(chunking, "_encoding", lambda model: None)
+    text = "First one here. Second one here! Third one?\nFourth line"
+    # Fast path: within budget by bytes, never tokenized
+    assert chunking.chunk_text_tokens(text, max_tokens=len(text)) == [text]
+
+    # Each sentence is 5-6 estimated tokens; two fit in 12
+    chunks = chunking.chunk_text_tokens(text, max_tokens=12, overlap_tokens=0)
+    assert chunks == ["First one here. Second one here!", "Third one? Fourth line"]
+
+    overlapped = chunking.chunk_text_tokens(text, max_tokens=12, overlap_tokens=6)
+    assert overlapped == [
+        "First one here. Second one here!",
+        "Second one here! Third one?",
+        "Third one? Fourth line",
+    ]
+
+    # A sentence longer than the budget is split on words
+    long_sentence = " ".join(["word"] * 40)
+    pieces = chunking.chunk_text_tokens(long_sentence, max_tokens=10)
+    assert all(chunking.estimate_tokens(p) <= 10 for p in pieces)
+    assert " ".join(pieces) == long_sentence
+
+
+def test_plan_batches_respects_input_and_token_limits():
+    from app.services.embedding import plan_batches
+
+    texts = ["a" * 30, "b" * 30, "c" * 30, "d" * 300, "e"]
+    # 30 bytes ~ 11 tokens; 300 bytes ~ 101 tokens (alone over the budget)
+    assert plan_batches(texts, max_inputs=2, max_tokens=1000) == [[0, 1], [2, 3], [4]]
+    assert plan_batches(texts, max_inputs=10, max_tokens=25) == [
+        [0, 1],
+        [2],
+        [3],
+        [4],
+    ]
+
+
+async def test_embed_and_store_batches_across_objects(monkeypatch):
+    from unittest.mock import AsyncMock
+
+    from app.core.config import settings
+    from app.services.embedding import EmbeddingObject, EmbeddingService
+
+    monkeypatch.setattr(settings, "embedding_batch_max_inputs", 3)
+    monkeypatch.setattr(settings, "embedding_chunk_overlap_tokens", 0)
+    monkeypatch.setattr("app.services.chunking._encoding", lambda model: None)
+    store = AsyncMock()
+    store.existing_content_hashes.return_value = set()
+    store.write_models.side_effect = lambda session, user_ids, default: {
+        str(user_id): [default] for user_id in user_ids
+    }
+    store.store_embeddings_bulk.side_effect = lambda session, rows: [None] * len(rows)
+    service = EmbeddingService(vector_store=store)
+    requests = []
+
+    async def fake_embed(texts, model=None):
+        requests.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(service, "embed_text", fake_embed)
+    objects = [
+        EmbeddingObject(user_id="u1", object_type="event", object_id=f"e{i}", text=t)
+        for i, t in enumerate(["one", "   ", "three", "Aa. Bb. Cc.", "Dd. Eeeee."])
+    ]
+
+    total = await service.embed_and_store(None, objects, chunk_tokens=4)
+
+    # 6 chunks from 4 non-empty objects in 2 requests instead of 4
+    assert requests == [["one", "three", "Aa. Bb."], ["Cc.", "Dd.", "Eeeee."]]
+    assert total == 6
+    store.store_embedding.assert_not_called()
+    (_, rows), _ = store.store_embeddings_bulk.await_args
+    stored = [(r.object_id, r.chunk_index, r.embedding) for r in rows]
+    assert stored == [
+        ("e0", 0, [3.0]),
+        ("e2", 0, [5.0]),
+        ("e3", 0, [7.0]),
+        ("e3", 1, [3.0]),
+        ("e4", 0, [3.0]),
+        ("e4", 1, [6.0]),
+    ]
+
+
+async def test_embed_and_store_skips_unchanged_objects(monkeypatch):
+    from unittest.mock import AsyncMock
+
+    from app.services.embedding import EmbeddingObject, EmbeddingService
+
+    store = AsyncMock()
+    store.existing_content_hashes.return_value = {
+        ("u1", "event", "e0", compute_content_hash("same"))
+    }
+    store.write_models.side_effect = lambda session, user_ids, default: {
+        str(user_id): [default] for user_id in user_ids
+    }
+    store.store_embeddings_bulk.side_effect = lambda session, rows: [None] * len(rows)
+    service = EmbeddingService(model="m", vector_store=store)
+    service.embed_text = AsyncMock(return_value=[[0.5]])
+    objects = [
+        EmbeddingObject(user_id="u1", object_type="event", object_id="e0", text="same"),
+        EmbeddingObject(user_id="u1", object_type="event", object_id="e1", text="new"),
+    ]
+
+    assert await service.embed_and_store(None, objects) == 1
+
+    (_, keys), kwargs = store.existing_content_hashes.await_args
+    assert kwargs == {"embedding_model": "m"}
+    assert [key[2] for key in keys] == ["e0", "e1"]
+    service.embed_text.assert_awaited_once_with(["new"], "m")
+
+    # Nothing changed: no embedding request and no write
+    store.existing_content_hashes.return_value = {
+        ("u1", "event", "e0", compute_content_hash("same")),
+        ("u1", "event", "e1", compute_content_hash("new")),
+    }
+    service.embed_text.reset_mock()
+    store.store_embeddings_bulk.reset_mock()
+    assert await service.embed_and_store(None, objects) == 0
+    service.embed_text.assert_not_awaited()
+    store.store_embeddings_bulk.assert_not_awaited()
+
+
+async def test_embed_and_store_dual_writes_during_model_migration():
+    from unittest.mock import AsyncMock
+
+    from app.services.embedding import EmbeddingObject, EmbeddingService
+
+    store = AsyncMock()
+    store.existing_content_hashes.return_value = set()
+    store.write_models.return_value = {"u1": ["old", "new"], "u2": ["m"]}
+    store.store_embeddings_bulk.side_effect = lambda session, rows: [None] * len(rows)
+    service = EmbeddingService(model="m", vector_store=store)
+    service.embed_text = AsyncMock(return_value=[[0.5]])
+    objects = [
+        EmbeddingObject(user_id="u1", object_type="note", object_id="n1", text="a"),
+        EmbeddingObject(user_id="u2", object_type="note", object_id="n2", text="b"),
+    ]
+
+    assert await service.embed_and_store(None, objects) == 3
+
+    written = [
+        (row.user_id, row.embedding_model)
+        for call in store.store_embeddings_bulk.await_args_list
+        for row in call.args[1]
+    ]
+    assert sorted(written) == [("u1", "new"), ("u1", "old"), ("u2", "m")]
+    assert {call.args[1] for call in service.embed_text.await_args_list} == {
+        "old",
+        "new",
+        "m",
+    }
+
+    # An explicit model (the re-embedding backfill) skips the lookup
+    store.write_models.reset_mock()
+    await service.embed_and_store(None, objects[:1], model="new")
+    store.write_models.assert_not_awaited()
+
+
+class _FakeRedis:
+    """Just enough of redis.asyncio.Redis for EmbeddingCache."""
+
+    def __init__(self, fail=False):
+        self.data, self.hashes, self.expiries, self.fail = {}, {}, {}, fail
+
+    async def mget(self, keys):
+        if self.fail:
+            from redis.exceptions import ConnectionError
+
+            raise ConnectionError("down")
+        return [self.data.get(key) for key in keys]
+
+    async def hgetall(self, key):
+        return {
+            k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()
+        }
+
+    def pipeline(self, transaction=True):
+        redis, ops = self, []
+
+        class Pipe:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def set(self, key, value, ex=None):
+                ops.append(lambda: redis.data.__setitem__(key, value))
+                ops.append(lambda: redis.expiries.__setitem__(key, ex))
+
+            def expire(self, key, seconds):
+                ops.append(lambda: redis.expiries.__setitem__(key, seconds))
+
+            def hincrby(self, key, field, amount):
+                bucket = redis.hashes.setdefault(key, {})
+                ops.append(
+                    lambda: bucket.__setitem__(field, bucket.get(field, 0) + amount)
+                )
+
+            async def execute(self):
+                for op in ops:
+                    op()
+
+        return Pipe()
+
+
+async def test_embed_text_uses_content_addressed_cache():
+    from unittest.mock import AsyncMock
+
+    from app.services.embedding import EmbeddingService
+    from app.services.embedding_cache import EmbeddingCache
+
+    redis = _FakeRedis()
+    cache = EmbeddingCache(redis, ttl_seconds=60)
+    first = EmbeddingService(model="m", vector_store=AsyncMock(), cache=cache)
+    first._request_embeddings = AsyncMock(return_value=[[0.5, 0.25], [1.0, 2.0]])
+
+    assert await first.embed_text(["sig", "hello", "sig"]) == [
+        [0.5, 0.25],
+        [1.0, 2.0],
+        [0.5, 0.25],
+    ]
+    # Duplicates within a call are requested once
+    first._request_embeddings.assert_awaited_once_with(["sig", "hello"], "m")
+
+    # Another service (user, run) shares the cache: no request at all
+    second = EmbeddingService(model="m", vector_store=AsyncMock(), cache=cache)
+    second._request_embeddings = AsyncMock()
+    assert [v.tolist() for v in await second.embed_text(["hello"])] == [[1.0, 2.0]]
+    second._request_embeddings.assert_not_awaited()
+    assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+    assert (await cache.global_stats())["hits"] == 1
+    assert set(redis.expiries.values()) == {60}
+
+    # Different model or dimensions never share entries
+    assert cache.key("m", None, "hello") != cache.key("m", 256, "hello")
+    assert cache.key("m", None, "hello") != cache.key("other", None, "hello")
+
+
+async def test_embedding_cache_outage_is_a_miss():
+    from app.services.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(_FakeRedis(fail=True))
+    assert await cache.get_many("m", None, ["a", "b"]) == [None, None]
+    assert cache.stats()["misses"] == 2
+
+
+async def test_request_embeddings_decodes_base64_into_float32_arrays():
+    import base64
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock, Mock
+
+    import numpy as np
+
+    from app.services.embedding import EmbeddingService, decode_embedding
+
+    vectors = [np.array([0.25, -1.5], dtype="<f4"), np.array([3.0, 0.5], dtype="<f4")]
+    payload = SimpleNamespace(
+        data=[
+            SimpleNamespace(embedding=base64.b64encode(v.tobytes()).decode())
+            for v in vectors
+        ]
+    )
+    raw = SimpleNamespace(headers={}, parse=lambda: payload)
+    service = EmbeddingService(model="m", vector_store=AsyncMock(), cache=None)
+    service.openai.client = Mock()
+    service.openai.client.embeddings.with_raw_response.create = AsyncMock(
+        return_value=raw
+    )
+
+    result = await service._request_embeddings(["a", "b"])
+
+    kwargs = service.openai.client.embeddings.with_raw_response.create.await_args.kwargs
+    assert kwargs["encoding_format"] == "base64"
+    assert all(r.dtype == np.float32 for r in result)
+    assert [r.tolist() for r in result] == [[0.25, -1.5], [3.0, 0.5]]
+    # Providers that ignore encoding_format still yield arrays
+    assert decode_embedding([1.0, 2.0]).dtype == np.float32
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError, RateLimitError
+
+from app.services.embedding_dispatch import EmbeddingDispatcher, parse_reset
+
+
+def _dispatcher(**kwargs):
+    options = dict(
+        max_concurrency=2,
+        max_retries=3,
+        requests_per_minute=6000,
+        tokens_per_minute=1_000_000,
+    )
+    options.update(kwargs)
+    return EmbeddingDispatcher(**options)
+
+
+def _error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls("error", response=response, body=None)
+
+
+def test_parse_reset_durations():
+    assert parse_reset("6m0s") == 360.0
+    assert parse_reset("1s") == 1.0
+    assert parse_reset("20ms") == pytest.approx(0.02)
+    assert parse_reset("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_reset(None) is None
+
+
+async def test_submit_backs_off_on_429_and_reads_headers(monkeypatch):
+    dispatcher = _dispatcher()
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        dispatcher._paused_until = 0.0
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    headers = {
+        "x-ratelimit-limit-tokens": "600000",
+        "x-ratelimit-remaining-tokens": "1000",
+        "x-ratelimit-reset-tokens": "6s",
+    }
+    outcomes = [
+        _error(RateLimitError, 429, {"retry-after": "2"}),
+        _error(RateLimitError, 429),
+        SimpleNamespace(headers=headers),
+    ]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    raw = await dispatcher.submit(call, tokens=10)
+
+    assert raw.headers is headers
+    assert dispatcher.rate_limited == 2
+    assert sleeps[0] == pytest.approx(2.0, abs=0.1)  # retry-after floors the backoff
+    assert dispatcher.tokens.capacity == 600000
+    assert dispatcher.tokens.tokens <= 1000
+    assert dispatcher.tokens.rate == pytest.approx((600000 - 1000) / 6)
+    assert dispatcher.stats() == {"in_flight": 0, "queued": 0, "rate_limited": 2}
+
+
+async def test_submit_does_not_retry_bad_requests():
+    dispatcher = _dispatcher()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise _error(BadRequestError, 400)
+
+    with pytest.raises(BadRequestError):
+        await dispatcher.submit(call, tokens=1)
+    assert len(calls) == 1
+
+
+async def test_submit_bounds_in_flight_requests():
+    dispatcher = _dispatcher(max_concurrency=2)
+    release = asyncio.Event()
+    peak = []
+
+    async def call():
+        peak.append(dispatcher.in_flight)
+        await release.wait()
+        return SimpleNamespace(headers={})
+
+    tasks = [asyncio.create_task(dispatcher.submit(call, tokens=1)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    assert dispatcher.stats()["in_flight"] == 2
+    assert dispatcher.stats()["queued"] == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert max(peak) == 2
+    assert dispatcher.stats()["in_flight"] == 0
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.embedding import EmbeddingObject, EmbeddingService
+from app.services.embedding_providers import (
+    LocalEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+)
+
+
+def test_local_provider_is_deterministic_and_lexically_similar():
+    provider = LocalEmbeddingProvider(dimensions=256)
+    deploy = provider.embed_one("Deploy the release to production tonight")
+    again = LocalEmbeddingProvider(dimensions=256).embed_one(
+        "Deploy the release to production tonight"
+    )
+    deploying = provider.embed_one("deploying the production release")
+    invoice = provider.embed_one("Invoice from the catering vendor")
+
+    assert deploy.dtype == np.float32 and deploy.shape == (256,)
+    assert np.linalg.norm(deploy) == pytest.approx(1.0, abs=1e-5)
+    assert np.array_equal(deploy, again)
+    assert float(deploy @ deploying) > float(deploy @ invoice)
+    assert not provider.embed_one("  ").any()
+
+
+@pytest.mark.asyncio
+async def test_local_model_skips_openai_and_cache():
+    cache = AsyncMock()
+    service = EmbeddingService(model="local-hash-v1", vector_store=AsyncMock())
+    service.cache = cache
+    service.openai.embed = AsyncMock()
+
+    vectors = await service.embed_text(["quarterly roadmap review"])
+
+    assert vectors[0].shape == (settings.embedding_dimensions,)
+    service.openai.embed.assert_not_awaited()
+    cache.get_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_object_type_models_route_writes_to_local_provider():
+    store = AsyncMock()
+    store.existing_content_hashes.return_value = set()
+    store.write_models.return_value = {"u1": ["text-embedding-3-small"]}
+    store.store_embeddings_bulk.side_effect = lambda session, rows: [None] * len(rows)
+    service = EmbeddingService(
+        model="text-embedding-3-small",
+        vector_store=store,
+        cache=None,
+        object_type_models={"entity": "local-hash-v1"},
+    )
+    service.openai.embed = AsyncMock(return_value=[np.ones(4, dtype=np.float32)])
+    objects = [
+        EmbeddingObject(user_id="u1", object_type="entity", object_id="x", text="Acme"),
+        EmbeddingObject(user_id="u1", object_type="note", object_id="n", text="Plan"),
+    ]
+
+    assert await service.embed_and_store(None, objects) == 2
+
+    rows = [
+        row
+        for call in store.store_embeddings_bulk.await_args_list
+        for row in call.args[1]
+    ]
+    models = {row.object_type: row.embedding_model for row in rows}
+    assert models == {"entity": "local-hash-v1", "note": "text-embedding-3-small"}
+    service.openai.embed.assert_awaited_once_with(["Plan"], "text-embedding-3-small")
+    assert service.model_for("event", "m") == "m"
+
+
+@pytest.mark.asyncio
+async def test_openai_provider_requests_column_size_from_sized_models_only():
+    async def submit(call, tokens):
+        return await call()
+
+    dispatcher = Mock(submit=submit)
+    client = Mock()
+    client.embeddings.with_raw_response.create = AsyncMock(
+        return_value=SimpleNamespace(parse=lambda: SimpleNamespace(data=[]))
+    )
+    provider = OpenAIEmbeddingProvider(
+        dispatcher=dispatcher, dimensions=1536, client=client
+    )
+
+    await provider.embed(["a"], "text-embedding-3-large")
+    await provider.embed(["a"], "text-embedding-ada-002")
+
+    sized, legacy = client.embeddings.with_raw_response.create.await_args_list
+    assert sized.kwargs["dimensions"] == 1536
+    assert "dimensions" not in legacy.kwargs
+
+
+def test_openai_provider_leaves_retries_to_the_dispatcher():
+    provider = OpenAIEmbeddingProvider(dispatcher=Mock())
+
+    assert provider.client.max_retries == 0
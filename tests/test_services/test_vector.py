@@ -1,4 +1,7 @@
+from types import SimpleNamespace
+
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from app.services.vector import VectorStore, VectorRecord
 
@@ -26,10 +29,11 @@ async def test_store_embedding_statement(monkeypatch, dummy_session):
         params = stmt.compile().params
         assert params["user_id"] == "u1"
         assert params["object_type"] == "event"
-        return None
+        assert "RETURNING embeddings.id" in str(stmt)
+        return SimpleNamespace(scalar_one=lambda: "emb-1")
 
     monkeypatch.setattr(dummy_session, "execute", fake_execute)
-    await vs.store_embedding(
+    emb_id = await vs.store_embedding(
         dummy_session,
         user_id="u1",
         object_type="event",
@@ -40,3 +44,380 @@ async def test_store_embedding_statement(monkeypatch, dummy_session):
         content_hash="hash",
         metadata={},
     )
+    assert emb_id == "emb-1"
+
+
+@pytest.mark.asyncio
+async def test_search_many_single_round_trip(monkeypatch, dummy_session):
+    from app.services.vector import VectorQuery
+
+    vs = VectorStore()
+    calls = []
+    hydrated = []
+
+    def row(query_idx, object_id, score):
+        return SimpleNamespace(
+            query_idx=query_idx,
+            id=f"emb-{object_id}",
+            object_type="event",
+            object_id=object_id,
+            chunk_index=0,
+            meta={},
+            score=score,
+            recency_score=0.5,
+            final_score=0.85 * (1 - score) + 0.15 * 0.5,
+            strategy="exact",
+        )
+
+    async def fake_execute(stmt):
+        sql = str(stmt)
+        if "set_config" in sql:
+            return SimpleNamespace(all=lambda: [])
+        rows = [row(1, "b", 0.2), row(0, "a", 0.1), row(1, "c", 0.05)]
+        if "<=>" not in sql:
+            # Hydration of the final rows only
+            hydrated.append(stmt.compile().params)
+            return SimpleNamespace(all=lambda: rows)
+        calls.append(stmt)
+        return SimpleNamespace(all=lambda: rows)
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    results = await vs.search_many(
+        dummy_session,
+        user_id="u1",
+        queries=[
+            VectorQuery(query_embedding=[0.1, 0.2], top_k=5),
+            VectorQuery(query_embedding=[0.3, 0.4], top_k=1, sources=["slack"]),
+        ],
+    )
+
+    # One candidate statement for all queries
+    assert len(calls) == 1
+    assert [r.object_id for r in results[0]] == ["a"]
+    # top_k applied per query after reranking (closest candidate wins)
+    assert [r.object_id for r in results[1]] == ["c"]
+    # Metadata is hydrated once, for the surviving rows of all queries
+    assert len(hydrated) == 1
+    assert sorted(hydrated[0]["id_1"]) == ["emb-a", "emb-c"]
+
+
+@pytest.mark.asyncio
+async def test_search_many_empty_queries(dummy_session):
+    vs = VectorStore()
+    assert await vs.search_many(dummy_session, user_id="u1", queries=[]) == []
+
+
+def test_candidate_query_uses_per_query_ranking_params():
+    from app.services.vector import VectorQuery
+
+    vs = VectorStore()
+    stmt = vs._candidate_query(
+        "u1", VectorQuery(query_embedding=[0.1, 0.2], query_text="latest news"), 0
+    )
+    compiled = stmt.compile()
+    sql = str(compiled)
+    assert "occurred_at" in sql
+    assert "recency_score" in sql
+    # Recency-intent queries use the shorter tau
+    assert 7.0 in compiled.params.values()
+
+
+def test_candidate_query_clamps_recency_exponent():
+    """Ancient rows (e.g. ts fallback to 1970) must not underflow Postgres exp()."""
+    from app.services.vector import VectorQuery
+
+    stmt = VectorStore()._candidate_query(
+        "u1", VectorQuery(query_embedding=[0.1, 0.2]), 0
+    )
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "exp(-least(" in sql
+    assert VectorStore.MAX_RECENCY_DECAY in compiled.params.values()
+
+
+def test_candidate_query_filters_without_event_join():
+    from datetime import datetime, timezone
+
+    from app.services.vector import VectorQuery
+
+    vs = VectorStore()
+    sql = str(
+        vs._candidate_query(
+            "u1",
+            VectorQuery(
+                query_embedding=[0.1, 0.2],
+                time_start=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                sources=["slack"],
+            ),
+            0,
+        ).compile()
+    )
+    assert "JOIN events" not in sql
+    assert "embeddings.source IN" in sql
+    assert "embeddings.occurred_at >=" in sql
+    # Both the exact pre-filtered branch and the HNSW branch are present,
+    # gated by the bounded candidate estimate
+    assert "candidate_estimate_0" in sql
+    assert sql.count("UNION ALL") == 1
+
+
+@pytest.mark.asyncio
+async def test_search_escalates_short_hnsw_results(monkeypatch, dummy_session):
+    from app.core.config import settings
+
+    vs = VectorStore()
+    ef_values = []
+    attempts = []
+
+    def row(idx, strategy):
+        return SimpleNamespace(
+            query_idx=0,
+            id=f"emb-{idx}",
+            object_type="event",
+            object_id=f"obj-{idx}",
+            chunk_index=0,
+            meta={},
+            score=0.1 * idx,
+            recency_score=0.5,
+            final_score=1.0 - 0.1 * idx,
+            strategy=strategy,
+        )
+
+    async def fake_execute(stmt):
+        compiled = stmt.compile()
+        if "set_config" in str(compiled):
+            values = list(compiled.params.values())
+            ef_values.append(int(values[values.index("hnsw.ef_search") + 1]))
+            return SimpleNamespace(all=lambda: [])
+        attempts.append(str(compiled))
+        if len(attempts) == 1:
+            rows = [row(1, "hnsw")]  # filtered down below top_k
+        else:
+            rows = [row(i, "hnsw") for i in range(1, 4)]
+        return SimpleNamespace(all=lambda: rows)
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    results = await vs.search(
+        dummy_session, user_id="u1", query_embedding=[0.1, 0.2], top_k=3
+    )
+
+    assert len(results) == 3
+    assert results.plan.strategy == "hnsw"
+    assert results.plan.attempts == 2
+    assert ef_values[1] == min(ef_values[0] * 2, settings.hnsw_ef_search_max)
+    assert results.plan.ef_search == ef_values[1]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_exact_when_no_rows(monkeypatch, dummy_session):
+    vs = VectorStore()
+    statements = []
+
+    async def fake_execute(stmt):
+        sql = str(stmt.compile())
+        if "set_config" not in sql:
+            statements.append(sql)
+        return SimpleNamespace(all=lambda: [])
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    results = await vs.search(dummy_session, user_id="u1", query_embedding=[0.1])
+
+    assert list(results) == []
+    assert len(statements) == 2
+    # The retry is a plain exact scan without the candidate estimate
+    assert "candidate_estimate" not in statements[1]
+    assert results.plan.strategy == "exact"
+
+
+def test_candidate_query_filters_on_embedding_model():
+    from app.services.vector import VectorQuery
+
+    compiled = (
+        VectorStore()
+        ._candidate_query(
+            "u1", VectorQuery(query_embedding=[0.1], embedding_model="new"), 0
+        )
+        .compile()
+    )
+    assert "embeddings.embedding_model =" in str(compiled)
+    assert "new" in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_write_models_adds_migration_target(monkeypatch, dummy_session):
+    async def fake_execute(stmt):
+        return SimpleNamespace(
+            all=lambda: [
+                SimpleNamespace(user_id="u1", active_model="old", target_model="new"),
+                SimpleNamespace(user_id="u2", active_model="new", target_model=None),
+            ]
+        )
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    models = await VectorStore().write_models(
+        dummy_session, ["u1", "u2", "u3", "u1"], "old"
+    )
+    assert models == {"u1": ["old", "new"], "u2": ["new"], "u3": ["old"]}
+
+
+def test_hybrid_rerank_weighted_top_k():
+    import numpy as np
+
+    from app.services.vector import hybrid_rerank
+
+    distances = np.array([0.4, 0.1, 0.3, 0.1, 0.9])
+    recency = np.array([1.0, 0.0, 0.5, 1.0, 1.0])
+    order, similarity, final = hybrid_rerank(
+        distances, recency, alpha=0.5, top_k=3, mode="weighted"
+    )
+
+    np.testing.assert_allclose(similarity, 1.0 - distances)
+    np.testing.assert_allclose(final, 0.5 * (1.0 - distances) + 0.5 * recency)
+    assert order.tolist() == [3, 0, 2]
+
+
+def test_hybrid_rerank_multiplier_and_ties():
+    import numpy as np
+
+    from app.services.vector import hybrid_rerank
+
+    # Equal final scores fall back to semantic score
+    distances = np.array([0.5, 0.0])
+    recency = np.array([1.0, 0.0])
+    order, _, final = hybrid_rerank(
+        distances, recency, alpha=0.85, top_k=10, mode="multiplier"
+    )
+    assert final.tolist() == [0.5, 0.5]
+    assert order.tolist() == [1, 0]
+
+    empty, _, _ = hybrid_rerank(
+        np.array([]), np.array([]), alpha=0.85, top_k=5, mode="weighted"
+    )
+    assert empty.size == 0
+
+
+def test_quantized_storage_modes_rescore_shortlist():
+    from app.core.config import settings
+    from app.services.vector import VectorQuery
+
+    query = VectorQuery(query_embedding=[0.1, 0.2])
+
+    half_sql = str(
+        VectorStore(storage_mode="halfvec")._candidate_query("u1", query, 0).compile()
+    )
+    assert "CAST(embeddings.embedding AS HALFVEC(1536)) <=>" in half_sql
+
+    binary = VectorStore(storage_mode="binary")._candidate_query("u1", query, 0)
+    compiled = binary.compile()
+    assert "binary_quantize(embeddings.embedding) AS BIT(1536)) <~>" in str(compiled)
+    # Shortlist is oversampled before the full-precision rescore
+    assert (
+        settings.rerank_candidates_topn * settings.vector_quantized_oversample
+        in compiled.params.values()
+    )
+
+    with pytest.raises(ValueError):
+        VectorStore(storage_mode="int8")
+
+
+def test_matryoshka_mode_uses_short_prefix(monkeypatch):
+    from app.core.config import settings
+    from app.services.vector import VectorQuery
+
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-3-small")
+    query = VectorQuery(query_embedding=[0.01] * 1536)
+    stmt = VectorStore(storage_mode="matryoshka")._candidate_query("u1", query, 0)
+    compiled = stmt.compile()
+    sql = str(compiled)
+
+    dim = settings.embedding_short_dim
+    # Literal constants so the expression index can match
+    assert f"CAST(subvector(embeddings.embedding, 1, {dim}) AS VECTOR({dim}))" in sql
+    assert [0.01] * dim in compiled.params.values()
+
+
+def test_matryoshka_mode_requires_matryoshka_trained_model(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-ada-002")
+    with pytest.raises(ValueError, match="text-embedding-3"):
+        VectorStore(storage_mode="matryoshka")
+
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-3-large")
+    assert VectorStore(storage_mode="matryoshka").storage_mode == "matryoshka"
+
+
+@pytest.mark.asyncio
+async def test_store_embeddings_bulk_single_statement(monkeypatch, dummy_session):
+    from app.services.vector import EmbeddingWrite
+
+    vs = VectorStore()
+    statements = []
+
+    def write(object_id, chunk_index, vector):
+        return EmbeddingWrite(
+            user_id="u1",
+            object_type="event",
+            object_id=object_id,
+            chunk_index=chunk_index,
+            embedding=vector,
+            embedding_model="m",
+            content_hash="h",
+        )
+
+    async def fake_execute(stmt):
+        statements.append(stmt)
+        returned = [
+            SimpleNamespace(
+                id=f"id-{oid}-{idx}",
+                user_id="u1",
+                object_type="event",
+                object_id=oid,
+                chunk_index=idx,
+                embedding_model="m",
+                inserted=oid == "a",
+            )
+            for oid, idx in (("b", 0), ("a", 0), ("a", 1))
+        ]
+        return SimpleNamespace(all=lambda: returned)
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    rows = [write("a", 0, [0.1]), write("a", 1, [0.2]), write("b", 0, [0.3])]
+    # Repeated key within the batch: last one wins
+    rows.append(write("a", 0, [0.4]))
+    results = await vs.store_embeddings_bulk(dummy_session, rows)
+
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, object_type, object_id, chunk_index" in sql
+    assert "embedding = excluded.embedding" in sql
+    assert "xmax = 0" in sql
+    params = statements[0].compile(dialect=postgresql.dialect()).params
+    assert sum(k.startswith("object_id") for k in params) == 3
+    assert [r.id for r in results] == ["id-a-0", "id-a-1", "id-b-0", "id-a-0"]
+    assert [r.inserted for r in results] == [True, True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_existing_content_hashes_tuple_lookup(monkeypatch, dummy_session):
+    vs = VectorStore()
+    statements = []
+
+    async def fake_execute(stmt):
+        statements.append(stmt)
+        found = SimpleNamespace(
+            user_id="u1", object_type="event", object_id="a", content_hash="h1"
+        )
+        return SimpleNamespace(all=lambda: [found])
+
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+    keys = [("u1", "event", "a", "h1"), ("u1", "event", "b", "h2")]
+    found = await vs.existing_content_hashes(
+        dummy_session, keys + keys[:1], embedding_model="m"
+    )
+
+    assert found == {("u1", "event", "a", "h1")}
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "(embeddings.user_id, embeddings.object_type" in sql
+    assert "embeddings.embedding_model =" in sql
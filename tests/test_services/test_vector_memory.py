@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.vector import VectorQuery
+from app.services.vector_memory import InMemoryVectorStore, UserIndex, UserIndexCache
+
+
+def _row(emb_id, embedding, object_type="event", source="slack", days_ago=1, model="m"):
+    return SimpleNamespace(
+        id=emb_id,
+        object_type=object_type,
+        embedding_model=model,
+        object_id=f"obj-{emb_id}",
+        chunk_index=0,
+        meta={"title": emb_id},
+        source=source,
+        occurred_at=datetime.now(timezone.utc) - timedelta(days=days_ago),
+        embedding=np.asarray(embedding, dtype=np.float32),
+    )
+
+
+def _store(rows):
+    store = InMemoryVectorStore(
+        embedding_dim=2, cache=UserIndexCache(max_bytes=1 << 20, ttl_seconds=60)
+    )
+    calls = []
+
+    async def fake_execute(stmt):
+        calls.append(str(stmt))
+        return SimpleNamespace(
+            all=lambda: rows, scalar_one=lambda: "emb-new", rowcount=1
+        )
+
+    return store, calls, fake_execute
+
+
+@pytest.fixture
+def db_session():
+    """Unbound AsyncSession: real commit/rollback events, execute patched."""
+    return AsyncSession()
+
+
+@pytest.mark.asyncio
+async def test_memory_search_loads_once_and_filters(monkeypatch, dummy_session):
+    rows = [
+        _row("a", [1.0, 0.0]),
+        _row("b", [0.9, 0.1], source="telegram"),
+        _row("c", [0.0, 1.0]),
+        _row("n", [1.0, 0.0], object_type="note", source=None),
+    ]
+    store, calls, fake_execute = _store(rows)
+    monkeypatch.setattr(dummy_session, "execute", fake_execute)
+
+    results = await store.search_many(
+        dummy_session,
+        user_id="u1",
+        queries=[
+            VectorQuery(query_embedding=[1.0, 0.0], top_k=2, object_types=["event"]),
+            VectorQuery(query_embedding=[1.0, 0.0], top_k=5, sources=["telegram"]),
+        ],
+    )
+    again = await store.search(dummy_session, user_id="u1", query_embedding=[0, 1])
+
+    assert len(calls) == 1  # Second search served from the cached matrix
+    assert [r.id for r in results[0]] == ["a", "b"]
+    assert results[0][0].score == pytest.approx(0.0, abs=1e-6)
+    assert results[0].plan.strategy == "memory"
+    assert results[0].plan.candidates == 3
+    assert [r.id for r in results[1]] == ["b"]
+    assert again[0].id == "c"
+
+
+@pytest.mark.asyncio
+async def test_memory_store_and_delete_update_cached_index(monkeypatch, db_session):
+    store, calls, fake_execute = _store([_row("a", [1.0, 0.0])])
+    monkeypatch.setattr(db_session, "execute", fake_execute)
+    await store.search(db_session, user_id="u1", query_embedding=[1.0, 0.0])
+
+    await store.store_embedding(
+        db_session,
+        user_id="u1",
+        object_type="note",
+        object_id="note-1",
+        chunk_index=0,
+        embedding=[0.0, 2.0],
+        embedding_model="text-embedding-ada-002",
+        content_hash="hash",
+    )
+    await db_session.commit()
+    results = await store.search(db_session, user_id="u1", query_embedding=[0, 1])
+    assert [r.id for r in results] == ["emb-new", "a"]
+    assert results[0].object_id == "note-1"
+
+    await store.delete_by_object(
+        db_session, user_id="u1", object_type="note", object_id="note-1"
+    )
+    await db_session.commit()
+    results = await store.search(db_session, user_id="u1", query_embedding=[0, 1])
+    assert [r.id for r in results] == ["a"]
+    # Only the initial load read embeddings back from Postgres
+    assert sum(sql.startswith("SELECT") for sql in calls) == 1
+
+
+def test_user_index_filters_on_embedding_model():
+    index = UserIndex.from_rows(
+        [_row("old", [1.0, 0.0]), _row("new", [1.0, 0.0], model="m2")], 2
+    )
+    mask = index.filter_mask(VectorQuery(query_embedding=[1.0, 0.0]))
+    assert mask.tolist() == [True, True]
+    mask = index.filter_mask(
+        VectorQuery(query_embedding=[1.0, 0.0], embedding_model="m2")
+    )
+    assert mask.tolist() == [False, True]
+
+
+def test_user_index_cache_evicts_least_recently_used():
+    def index(n):
+        return UserIndex.from_rows([_row(str(i), [1.0, 0.0]) for i in range(n)], 2)
+
+    size = index(4).nbytes
+    cache = UserIndexCache(max_bytes=size * 2, ttl_seconds=60)
+    cache.put("u1", index(4))
+    cache.put("u2", index(4))
+    assert cache.get("u1") is not None  # u1 becomes most recently used
+    cache.put("u3", index(4))
+
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.get("u3") is not None
+
+
+@pytest.mark.asyncio
+async def test_memory_bulk_upsert_updates_cached_index(monkeypatch, db_session):
+    from uuid import uuid4
+
+    from app.services.vector import EmbeddingWrite
+
+    user_id = uuid4()
+    store, _, fake_execute = _store([_row("a", [1.0, 0.0])])
+    monkeypatch.setattr(db_session, "execute", fake_execute)
+    await store.search(db_session, user_id=str(user_id), query_embedding=[1.0, 0.0])
+
+    async def fake_bulk(session, rows):
+        from app.services.vector import EmbeddingWriteResult
+
+        return [EmbeddingWriteResult(id=f"new-{i}", inserted=True) for i in range(2)]
+
+    monkeypatch.setattr(
+        "app.services.vector.VectorStore.store_embeddings_bulk",
+        lambda self, session, rows: fake_bulk(session, rows),
+    )
+    await store.store_embeddings_bulk(
+        db_session,
+        [
+            EmbeddingWrite(
+                user_id=user_id,  # UUID, as ORM rows carry it
+                object_type="event",
+                object_id=f"obj-{i}",
+                chunk_index=0,
+                embedding=vector,
+                embedding_model="m",
+                content_hash="h",
+            )
+            for i, vector in enumerate(([0.0, 1.0], [0.6, 0.8]))
+        ],
+    )
+
+    await db_session.commit()
+    results = await store.search(db_session, user_id=user_id, query_embedding=[0, 1])
+    assert [r.id for r in results] == ["new-0", "new-1", "a"]
+
+
+@pytest.mark.asyncio
+async def test_memory_rolled_back_writes_never_reach_the_cache(monkeypatch, db_session):
+    store, _, fake_execute = _store([_row("a", [1.0, 0.0])])
+    monkeypatch.setattr(db_session, "execute", fake_execute)
+    await store.search(db_session, user_id="u1", query_embedding=[1.0, 0.0])
+
+    await db_session.begin()
+    await store.store_embedding(
+        db_session,
+        user_id="u1",
+        object_type="note",
+        object_id="note-1",
+        chunk_index=0,
+        embedding=[0.0, 1.0],
+        embedding_model="m",
+        content_hash="hash",
+    )
+    # Not visible before the commit
+    results = await store.search(db_session, user_id="u1", query_embedding=[0, 1])
+    assert [r.id for r in results] == ["a"]
+    await db_session.rollback()
+    await db_session.commit()  # A later commit must not replay the patch
+
+    results = await store.search(db_session, user_id="u1", query_embedding=[0, 1])
+    assert [r.id for r in results] == ["a"]
+
+
+def test_user_index_appends_grow_every_column_geometrically():
+    index = UserIndex.from_rows([_row("a", [1.0, 0.0])], 2)
+    for i in range(4):
+        index.upsert(
+            f"n{i}",
+            embedding=[0.0, 1.0],
+            object_type="note",
+            embedding_model="m",
+            object_id=f"obj-n{i}",
+            chunk_index=0,
+            metadata={},
+            source=None,
+            occurred_at=None,
+        )
+
+    assert index.size == 5
+    columns = (index.object_types, index.models, index.sources, index.occurred_at)
+    assert {len(column) for column in columns} == {index.matrix.shape[0]} == {8}
+    mask = index.filter_mask(VectorQuery(query_embedding=[1.0, 0.0]))
+    assert mask.shape == (5,)
+
+    index.remove(np.array([True, False, True, False, True]))
+    assert index.ids == ["a", "n1", "n3"]
+    assert index.object_types[:3].tolist() == ["event", "note", "note"]
+    assert index.filter_mask(
+        VectorQuery(query_embedding=[1.0, 0.0], object_types=["note"])
+    ).tolist() == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_user_index_cache_drops_idle_load_locks():
+    cache = UserIndexCache(max_bytes=1 << 20, ttl_seconds=60)
+
+    async with cache.lock("u1"):
+        # Concurrent loads of the same user share the lock
+        assert cache.lock("u1") is cache.lock("u1")
+        assert len(cache._locks) == 1
+    for i in range(100):
+        async with cache.lock(f"user-{i}"):
+            pass
+
+    assert len(cache._locks) == 0